@@ -0,0 +1,406 @@
+import bisect
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from data_registry import dataset_paths, dataset_version, load_dataset, load_reference, reference_version, tree_version
+from data_validation import PARTY_CODES
+from instrumentation import count, span
+from model_registry import models as registered_models
+
+# Analytics
+# Cross-model aggregations built once per process from the dataset registry and
+# rebuilt only when one of the underlying CSVs changes. Party codes follow the
+# display order of data_validation.PARTY_CODES; codes found in the data that are
+# not listed there are appended. Seat counts, legend membership and the seats of
+# each nation come from one bincount over a snapshot's winner codes, checked
+# against the published seat_share file.
+
+NATIONS = ["England", "Scotland", "Wales", "Northern Ireland"]
+
+FACT_COLUMNS = ["model", "year", "party", "vote_share", "seats", "actual_vote_share", "actual_seats"]
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def _cached(name:str, version, build, key=None):
+    cache_key = name if key is None else (name, key)
+    with _lock:
+        entry = _cache.get(cache_key)
+        if entry is not None and entry[0] == version:
+            count(f"analytics.{name}.hit")
+            return entry[1]
+    count(f"analytics.{name}.miss")
+    with span(f"analytics.{name}"):
+        value = build()
+    with _lock:
+        _cache[cache_key] = (version, value)
+    return value
+
+
+def clear():
+    """
+    Drops every cached table and index, so the next lookup rebuilds it.
+    """
+    with _lock:
+        _cache.clear()
+
+
+def _stack(kind:str, value_column:str, models):
+    frames = []
+    for model, dataset_kind, year in dataset_paths():
+        if dataset_kind != kind or model not in models:
+            continue
+        dataset_df = load_dataset(model, kind, year)
+        frames.append(pd.DataFrame({
+            "model": model,
+            "year": year,
+            "party": dataset_df["Party"].astype(str).to_numpy(),
+            value_column: dataset_df[dataset_df.columns[1]].to_numpy(),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_fact_table():
+    """
+    Builds one long-format table of every model's vote share and seat prediction next to the actual result.
+
+    :return: DataFrame with model, year, party, vote_share, seats, actual_vote_share and actual_seats columns.
+        Actual columns are NaN for years without results.
+    """
+    models = {model for model, _, _ in dataset_paths() if model != "actuals"}
+
+    predictions = _stack("vote_share", "vote_share", models).merge(
+        _stack("seat_share", "seats", models), on=["model", "year", "party"], how="outer")
+    actuals = _stack("vote_share", "actual_vote_share", {"actuals"}).merge(
+        _stack("seat_share", "actual_seats", {"actuals"}), on=["model", "year", "party"], how="outer")
+
+    fact_df = predictions.merge(actuals.drop(columns="model"), on=["year", "party"], how="left")
+    fact_df["model"] = fact_df["model"].astype("category")
+    fact_df["party"] = fact_df["party"].astype("category")
+    fact_df["year"] = fact_df["year"].astype("int16")
+    fact_df["actual_seats"] = fact_df["actual_seats"].astype("Int16")
+
+    return fact_df[FACT_COLUMNS].sort_values(["year", "model", "party"], ignore_index=True)
+
+
+def fact_table():
+    """
+    Returns the shared fact table, rebuilding it when any share CSV changes.
+
+    :return: DataFrame, see build_fact_table.
+    """
+    return _cached("fact_table", tree_version(("vote_share", "seat_share")), build_fact_table)
+
+
+def _hexmap_snapshots():
+    return sorted((model, year) for model, kind, year in dataset_paths() if kind == "hexmap")
+
+
+def build_constituency_index():
+    """
+    Builds a dense integer index of constituencies and the winning party code of every hexmap snapshot.
+
+    Constituency ids are row positions in the first hexmap file. Other snapshots are aligned to
+    them once here, so comparing two snapshots later is a plain array operation.
+
+    :return: Dictionary with constituency, constituency_name, coord_one, coord_two, nation, party_codes,
+        party_names, party_colors, snapshots, row_seats, models, years and winner_table keys. nation holds
+        indexes into NATIONS. snapshots maps (model, year) to an int8 array of indexes into party_codes,
+        with -1 where a snapshot has no row for a seat. row_seats maps (model, year) to the constituency
+        id of each row of that CSV. winner_table holds the same codes as a constituencies x models x years
+        array.
+    """
+    snapshots = _hexmap_snapshots()
+    frames = {snapshot: load_dataset(snapshot[0], "hexmap", snapshot[1]) for snapshot in snapshots}
+    reference_df = frames[snapshots[0]]
+
+    # Names repeat for a few seats, so the occurrence count is part of the key
+    def seat_keys(constituency_df):
+        return pd.MultiIndex.from_arrays([
+            constituency_df["Constituency"].astype(str),
+            constituency_df.groupby("Constituency", observed=True).cumcount(),
+        ])
+
+    reference_keys = seat_keys(reference_df)
+
+    seen_codes = set()
+    for constituency_df in frames.values():
+        seen_codes.update(constituency_df["Winner"].astype(str))
+    party_codes = PARTY_CODES + sorted(seen_codes - set(PARTY_CODES))
+
+    party_names = {}
+    party_colors = {}
+    for constituency_df in frames.values():
+        labels = constituency_df[["Winner", "elected_mp_party_name", "color"]].astype(str).drop_duplicates()
+        for code, name, color in labels.itertuples(index=False):
+            party_names.setdefault(code, name)
+            party_colors.setdefault(code, color)
+
+    winners = {}
+    row_seats = {}
+    for snapshot, constituency_df in frames.items():
+        codes = pd.Categorical(constituency_df["Winner"].astype(str), categories=party_codes).codes.astype(np.int8)
+        if constituency_df["Constituency"].astype(str).equals(reference_df["Constituency"].astype(str)):
+            winners[snapshot] = codes
+            row_seats[snapshot] = np.arange(len(codes), dtype=np.int16)
+        else:
+            positions = seat_keys(constituency_df).get_indexer(reference_keys)
+            winners[snapshot] = np.where(positions >= 0, codes[positions], -1).astype(np.int8)
+            row_seats[snapshot] = reference_keys.get_indexer(seat_keys(constituency_df)).astype(np.int16)
+
+    # Dense seats x models x years table, so one seat's whole history is a single row lookup.
+    # Actual results, where a hexmap exists for them, come last.
+    registry_order = {entry["model"]: position for position, entry in enumerate(registered_models())}
+    models = sorted({model for model, _ in snapshots},
+                    key=lambda model: (model == "actuals", registry_order.get(model, len(registry_order)), model))
+    years = sorted({year for _, year in snapshots})
+    winner_table = np.full((len(reference_df), len(models), len(years)), -1, dtype=np.int8)
+    for (model, year), codes in winners.items():
+        winner_table[:, models.index(model), years.index(year)] = codes
+
+    nations_df = load_reference("constituency_nations")
+    nation = reference_df["Constituency"].astype(str).map(dict(zip(nations_df["Constituency"], nations_df["Nation"])))
+    if nation.isna().any():
+        missing = ", ".join(reference_df.loc[nation.isna(), "Constituency"].astype(str))
+        raise ValueError(f"constituency_nations.csv has no nation for: {missing}")
+
+    return dict(
+        constituency=reference_df["Constituency"].astype(str).to_numpy(),
+        constituency_name=reference_df["constituency_name"].astype(str).to_numpy(),
+        coord_one=reference_df["coord_one"].to_numpy(),
+        coord_two=reference_df["coord_two"].to_numpy(),
+        nation=pd.Categorical(nation, categories=NATIONS).codes.astype(np.int8),
+        party_codes=party_codes,
+        party_names=np.array([party_names.get(code, code) for code in party_codes], dtype=object),
+        party_colors=np.array([party_colors.get(code, "#909090") for code in party_codes], dtype=object),
+        snapshots=winners,
+        row_seats=row_seats,
+        models=models,
+        years=years,
+        winner_table=winner_table,
+    )
+
+
+def _index_version():
+    return tree_version(("hexmap",)), reference_version("constituency_nations")
+
+
+def constituency_index():
+    """
+    Returns the shared constituency index, rebuilding it when any hexmap CSV or the nations table changes.
+
+    :return: Dictionary, see build_constituency_index.
+    """
+    return _cached("constituency_index", _index_version(), build_constituency_index)
+
+
+def seat_changes(index:dict, before, after):
+    """
+    Compares two hexmap snapshots seat by seat.
+
+    :param index: Constituency index from constituency_index().
+    :param before: (model, year) of the first snapshot.
+    :param after: (model, year) of the second snapshot.
+
+    :return: Dictionary with before and after winner code arrays, a changed boolean array and a
+        flow matrix where flow[i, j] counts seats won by party_codes[i] before and party_codes[j] after.
+    """
+    before_codes = index["snapshots"][before]
+    after_codes = index["snapshots"][after]
+    known = (before_codes >= 0) & (after_codes >= 0)
+    changed = known & (before_codes != after_codes)
+
+    party_count = len(index["party_codes"])
+    flow = np.bincount(
+        before_codes[known].astype(np.intp) * party_count + after_codes[known],
+        minlength=party_count * party_count,
+    ).reshape(party_count, party_count)
+
+    return dict(before=before_codes, after=after_codes, changed=changed, flow=flow)
+
+
+def build_seat_tally(index:dict, model:str, year:int):
+    """
+    Counts one hexmap snapshot's seats by party and nation in a single bincount over its winner codes.
+
+    :param index: Constituency index from constituency_index().
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Dictionary with seats (seats per party, aligned with party_codes), by_nation (NATIONS x
+        party_codes array), legend (boolean array of parties winning at least one seat), missing (seats
+        the snapshot has no row for) and published_difference (dictionary of party code to published
+        seat_share minus counted seats, empty when they agree or there is no seat_share file).
+    """
+    codes = index["snapshots"][(model, year)]
+    party_count = len(index["party_codes"])
+
+    # Nation and party packed into one bin, with a leading bin per nation for seats the snapshot lacks
+    bins = np.bincount(
+        index["nation"].astype(np.intp) * (party_count + 1) + codes + 1,
+        minlength=len(NATIONS) * (party_count + 1),
+    ).reshape(len(NATIONS), party_count + 1)
+    by_nation = bins[:, 1:]
+    seats = by_nation.sum(axis=0)
+
+    difference = {}
+    if (model, "seat_share", year) in dataset_paths():
+        share_df = load_dataset(model, "seat_share", year)
+        published = dict(zip(share_df["Party"].tolist(), share_df["Total_Constituencies"].tolist()))
+        counted = dict(zip(index["party_codes"], seats.tolist()))
+        for party in index["party_codes"] + sorted(set(published) - set(counted)):
+            delta = published.get(party, 0) - counted.get(party, 0)
+            if delta:
+                difference[party] = delta
+        if difference:
+            count("analytics.seat_tally.mismatch")
+
+    return dict(
+        seats=seats,
+        by_nation=by_nation,
+        legend=seats > 0,
+        missing=int(bins[:, 0].sum()),
+        published_difference=difference,
+    )
+
+
+def seat_tally(model:str, year:int):
+    """
+    Returns the seat tally of one hexmap snapshot, memoized per snapshot until the constituency index
+    or its seat_share file changes.
+
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Dictionary, see build_seat_tally.
+    """
+    version = (_index_version(), dataset_version(model, "seat_share", year))
+    return _cached("seat_tally", version, lambda: build_seat_tally(constituency_index(), model, year), key=(model, year))
+
+
+def hover_text(index:dict, model:str, year:int, model_labels:dict):
+    """
+    Builds the hexmap tooltip for every constituency: every model's predicted winner for the year and the
+    actual winner where known. Seats where every model agrees get a single line.
+
+    :param index: Constituency index from constituency_index().
+    :param model: Model the map is drawn for, listed first.
+    :param year: Election year.
+    :param model_labels: Dictionary of model directory name to display label.
+
+    :return: Object array of tooltip strings in constituency id order.
+    """
+    codes = index["winner_table"][:, :, index["years"].index(year)]
+    party_codes = np.array(index["party_codes"] + ["n/a"], dtype=object)
+
+    predicted = [position for position, name in enumerate(index["models"])
+                 if name != "actuals" and (codes[:, position] >= 0).any()]
+    predicted.sort(key=lambda position: index["models"][position] != model)
+    agree = (codes[:, predicted] == codes[:, predicted[:1]]).all(axis=1)
+
+    names = np.asarray(index["constituency_name"], dtype=object)
+    text = names + "<br>All models: " + party_codes[codes[:, predicted[0]]]
+    disagree = ~agree
+    detail = names[disagree]
+    for position in predicted:
+        label = model_labels.get(index["models"][position], index["models"][position])
+        detail = detail + f"<br>{label}: " + party_codes[codes[disagree, position]]
+    text[disagree] = detail
+
+    if "actuals" in index["models"]:
+        actual = codes[:, index["models"].index("actuals")]
+        known = actual >= 0
+        text[known] = text[known] + "<br>Actual: " + party_codes[actual[known]]
+    return text
+
+
+def seat_history(index:dict, seat:int, model_labels:dict):
+    """
+    Looks up one constituency's winner under every model and year.
+
+    :param index: Constituency index from constituency_index().
+    :param seat: Constituency id.
+    :param model_labels: Dictionary of model directory name to display label.
+
+    :return: DataFrame with one row per model, Actual last, and one column per year. Missing
+        snapshots are left empty.
+    """
+    history = index["winner_table"][seat]
+    party_names = np.append(index["party_names"], None)
+    labels = ["Actual" if model == "actuals" else model_labels.get(model, model) for model in index["models"]]
+    return pd.DataFrame(party_names[history], index=labels, columns=index["years"])
+
+
+def _search_key(text:str):
+    # Lower case without accents, so "ynys mon" finds "Ynys Môn"
+    decomposed = unicodedata.normalize("NFKD", str(text).lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def build_name_index(index:dict):
+    """
+    Builds sorted search keys over the constituency names for prefix lookups with bisect.
+
+    :param index: Constituency index from constituency_index().
+
+    :return: Dictionary with names (full-name keys) and words (keys starting at each later word),
+        each a tuple of a sorted key list and a matching list of constituency ids.
+    """
+    names = []
+    words = []
+    seen = set()
+    for seat, name in enumerate(index["constituency_name"]):
+        key = _search_key(name)
+        # Some seats appear twice in the hexmap files under one name and hex
+        hexagon = (key, index["coord_one"][seat], index["coord_two"][seat])
+        if hexagon in seen:
+            continue
+        seen.add(hexagon)
+        names.append((key, seat))
+        starts = [position + 1 for position, char in enumerate(key) if char in " -,("]
+        words.extend((key[start:], seat) for start in starts if start < len(key))
+    names.sort()
+    words.sort()
+    return dict(
+        names=([key for key, _ in names], [seat for _, seat in names]),
+        words=([key for key, _ in words], [seat for _, seat in words]),
+    )
+
+
+def name_index():
+    """
+    Returns the shared constituency name index, rebuilt with the constituency index.
+
+    :return: Dictionary, see build_name_index.
+    """
+    return _cached("name_index", _index_version(), lambda: build_name_index(constituency_index()))
+
+
+def search_constituencies(query:str, limit:int=10):
+    """
+    Finds constituencies whose name, or any word in it, starts with the query.
+
+    Names starting with the query come first, then names with a later word that does.
+
+    :param query: Text typed by the user.
+    :param limit: Maximum number of results.
+
+    :return: List of constituency ids.
+    """
+    prefix = _search_key(query).strip()
+    if not prefix:
+        return []
+
+    found = []
+    search = name_index()
+    for keys, seats in (search["names"], search["words"]):
+        position = bisect.bisect_left(keys, prefix)
+        while position < len(keys) and keys[position].startswith(prefix) and len(found) < limit:
+            if seats[position] not in found:
+                found.append(seats[position])
+            position += 1
+    return found
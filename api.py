@@ -0,0 +1,438 @@
+import argparse
+import csv
+import gzip
+import hashlib
+import io
+import json
+import sys
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from instrumentation import count
+
+# Prediction API
+# Read-only HTTP API over the same in-memory datasets the Streamlit pages use, so
+# partners can fetch the numbers behind the scorecards and the hexmap without a
+# browser session or a figure render:
+#   /models
+#   /predictions/{model}/{year}/vote_share
+#   /predictions/{model}/{year}/seats
+#   /predictions/{model}/{year}/nations
+#   /predictions/{model}/{year}/constituencies
+#   /predictions/{model}/{year}/constituencies/{id}
+# Add ?format=csv for CSV. Each response body is built once per data version,
+# gzipped and hashed for its ETag up front, so a request is a dictionary lookup
+# and a conditional request is answered with a bare 304. A plain ASGI app run by
+# uvicorn, which is installed with Streamlit. Start it with `python api.py`, or
+# next to the app workers with `python serve.py --api-port 8502`.
+
+# Seconds between checks of the data version. A hot-reloaded CSV shows up in the API within this time.
+VERSION_CHECK_SECONDS = 1.0
+
+# Bodies smaller than this are not worth gzipping
+GZIP_MIN_BYTES = 512
+
+CONTENT_TYPES = {"json": b"application/json", "csv": b"text/csv; charset=utf-8"}
+
+_lock = threading.Lock()
+_responses = {}
+_version = None
+_checked = 0.0
+
+
+class NotFound(Exception):
+    pass
+
+
+# Bodies
+def _party_names():
+    from analytics import constituency_index
+
+    index = constituency_index()
+    return dict(zip(index["party_codes"], index["party_names"]))
+
+
+def _model(model:str, year:str):
+    from model_registry import models
+
+    for entry in models():
+        if entry["model"] == model:
+            if year.isdigit() and int(year) in entry["years"]:
+                return entry, int(year)
+            raise NotFound(f"no {year} prediction for {model}")
+    raise NotFound(f"unknown model {model}")
+
+
+def models_rows():
+    """
+    Lists the models with a prediction page and the years each covers.
+
+    :return: List of dictionaries with model, label, title and years keys.
+    """
+    from model_registry import models
+
+    return [dict(model=entry["model"], label=entry["label"], title=entry["title"], years=entry["years"])
+            for entry in models()]
+
+
+def share_rows(model:str, year:int, kind:str):
+    """
+    Lists a model's vote share or seat predictions, with the deltas shown on its scorecards.
+
+    :param model: Model directory name.
+    :param year: Election year.
+    :param kind: "vote_share" or "seats".
+
+    :return: List of dictionaries with party, name, value and delta keys. delta is actual minus predicted, or
+        None when the year has no actual result.
+    """
+    from backtest import metric_deltas
+    from data_registry import load_dataset
+
+    if kind == "vote_share":
+        share_df = load_dataset(model, "vote_share", year)
+        values = share_df["Vote_Share"].astype(float).tolist()
+    else:
+        share_df = load_dataset(model, "seat_share", year)
+        values = share_df["Total_Constituencies"].astype(int).tolist()
+    deltas = metric_deltas(model, year)[kind] or {}
+    names = _party_names()
+
+    rows = []
+    for party, value in zip(share_df["Party"].astype(str), values):
+        delta = deltas.get(party)
+        rows.append(dict(party=party, name=names.get(party, party), value=value,
+                         delta=None if delta is None else (int(delta) if kind == "seats" else float(delta))))
+    return rows
+
+
+def nation_rows(model:str, year:int):
+    """
+    Lists the seats each party is predicted to win in England, Scotland, Wales and Northern Ireland.
+
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: List of dictionaries with nation, party, name and seats keys, one per nation and party
+        winning at least one seat there.
+    """
+    from analytics import NATIONS, constituency_index, seat_tally
+
+    index = constituency_index()
+    by_nation = seat_tally(model, year)["by_nation"]
+    rows = []
+    for nation, party in zip(*by_nation.nonzero()):
+        rows.append(dict(nation=NATIONS[nation], party=index["party_codes"][party],
+                         name=str(index["party_names"][party]), seats=int(by_nation[nation, party])))
+    return rows
+
+
+def constituency_rows(model:str, year:int):
+    """
+    Lists the predicted winner of every constituency.
+
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: List of dictionaries with id, constituency, name, nation, coord_one, coord_two, winner and
+        party keys, in constituency id order. Seats missing from the prediction have no winner.
+    """
+    from analytics import NATIONS, constituency_index
+
+    index = constituency_index()
+    codes = index["snapshots"][(model, year)]
+    rows = []
+    for seat, code in enumerate(codes.tolist()):
+        rows.append(dict(
+            id=seat,
+            constituency=str(index["constituency"][seat]),
+            name=str(index["constituency_name"][seat]),
+            nation=NATIONS[index["nation"][seat]],
+            coord_one=int(index["coord_one"][seat]),
+            coord_two=int(index["coord_two"][seat]),
+            winner=index["party_codes"][code] if code >= 0 else None,
+            party=str(index["party_names"][code]) if code >= 0 else None,
+        ))
+    return rows
+
+
+def _csv_body(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]) if rows else [], lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def build_response(path:str, body_format:str):
+    """
+    Builds the body for one API path in one format, with its gzipped copy and ETag.
+
+    :param path: Request path.
+    :param body_format: "json" or "csv".
+
+    :return: Dictionary with status, body, gzip_body (None when not worth compressing), etag, gzip_etag and
+        content_type keys.
+    :raises NotFound: When the path does not name a model, year, endpoint or constituency.
+    """
+    parts = path.strip("/").split("/")
+    if parts == ["models"]:
+        rows = models_rows()
+        payload = rows
+    elif len(parts) in (4, 5) and parts[0] == "predictions":
+        entry, year = _model(parts[1], parts[2])
+        model, endpoint = entry["model"], parts[3]
+        if endpoint in ("vote_share", "seats") and len(parts) == 4:
+            rows = share_rows(model, year, endpoint)
+            payload = dict(model=model, year=year, parties=rows)
+        elif endpoint == "nations" and len(parts) == 4:
+            rows = nation_rows(model, year)
+            payload = dict(model=model, year=year, nations=rows)
+        elif endpoint == "constituencies":
+            rows = _constituencies(model, year)
+            payload = dict(model=model, year=year, constituencies=rows)
+            if len(parts) == 5:
+                seat = int(parts[4]) if parts[4].isdigit() else -1
+                if not 0 <= seat < len(rows):
+                    raise NotFound(f"unknown constituency {parts[4]}")
+                rows = [rows[seat]]
+                payload = dict(model=model, year=year, **rows[0])
+        else:
+            raise NotFound(f"unknown endpoint {endpoint}")
+    else:
+        raise NotFound(f"unknown path {path}")
+
+    if body_format == "csv":
+        # CSV has one flat table: the parties or constituencies, or the models with years joined
+        if parts == ["models"]:
+            rows = [dict(row, years=" ".join(map(str, row["years"]))) for row in rows]
+        body = _csv_body(rows)
+    else:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+
+    etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+    return dict(
+        status=200,
+        body=body,
+        gzip_body=gzip.compress(body, mtime=0) if len(body) >= GZIP_MIN_BYTES else None,
+        etag=f'"{etag}"'.encode(),
+        gzip_etag=f'"{etag}-gzip"'.encode(),
+        content_type=CONTENT_TYPES[body_format],
+    )
+
+
+def _constituencies(model:str, year:int):
+    # Every single-constituency response of a snapshot slices this one list
+    key = ("constituency_rows", model, year)
+    rows = _responses.get(key)
+    if rows is None:
+        rows = constituency_rows(model, year)
+        with _lock:
+            _responses[key] = rows
+    return rows
+
+
+def _error_response(status:int, message:str):
+    body = json.dumps(dict(error=message)).encode()
+    return dict(status=status, body=body, gzip_body=None, etag=None, gzip_etag=None,
+                content_type=CONTENT_TYPES["json"])
+
+
+# Cache
+def data_version():
+    """
+    Returns the combined version of every dataset and the nations table.
+
+    :return: Tuple that changes whenever any input CSV does.
+    """
+    from data_registry import reference_version, tree_version
+
+    return tree_version(), reference_version("constituency_nations")
+
+
+def _check_version(now:float):
+    global _version, _checked
+    if now - _checked < VERSION_CHECK_SECONDS:
+        return
+    _checked = now
+    version = data_version()
+    if version != _version:
+        with _lock:
+            _responses.clear()
+            _version = version
+        count("api.data_version")
+
+
+def clear():
+    """
+    Drops every prebuilt response, so each is built again on its next request.
+    """
+    global _version, _checked
+    with _lock:
+        _responses.clear()
+        _version = None
+        _checked = 0.0
+
+
+def get_response(path:str, body_format:str="json"):
+    """
+    Returns the precomputed response for a path, building it on first use for the current data version.
+
+    :param path: Request path.
+    :param body_format: "json" or "csv".
+
+    :return: Response dictionary, see build_response. Unknown paths give a 404 response.
+    """
+    _check_version(time.monotonic())
+    key = (path, body_format)
+    response = _responses.get(key)
+    if response is not None:
+        count("api.hit")
+        return response
+
+    count("api.miss")
+    try:
+        response = build_response(path, body_format)
+    except NotFound as error:
+        return _error_response(404, str(error))
+    with _lock:
+        _responses[key] = response
+    return response
+
+
+def prebuild():
+    """
+    Builds every response except the single-constituency ones, which are sliced from the constituency list on demand.
+
+    :return: Number of responses built.
+    """
+    paths = ["/models"]
+    for entry in models_rows():
+        for year in entry["years"]:
+            for endpoint in ("vote_share", "seats", "nations", "constituencies"):
+                paths.append(f"/predictions/{entry['model']}/{year}/{endpoint}")
+    for path in paths:
+        for body_format in CONTENT_TYPES:
+            get_response(path, body_format)
+    return len(paths) * len(CONTENT_TYPES)
+
+
+# ASGI App
+def _header(headers, name:bytes):
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+@lru_cache(maxsize=256)
+def _accepts_gzip(accept_encoding:bytes):
+    # Quality values per coding, e.g. "br;q=1.0, gzip;q=0.8, *;q=0". gzip;q=0 refuses
+    # gzip, and a coding that is not listed is only acceptable through *.
+    qualities = {}
+    for coding in accept_encoding.lower().split(b","):
+        name, *parameters = [part.strip() for part in coding.split(b";")]
+        quality = 1.0
+        for parameter in parameters:
+            if parameter.startswith(b"q="):
+                try:
+                    quality = float(parameter[2:])
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    for name in (b"gzip", b"x-gzip", b"*"):
+        if name in qualities:
+            return qualities[name] > 0
+    return False
+
+
+def _etag_matches(if_none_match:bytes, etag:bytes):
+    if if_none_match.strip() == b"*":
+        return True
+    return any(tag.strip().removeprefix(b"W/") == etag for tag in if_none_match.split(b","))
+
+
+async def app(scope, receive, send):
+    """
+    ASGI entry point.
+    """
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    if scope["method"] not in ("GET", "HEAD"):
+        response = _error_response(405, "read-only API")
+    else:
+        query = parse_qs(scope["query_string"].decode()) if scope["query_string"] else {}
+        body_format = query.get("format", ["json"])[0]
+        if body_format in CONTENT_TYPES:
+            response = get_response(scope["path"], body_format)
+        else:
+            response = _error_response(400, f"unknown format {body_format}")
+
+    headers = [(b"content-type", response["content_type"])]
+    status = response["status"]
+    body = response["body"]
+
+    if status == 200:
+        accept_encoding = _header(scope["headers"], b"accept-encoding")
+        etag = response["etag"]
+        if response["gzip_body"] is not None and accept_encoding is not None and _accepts_gzip(accept_encoding):
+            body = response["gzip_body"]
+            etag = response["gzip_etag"]
+            headers.append((b"content-encoding", b"gzip"))
+        headers += [(b"etag", etag), (b"cache-control", b"no-cache"), (b"vary", b"accept-encoding")]
+
+        if_none_match = _header(scope["headers"], b"if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            count("api.not_modified")
+            await send({"type": "http.response.start", "status": 304, "headers": headers[1:]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+    headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+def load():
+    """
+    Loads the data tree the way the Streamlit app does and prebuilds every response.
+
+    :return: Number of responses built.
+    """
+    from data_bundle import open_bundle
+    from data_registry import attach_bundle, preload
+    from data_watcher import start
+
+    attach_bundle(open_bundle())
+    preload()
+    start()
+    return prebuild()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the predictions as a read-only JSON/CSV API.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8502, help="port to listen on")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    built = load()
+    print(f"Prebuilt {built} responses, serving on http://{args.host}:{args.port}", flush=True)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False, lifespan="on")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
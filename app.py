@@ -1,11 +1,150 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-from pathlib import Path
+
+from instrumentation import begin_rerun, end_rerun, span, start_metrics_server, timed
+from model_registry import default_year, election_years, model_for_page, models
+
+# pandas, pyarrow, numpy and the figure code are only imported once a model page
+# is shown, so the Introduction and Methodology pages stay cheap to boot.
 
 st.set_page_config(layout="wide")
 
+# Instrumentation, a no-op unless ELECTION_PREDICTOR_METRICS is set
+begin_rerun()
+start_metrics_server()
+
+# Load the data tree once per process, shared by every session. The compiled
+# bundle is memory-mapped when present; any CSV newer than it is parsed instead.
+# The data watcher then swaps in CSVs as they are regenerated, so sessions see
+# new predictions on their next rerun.
+@st.cache_resource
+def load_data():
+    import os
+
+    from data_bundle import open_bundle
+    from data_registry import attach_bundle, preload
+    from data_watcher import start
+    from live_results import start as start_live_results
+    from render_cache import attach_render_bundle
+
+    attach_bundle(open_bundle())
+    preload()
+    start()
+    start_live_results()
+
+    # Workers started by serve.py share the pages it pre-rendered
+    if os.environ.get("ELECTION_PREDICTOR_RENDER_BUNDLE"):
+        attach_render_bundle(os.environ["ELECTION_PREDICTOR_RENDER_BUNDLE"])
+
+def get_page_render(model:str, election_year:int):
+    """
+    Returns the cached render for a model and year.
+
+    :param model: Model directory name.
+    :param election_year: The election year.
+
+    :return: Render dictionary from render_cache.
+    """
+    load_data()
+
+    from render_cache import get_render
+
+    return get_render(model, election_year)
+
+# Prebuilt Figures
+@st.cache_resource
+def plotly_chart_internals():
+    """
+    Imports the Streamlit internals plotly_chart_json builds its element with, once per process.
+
+    They are private and were tested against the Streamlit version pinned in requirements.txt. When
+    they are missing, or turn out to have changed when first used, the dictionary is emptied and
+    every chart goes through the public st.plotly_chart instead.
+
+    :return: Dictionary of the imported names, empty when they are unavailable.
+    """
+    try:
+        from streamlit.elements.lib.form_utils import current_form_id
+        from streamlit.elements.lib.layout_utils import LayoutConfig
+        from streamlit.elements.lib.utils import compute_and_register_element_id
+        from streamlit.elements.plotly_chart import PlotlyChartSelectionSerde, parse_selection_mode
+        from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+        from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+        from streamlit.runtime.state import register_widget
+    except ImportError as error:
+        import logging
+
+        logging.getLogger("election_predictor.app").warning("Sending charts through st.plotly_chart: %s", error)
+        return {}
+    return dict(current_form_id=current_form_id, LayoutConfig=LayoutConfig,
+                compute_and_register_element_id=compute_and_register_element_id,
+                PlotlyChartSelectionSerde=PlotlyChartSelectionSerde, parse_selection_mode=parse_selection_mode,
+                PlotlyChartProto=PlotlyChartProto, get_script_run_ctx=get_script_run_ctx,
+                register_widget=register_widget)
+
+def _enqueue_plotly_json(internals:dict, spec:str, height:int, key:str, on_select:bool):
+    # The same proto and element id st.plotly_chart produces, so widget state carries over between the
+    # two. Everything that does not register anything is built first.
+    dg = st._main
+    selection_mode = "points" if on_select else ("points", "box", "lasso")
+    proto = internals["PlotlyChartProto"]()
+    proto.theme = "streamlit"
+    proto.form_id = internals["current_form_id"](dg)
+    proto.spec = spec
+    proto.config = "{}"
+    layout_config = internals["LayoutConfig"](width="stretch", height=height)
+    if on_select:
+        proto.selection_mode.extend(internals["parse_selection_mode"](selection_mode))
+        serde = internals["PlotlyChartSelectionSerde"]()
+    ctx = internals["get_script_run_ctx"]()
+
+    proto.id = internals["compute_and_register_element_id"](
+        "plotly_chart", user_key=key, key_as_main_identity=False, dg=dg,
+        plotly_spec=proto.spec, plotly_config=proto.config, selection_mode=selection_mode,
+        is_selection_activated=on_select, theme="streamlit", width="stretch", height="content", alt=None)
+    if not on_select:
+        dg._enqueue("plotly_chart", proto, layout_config=layout_config)
+        return None
+    widget_state = internals["register_widget"](proto.id, on_change_handler=None, deserializer=serde.deserialize,
+                                                serializer=serde.serialize, ctx=ctx, value_type="string_value")
+    dg._enqueue("plotly_chart", proto, layout_config=layout_config)
+    return widget_state.value
+
+def plotly_chart_json(figure_json, height:int, key:str, on_select:bool=False):
+    """
+    Sends a figure that is already serialized to Plotly JSON, as st.plotly_chart would, without building a
+    Figure or dictionary in this process. Shared renders keep only this JSON, which for a memory-mapped
+    render bundle is a buffer in the mapped file.
+
+    Falls back to st.plotly_chart, which parses and re-serializes the figure, when the Streamlit internals
+    this relies on have changed; the first failure is logged.
+
+    :param figure_json: Plotly JSON as a string or a UTF-8 buffer.
+    :param height: Figure height in pixels, from its layout.
+    :param key: Element key.
+    :param on_select: Rerun with the clicked points, like on_select="rerun" with selection_mode="points".
+
+    :return: Selection state when on_select is set, otherwise None.
+    """
+    spec = figure_json if isinstance(figure_json, str) else str(figure_json, "utf-8")
+    internals = plotly_chart_internals()
+    if internals:
+        try:
+            return _enqueue_plotly_json(internals, spec, height, key, on_select)
+        except (AttributeError, TypeError):
+            import logging
+
+            logging.getLogger("election_predictor.app").exception("Sending charts through st.plotly_chart from now on")
+            internals.clear()
+            # The failed call may already have registered the key in this run
+            key = f"{key}_fallback"
+
+    import json
+
+    if on_select:
+        return st.plotly_chart(json.loads(spec), key=key, on_select="rerun", selection_mode="points")
+    st.plotly_chart(json.loads(spec), key=key)
+    return None
+
 # Custom CSS to increase the width of the metric containers
 st.markdown(
     """
@@ -25,20 +164,20 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-def set_page(page_name):
-    st.session_state["current_page"] = page_name
-
-# Always Start on "Polling + Econ + Social Media Model"
-if "current_page" not in st.session_state:
-    st.session_state["current_page"] = "Polling + Social Media Model"
-
+# Session State
+# The current page is the only value the app keeps per session, next to the
+# widgets' own values. Datasets, indexes and figures are shared by every session
+# through the process-wide caches; memory_report.py measures both sides.
+DEFAULT_PAGE = "Polling + Social Media Model"
 
 def set_page(page_name):
     st.session_state["current_page"] = page_name
 
-# Always Start on Introduction
+# Always Start on the Polling + Social Media Model, or on the hidden Diagnostics
+# page when the URL has ?diagnostics. The query parameter only picks the first
+# page, so the sidebar buttons still work afterwards.
 if "current_page" not in st.session_state:
-    st.session_state["current_page"] = "Introduction"
+    st.session_state["current_page"] = "Diagnostics" if "diagnostics" in st.query_params else DEFAULT_PAGE
 
 # Pages Menu
 st.sidebar.title("Precision Scope | UK General Election Predictor")
@@ -49,79 +188,52 @@ if st.sidebar.button("Methodology"):
     set_page("Methodology")
 
 st.sidebar.header("Models")
-if st.sidebar.button("Polls Model"):
-    set_page("Polling Model")
-if st.sidebar.button("Polls & Economic Model"):
-    set_page("Polling + Econ Model")
-if st.sidebar.button("Polls & Social Media Model"):
-    set_page("Polling + Social Media Model")
-if st.sidebar.button("Polls, Economic & Social Media Model"):
-    set_page("Polling + Econ + Social Media Model")
+for entry in models():
+    if st.sidebar.button(entry["button"]):
+        set_page(entry["page"])
+if st.sidebar.button("Compare Models"):
+    set_page("Model Comparison")
+if st.sidebar.button("Backtest"):
+    set_page("Backtest")
+if st.sidebar.button("Seat Changes"):
+    set_page("Seat Changes")
+if st.sidebar.button("Seat Simulator"):
+    set_page("Seat Simulator")
+if st.sidebar.button("What If"):
+    set_page("What If")
+if st.sidebar.button("Election Night"):
+    set_page("Election Night")
 # if st.sidebar.button("Data"):
 #     set_page("Data")
 # if st.sidebar.button("Charts"):
 #     set_page("Charts")
 
-# Party Colors
-party_colors = {
-    "Conservative": "#005af0",
-    "Labour": "#dd0018",
-    "Green": "#00bc3e",
-    "Liberal Democrats": "#ffa331",
-    "Plaid Cymru": "#00d4a7",
-    "SNP": "#fff293",
-    "UKIP": "#480c64",
-    "Others": "#909090"
-}
-
 # Legend
-def display_legend(election_year, data_path_2010:str, data_path_2015:str, data_path_2017:str,
-                   data_path_2019:str, data_path_2024:str):
-
-    data_path = None
-
-    if election_year == 2010:
-        data_path = data_path_2010
-    elif election_year == 2015:
-        data_path = data_path_2015
-    elif election_year == 2017:
-        data_path = data_path_2017
-    elif election_year == 2019:
-        data_path = data_path_2019
-    elif election_year == 2024:
-        data_path = data_path_2024
-
-    party_count_df = pd.read_csv(data_path)
-    legend_html = ""
-    for party, color in party_colors.items():
-        if party in party_count_df['elected_mp_party_name'].values:
-            legend_html += f"<span style='font-size:20px; color:{color};'>⬣</span> <span style='font-size:15px;'>{party}</span> &nbsp;&nbsp;&nbsp;"
-    st.markdown(f"<div style='display: flex; justify-content: center; align-items: center;'>{legend_html}</div>", unsafe_allow_html=True)
+@timed()
+def display_legend(model:str, election_year:int):
+    st.markdown(get_page_render(model, election_year)["legend_html"], unsafe_allow_html=True)
 
 # Handle slider for election year
-def election_year_slider():
+def election_year_slider(years=None):
     # Slider
     col1, col2, col3 = st.columns([1,3,1])
 
+    years = years or election_years()
     election_year = None
 
     with col2:
-        election_year = st.select_slider('Select election year:', options=[2010, 2015, 2017, 2019, 2024], value=2019)
+        election_year = st.select_slider('Select election year:', options=years, value=default_year(years))
 
     return election_year
 
 # Hexmap Logic
-def display_hexmap(election_year:int, data_path_2010:str, data_path_2015:str, data_path_2017:str,
-                   data_path_2019:str, data_path_2024:str):
+@timed()
+def display_hexmap(model:str, election_year:int):
     """
     Generates a hexmap of the UK constituency seats, coloured by winning parties.
 
+    :param model: Model directory name.
     :param election_year: The election year.
-    :param data_path_2010: Path to the 2010 election data.
-    :param data_path_2015: Path to the 2015 election data.
-    :param data_path_2017: Path to the 2017 election data.
-    :param data_path_2019: Path to the 2019 election data.
-    :param data_path_2024: Path to the 2024 election data.
 
     :return: Hexmap.
     """
@@ -130,156 +242,535 @@ def display_hexmap(election_year:int, data_path_2010:str, data_path_2015:str, da
 
     with col2:
 
-        # CSV Path Variable
-        csv_path = None
-
-        # Loading CSVs
-        if election_year == 2010:
-            csv_path = data_path_2010
-        elif election_year == 2015:
-            csv_path = data_path_2015
-        elif election_year == 2017:
-            csv_path = data_path_2017
-        elif election_year == 2019:
-            csv_path = data_path_2019
-        elif election_year == 2024:
-            csv_path = data_path_2024
-
-        constituency_df = pd.read_csv(csv_path)
-
-        # Define functions to flip and rotate coordinates
-        def flip_coords(x, y):
-            return x, -y
-
-        def rotate_coords_anticlockwise(x, y):
-            return -y, x
-
-        # # Define a function to calculate hexagon coordinates based on the "odd-r" formation
-        # def calc_coords(row, col):
-        #     if row % 2 == 1:
-        #         col = col + 0.5
-        #     row = row * np.sqrt(3) / 2
-        #     return col, row
-
-        # Apply the flipping and rotation transformations
-        constituency_df[['x_flipped', 'y_flipped']] = constituency_df.apply(lambda row: flip_coords(row['coord_one'], row['coord_two']), axis=1).apply(pd.Series)
-        constituency_df[['x_rotated', 'y_rotated']] = constituency_df.apply(lambda row: rotate_coords_anticlockwise(row['x_flipped'], row['y_flipped']), axis=1).apply(pd.Series)
-
-        # Create the plotly figure
-        fig = go.Figure()
-
-        # Add hexagons to the figure with the transformed coordinates
-        for _, row in constituency_df.iterrows():
-            fig.add_trace(go.Scatter(
-                x=[row['x_rotated']],
-                y=[row['y_rotated']],
-                mode='markers',
-                marker_symbol='hexagon2',
-                marker=dict(
-                    size=16,
-                    color=row['color'],
-                    line=dict(color='black', width=0.5),
-                    angle=90),
-                text=row['constituency_name'],
-                hoverinfo='text'
-            ))
-
-        # Update layout
-        fig.update_layout(
-            xaxis=dict(showgrid=False, zeroline=False, visible=False),
-            yaxis=dict(showgrid=False, zeroline=False, visible=False),
-            plot_bgcolor='#0E1117',
-            margin=dict(l=0, r=0, t=0, b=0),
-            height=800,
-            hovermode='closest',
-            showlegend=False,
-            dragmode=False
-        )
+        # Animation mode plays every year in the browser from one figure, without reruns
+        if st.toggle("Animate all years", key=f"hexmap_animate_{model}"):
+            from render_cache import get_animation
 
-        st.plotly_chart(fig)
+            with span("plotly_chart"):
+                st.plotly_chart(get_animation(model), key=f"hexmap_{model}_animated")
+            return
+
+        # Serve the prebuilt figure JSON for this model and year
+        from hexmap import HEXMAP_HEIGHT
+
+        render = get_page_render(model, election_year)
+        key = f"hexmap_{model}_{election_year}"
+
+        # Clicking a hex selects it and reruns with its point index
+        seat = constituency_search()
+        if seat is not None:
+            from analytics import constituency_index
+            from hexmap import highlight_hexmap
+            from render_cache import figure_dict
+
+            index = constituency_index()
+            fig = highlight_hexmap(figure_dict(render), index["coord_one"], index["coord_two"], seat)
+            with span("plotly_chart"):
+                event = st.plotly_chart(fig, on_select="rerun", selection_mode="points", key=key)
+        else:
+            with span("plotly_chart"):
+                event = plotly_chart_json(render["figure_json"], HEXMAP_HEIGHT, key, on_select=True)
+
+        points = [point for point in event.selection.points if point.get("curve_number", 0) == 0] if event else []
+        if points:
+            display_constituency_detail(model, election_year, points[0]["point_index"])
+
+# Constituency Search
+def constituency_search():
+    """
+    Search box with autocomplete on constituency names.
+
+    :return: Constituency id of the chosen match, or None.
+    """
+    from analytics import NATIONS, constituency_index, search_constituencies
+
+    query = st.text_input("Find a constituency", key="constituency_search", placeholder="Start typing a name", max_chars=100)
+    if not query.strip():
+        return None
+
+    matches = search_constituencies(query)
+    if not matches:
+        st.caption(f"No constituency matches '{query}'.")
+        return None
+
+    index = constituency_index()
+    return st.selectbox("Matching constituencies", matches, key="constituency_match", label_visibility="collapsed",
+                        format_func=lambda seat: f'{index["constituency_name"][seat]} ({NATIONS[index["nation"][seat]]})')
+
+# Constituency Detail
+def display_constituency_detail(model:str, election_year:int, row:int):
+    """
+    Shows the winner of one constituency under every model and year, and the actual winner where known.
+
+    :param model: Model the hexmap was drawn for.
+    :param election_year: Year the hexmap was drawn for.
+    :param row: Point index of the clicked hex, which is its row in the hexmap CSV.
+    """
+    from analytics import constituency_index, seat_history
+
+    index = constituency_index()
+    seat = index["row_seats"][(model, election_year)][row]
+    if seat < 0:
+        return
+
+    st.subheader(index["constituency_name"][seat])
+    st.dataframe(seat_history(index, seat, model_labels), width="stretch")
 
 # Scorecards
-def display_constituency_seat_metrics(election_year, label, data_path_2010:str, data_path_2015:str, data_path_2017:str,
-                                      data_path_2019:str, data_path_2024:str):
-
-    data_path = None
-
-    # Set the path based on the election year
-    if election_year == 2010:
-        data_path = data_path_2010
-    elif election_year == 2015:
-        data_path = data_path_2015
-    elif election_year == 2017:
-        data_path = data_path_2017
-    elif election_year == 2019:
-        data_path = data_path_2019
-    elif election_year == 2024:
-        data_path = data_path_2024
-
-    party_count_df = pd.read_csv(data_path)
-    predicted_party_count = dict(zip(party_count_df['Party'], party_count_df['Total_Constituencies']))
-
-    # Read actual data only if the year is not 2010 or 2024
-    if election_year not in [2024]:
-        actuals_csv_path = Path(f"data/actuals/seat_share/actual_seat_share_{election_year}.csv")
-        actuals_party_count_df = pd.read_csv(actuals_csv_path)
-        actuals_party_count = dict(zip(actuals_party_count_df['Party'], actuals_party_count_df['Total_Constituencies']))
+def display_metrics(metrics):
+    cols = st.columns(len(metrics))
+    for i, metric in enumerate(metrics):
+        with cols[i]:
+            if metric["delta"] is None:
+                st.metric(label=metric["label"], value=metric["value"])
+            else:
+                st.metric(label=metric["label"], value=metric["value"], delta=metric["delta"], delta_color=metric["delta_color"])
+
+@timed()
+def display_constituency_seat_metrics(model:str, election_year:int, label:str):
+
+    # Metrics are prebuilt per model and year, with deltas only where actual results exist
+    metrics = get_page_render(model, election_year)["seat_metrics"]
 
     st.subheader(label)
-    cols = st.columns(len(predicted_party_count))
-    for i, (party_name, predicted_count) in enumerate(predicted_party_count.items()):
-        if election_year in [2024]:
-            with cols[i]:
-                st.metric(label=party_name, value=predicted_count)
-        else:
-            actual_count = actuals_party_count.get(party_name, 0)
-            delta = actual_count - predicted_count
-            delta_color = "normal" if delta != 0 else "off"
-            with cols[i]:
-                st.metric(label=party_name, value=predicted_count, delta=delta, delta_color=delta_color)
+    display_metrics(metrics)
 
     st.write("*Delta markers display the difference between our model prediction and actual results*")
 
-def display_vote_share_metrics(election_year, label, data_path_2010:str, data_path_2015:str, data_path_2017:str,
-                                      data_path_2019:str, data_path_2024:str):
+@timed()
+def display_vote_share_metrics(model:str, election_year:int, label:str):
+
+    # Metrics are prebuilt per model and year, with deltas only where actual results exist
+    metrics = get_page_render(model, election_year)["vote_share_metrics"]
+
+    st.subheader(label)
+    display_metrics(metrics)
 
-    data_path = None
+# Model Page
+def display_model_page(model:dict):
+    """
+    Renders a model's prediction page: year slider, vote share and seat scorecards, legend and hexmap.
 
-    # Set the path based on the election year
-    if election_year == 2010:
-        data_path = data_path_2010
-    elif election_year == 2015:
-        data_path = data_path_2015
-    elif election_year == 2017:
-        data_path = data_path_2017
-    elif election_year == 2019:
-        data_path = data_path_2019
-    elif election_year == 2024:
-        data_path = data_path_2024
+    Every model page goes through here, driven by the model registry.
 
-    party_share_df = pd.read_csv(data_path)
-    predicted_party_share = dict(zip(party_share_df['Party'], party_share_df['Vote_Share']))
+    :param model: Model dictionary from model_registry.models().
+    """
+    col1, col2, col3 = st.columns([1,3,1])
 
-    # Read actual data only if the year is not 2010 or 2024
-    if election_year not in [2024]:
-        actuals_csv_path = Path(f"data/actuals/vote_share/actual_vote_share_{election_year}.csv")
-        actuals_party_share_df = pd.read_csv(actuals_csv_path)
-        actuals_party_share = dict(zip(actuals_party_share_df['Party'], actuals_party_share_df['Vote_Share']))
+    election_year = election_year_slider(model["years"])
 
-    st.subheader(label)
-    cols = st.columns(len(predicted_party_share))
-    for i, (party_name, predicted_share) in enumerate(predicted_party_share.items()):
-        if election_year in [2024]:
-            with cols[i]:
-                st.metric(label=party_name, value=str(predicted_share) + "%")
-        else:
-            actual_share = actuals_party_share.get(party_name, 0)
-            delta = np.round(actual_share - predicted_share)
-            delta_color = "normal" if delta != 0 else "off"
-            with cols[i]:
-                st.metric(label=party_name, value=str(predicted_share) + "%", delta=delta, delta_color=delta_color)
+    with col2:
+        st.title(f"{model['title']} – {election_year} Election Prediction")
+
+    st.markdown("<div style='height: 50px;'></div>", unsafe_allow_html=True)
+
+    display_vote_share_metrics(model["model"], election_year, "National Vote Share")
+
+    st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
+
+    display_constituency_seat_metrics(model["model"], election_year, "Constituency Seat Count")
+
+    st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
+
+    st.markdown(f"<div style='display: flex; justify-content: center; align-items: center; font-size:1.8rem; font-weight: 600; margin: 0.5rem 0'>Constituency Seat Map</div>", unsafe_allow_html=True)
+
+    display_legend(model["model"], election_year)
+
+    display_hexmap(model["model"], election_year)
+
+
+
+# Model Comparison
+model_labels = {model["model"]: model["label"] for model in models()}
+
+@timed()
+def display_model_comparison(election_year:int):
+    """
+    Shows every model's prediction for one election year side by side, with errors against the actual result.
+
+    All models come from one cached fact table, so the page is a filter and pivot rather than four page renders.
+
+    :param election_year: The election year.
+    """
+    load_data()
+
+    import plotly.graph_objects as go
+    from analytics import fact_table
+    from backtest import backtest
+
+    fact_df = fact_table()
+    year_df = fact_df[fact_df["year"] == election_year]
+    year_df = year_df.assign(model=year_df["model"].map(model_labels).astype(str))
+    has_actuals = year_df["actual_seats"].notna().any()
+
+    seats_df = year_df.pivot(index="party", columns="model", values="seats")
+    vote_share_df = year_df.pivot(index="party", columns="model", values="vote_share")
+    if has_actuals:
+        seats_df["Actual"] = year_df.groupby("party", observed=True)["actual_seats"].first()
+        vote_share_df["Actual"] = year_df.groupby("party", observed=True)["actual_vote_share"].first()
+
+    seats_df = seats_df.sort_values(seats_df.columns[0], ascending=False)
+    vote_share_df = vote_share_df.loc[seats_df.index]
+
+    fig = go.Figure([
+        go.Bar(name=column, x=seats_df.index, y=seats_df[column])
+        for column in seats_df.columns
+    ])
+    fig.update_layout(barmode="group", height=450, margin=dict(l=0, r=0, t=30, b=0))
+
+    st.subheader("Constituency Seat Count")
+    st.plotly_chart(fig)
+    st.dataframe(seats_df, width="stretch")
+
+    st.subheader("National Vote Share")
+    st.dataframe(vote_share_df.style.format("{:.1f}%"), width="stretch")
+
+    if has_actuals:
+        errors_df = backtest()["scores"].xs(election_year, level="year")
+        errors_df.index = errors_df.index.map(model_labels)
+        errors_df = errors_df[["vote_share_mae", "vote_share_rmse", "seat_error", "seats_off", "seats_correct"]]
+        errors_df = score_table(errors_df.sort_values("vote_share_mae"))
+
+        st.subheader("Error Against Actual Result")
+        st.dataframe(errors_df, width="stretch")
+
+# Backtest
+SCORE_LABELS = {
+    "years": "Years Scored",
+    "vote_share_mae": "Vote Share MAE (pts)",
+    "vote_share_rmse": "Vote Share RMSE (pts)",
+    "seat_error": "Total Seat Error",
+    "mean_seat_error": "Mean Seat Error",
+    "seats_off": "Seats Misallocated",
+    "seats_correct": "Seats Called Correctly",
+    "seat_accuracy": "Seats Called Correctly (%)",
+}
+
+def score_table(scores_df):
+    """
+    Labels and formats backtest scores for display. Scores that need an actuals hexmap show n/a without one.
+
+    :param scores_df: Scores or leaderboard from backtest.backtest().
+
+    :return: Styler.
+    """
+    scores_df = scores_df.rename(columns=SCORE_LABELS)
+    formats = {
+        "Vote Share MAE (pts)": "{:.2f}",
+        "Vote Share RMSE (pts)": "{:.2f}",
+        "Total Seat Error": "{:.0f}",
+        "Mean Seat Error": "{:.1f}",
+        "Seats Called Correctly": "{:.0f}",
+        "Seats Called Correctly (%)": "{:.1%}",
+    }
+    return scores_df.style.format({column: fmt for column, fmt in formats.items() if column in scores_df}, na_rep="n/a")
+
+@timed()
+def display_backtest():
+    """
+    Shows how every model has scored against the actual results: a leaderboard over all years, a chart and the per-year scores.
+    """
+    load_data()
+
+    from backtest import backtest
+
+    result = backtest()
+
+    st.subheader("Leaderboard")
+    st.write("*Models ranked by vote share error, averaged over every election with results*")
+    st.dataframe(score_table(result["leaderboard"].rename(index=model_labels)), width="stretch")
+
+    st.plotly_chart(result["figure"])
+
+    st.subheader("Scores by Election")
+    scores_df = result["scores"].reset_index()
+    scores_df["model"] = scores_df["model"].map(model_labels)
+    scores_df = scores_df.rename(columns={"model": "Model", "year": "Year"}).set_index(["Year", "Model"]).sort_index()
+    st.dataframe(score_table(scores_df.drop(columns="seats_called")), width="stretch")
+    st.write("*Seats called correctly need each constituency's actual winner in data/actuals/hexmap; elections without one show n/a*")
+
+# Seat Changes
+def snapshot_picker(label:str, key:str, default_year:int):
+    """
+    Lets the user pick a model and election year.
+
+    :return: Tuple of (model, year).
+    """
+    st.markdown(f"**{label}**")
+    model = st.selectbox("Model", list(model_labels), format_func=model_labels.get, key=f"{key}_model")
+    year = st.select_slider("Election year", options=election_years(), value=default_year, key=f"{key}_year")
+    return model, year
+
+@timed()
+def display_seat_changes(before, after):
+    """
+    Shows the seats that changed hands between two (model, year) snapshots and the party-to-party flows.
+
+    :param before: Tuple of (model, year) to compare from.
+    :param after: Tuple of (model, year) to compare to.
+    """
+    load_data()
+
+    import pandas as pd
+    from analytics import constituency_index, seat_changes
+    from hexmap import build_diff_hexmap_figure
+
+    index = constituency_index()
+    changes = seat_changes(index, before, after)
+    party_names = index["party_names"]
 
+    flow_df = pd.DataFrame(changes["flow"], index=party_names, columns=party_names)
+    flow_df = flow_df.loc[flow_df.sum(axis=1) > 0, flow_df.sum(axis=0) > 0]
 
+    st.metric(label="Seats changing hands", value=int(changes["changed"].sum()))
+    st.subheader("Seat Flows")
+    st.write("*Rows are the winning party before, columns the winning party after*")
+    st.dataframe(flow_df, width="stretch")
+
+    col1, col2, col3 = st.columns([1,3,1])
+
+    with col2:
+        fig = build_diff_hexmap_figure(
+            index["coord_one"],
+            index["coord_two"],
+            index["constituency_name"],
+            party_names[changes["before"]],
+            party_names[changes["after"]],
+            index["party_colors"][changes["after"]],
+            changes["changed"],
+        )
+        st.plotly_chart(fig)
+
+# Seat Simulator
+@st.cache_data(max_entries=16, show_spinner="Simulating...")
+def run_simulation(model:str, election_year:int, simulations:int, data_version):
+    """
+    Runs and caches the Monte Carlo seat simulation. data_version is only part of the cache key,
+    so results are recomputed when a dataset changes.
+    """
+    from simulation import simulate
+
+    return simulate(model, election_year, simulations)
+
+@timed()
+def display_seat_simulation(model:str, election_year:int, simulations:int):
+    """
+    Shows the simulated seat ranges per party as a fan chart and each seat's win probability on the hexmap.
+
+    :param model: Model directory name.
+    :param election_year: The election year.
+    :param simulations: Number of simulated elections.
+    """
+    load_data()
+
+    import plotly.graph_objects as go
+    from analytics import constituency_index
+    from data_registry import tree_version
+    from hexmap import build_probability_hexmap_figure
+    from simulation import seat_quantiles
+
+    index = constituency_index()
+    result = run_simulation(model, election_year, simulations, tree_version(("hexmap", "vote_share")))
+    quantiles = seat_quantiles(result["seat_counts"])
+    order = quantiles[2].argsort()[::-1]
+    order = order[quantiles[4, order] > 0]
+    party_names = index["party_names"][order]
+    party_colors = index["party_colors"][order]
+
+    # Fan chart: 5-95% range, 25-75% range and median per party
+    fig = go.Figure([
+        go.Bar(x=party_names, y=quantiles[4, order] - quantiles[0, order], base=quantiles[0, order],
+               marker_color=party_colors, opacity=0.35, name="90% range", width=0.6),
+        go.Bar(x=party_names, y=quantiles[3, order] - quantiles[1, order], base=quantiles[1, order],
+               marker_color=party_colors, opacity=0.8, name="50% range", width=0.6),
+        go.Scatter(x=party_names, y=quantiles[2, order], mode="markers", name="Median",
+                   marker=dict(symbol="line-ew", size=40, line=dict(width=3, color="white"))),
+    ])
+    fig.update_layout(barmode="overlay", height=450, margin=dict(l=0, r=0, t=30, b=0), yaxis_title="Seats")
+
+    st.subheader("Simulated Seat Ranges")
+    st.write(f"*Bars cover the middle 50% and 90% of {simulations:,} simulated elections; the line marks the median*")
+    st.plotly_chart(fig)
+
+    st.subheader("Win Probability")
+    st.write("*Each seat takes the colour of its most likely winner; paler seats are closer contests*")
+
+    col1, col2, col3 = st.columns([1,3,1])
+
+    with col2:
+        fig = build_probability_hexmap_figure(
+            index["coord_one"],
+            index["coord_two"],
+            index["constituency_name"],
+            index["party_names"],
+            index["party_colors"],
+            result["win_probability"],
+        )
+        st.plotly_chart(fig)
+
+# What If
+@st.cache_resource(max_entries=32)
+def get_swing_table(model:str, election_year:int, data_version):
+    """
+    Returns the precomputed seat thresholds for one prediction, shared by every session.
+    data_version is only part of the cache key, so the table is rebuilt when a dataset changes.
+    """
+    from simulation import build_swing_table
+
+    return build_swing_table(model, election_year)
+
+@timed()
+def display_what_if(model:str, election_year:int):
+    """
+    Lets the user move each party's national vote share and shows the resulting seats and hexmap.
+
+    Only the seats whose lead is overturned by the new shares are recomputed on each slider move.
+
+    :param model: Model directory name.
+    :param election_year: The election year.
+    """
+    load_data()
+
+    import numpy as np
+    from analytics import constituency_index
+    from data_registry import tree_version
+    from hexmap import hexmap_figure
+    from simulation import apply_swing
+
+    index = constituency_index()
+    swing_table = get_swing_table(model, election_year, tree_version(("hexmap", "vote_share")))
+    party_names = index["party_names"]
+
+    st.subheader("National Vote Share")
+    shares = np.array(swing_table["shares"])
+    cols = st.columns(len(shares))
+    for party, col in enumerate(cols):
+        with col:
+            shares[party] = st.slider(
+                party_names[party], 0.0, 70.0, float(round(swing_table["shares"][party], 1)), 0.1,
+                format="%.1f%%", key=f"what_if_{model}_{election_year}_{swing_table['party_codes'][party]}")
+    st.write(f"*Total vote share: {shares.sum():.1f}%*")
+
+    winners = apply_swing(swing_table, shares)
+    seat_counts = np.bincount(winners, minlength=len(shares))
+    predicted_counts = np.bincount(swing_table["winners"], minlength=len(shares))
+    changed = winners != swing_table["winners"]
+
+    st.subheader("Constituency Seat Count")
+    display_metrics([
+        dict(label=party_names[party], value=int(seat_counts[party]),
+             delta=int(seat_counts[party] - predicted_counts[party]),
+             delta_color="normal" if seat_counts[party] != predicted_counts[party] else "off")
+        for party in np.argsort(-predicted_counts, kind="stable")
+        if seat_counts[party] or predicted_counts[party]
+    ])
+    st.metric(label="Seats changing hands", value=int(changed.sum()))
+
+    col1, col2, col3 = st.columns([1,3,1])
+
+    with col2:
+        text = np.asarray(index["constituency_name"], dtype=object) + "<br>" + party_names[winners]
+        fig = hexmap_figure(index["coord_one"], index["coord_two"], index["party_colors"][winners], text)
+        st.plotly_chart(fig)
+
+# Election Night
+@timed()
+def display_election_night(model:str):
+    """
+    Shows the live declarations on a hexmap, with the seats declared so far against a model's calls for them.
+
+    The figure and metrics are built once per results version and shared by every session. A fragment checks
+    the version on a timer and reruns the page only when seats have changed, so a tick without new
+    declarations sends nothing.
+
+    :param model: Model directory name to compare against.
+    """
+    load_data()
+
+    from hexmap import HEXMAP_HEIGHT
+    from live_results import REFRESH_SECONDS, get_live_render, version
+
+    drawn_version, render = get_live_render(model)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(label="Seats declared", value=f"{render['declared']} / {render['seats']}")
+    with col2:
+        st.metric(label="Called correctly", value=f"{render['called']} / {render['declared']}")
+
+    if render["unknown"]:
+        st.warning(f"Declarations for unknown constituencies: {', '.join(render['unknown'])}")
+
+    if render["seat_metrics"]:
+        st.subheader("Seats Declared")
+        display_metrics(render["seat_metrics"])
+        st.write("*Delta markers display the difference between the declared results and the model's prediction for the same seats*")
+
+    col1, col2, col3 = st.columns([1,3,1])
+
+    with col2:
+        plotly_chart_json(render["figure_json"], HEXMAP_HEIGHT, "live_hexmap")
+        if render["latest"]:
+            st.caption("Latest: " + ", ".join(f"{name} {party}" for name, party in render["latest"]))
+
+    # Timer runs keep the version drawn by the last page run. The version only moves
+    # when a declaration changes a seat, so an unchanged one means nothing to redraw.
+    @st.fragment(run_every=REFRESH_SECONDS)
+    def live_updates():
+        if version() != drawn_version:
+            st.rerun()
+
+    live_updates()
+
+# Diagnostics
+def display_diagnostics():
+    """
+    Shows this process's span timings, cache counters and recent reruns.
+    """
+    import pandas as pd
+    from instrumentation import prometheus_text, snapshot
+    from memory_report import active_sessions, current_session_memory, process_memory, shared_memory
+
+    st.subheader("Memory")
+    process = process_memory()
+    sessions = active_sessions()
+    cols = st.columns(4)
+    cols[0].metric("Process RSS", f"{(process['rss_bytes'] or process['peak_rss_bytes']) / 2**20:.0f} MB")
+    cols[1].metric("Shared Resources", f"{sum(shared_memory().values()) / 2**20:.1f} MB")
+    cols[2].metric("Sessions", len(sessions))
+    cols[3].metric("This Session", f"{(current_session_memory() or 0) / 1024:.1f} KB")
+    st.dataframe(pd.Series(shared_memory(), name="bytes"), width="stretch")
+    if sessions:
+        st.dataframe(pd.DataFrame(sessions), hide_index=True, width="stretch")
+
+    metrics = snapshot()
+    if not metrics["enabled"]:
+        st.info("Instrumentation is off. Start the app with ELECTION_PREDICTOR_METRICS=1 to collect timings.")
+        return
+
+    st.subheader("Spans")
+    spans_df = pd.DataFrame([
+        dict(span=name, calls=entry["count"], total_ms=entry["total"] * 1000,
+             mean_ms=entry["total"] / entry["count"] * 1000, max_ms=entry["max"] * 1000)
+        for name, entry in metrics["spans"].items()
+    ])
+    if not spans_df.empty:
+        st.dataframe(spans_df.sort_values("total_ms", ascending=False), hide_index=True, width="stretch")
+
+    st.subheader("Counters")
+    st.dataframe(pd.Series(metrics["counters"], name="value").sort_index(), width="stretch")
+
+    st.subheader("Recent Reruns")
+    reruns_df = pd.DataFrame([
+        dict(page=rerun["page"], ms=rerun["seconds"] * 1000, bytes_sent=rerun["bytes_sent"],
+             messages=rerun["messages"], spans=", ".join(f"{name} {seconds * 1000:.1f}ms" + (f" ({calls}x)" if calls > 1 else "")
+                                     for name, (calls, seconds) in rerun["spans"].items()))
+        for rerun in reversed(metrics["reruns"])
+    ])
+    st.dataframe(reruns_df, hide_index=True, width="stretch")
+
+    st.subheader("Prometheus")
+    st.code(prometheus_text(), language="text")
 
 # Handle rendering of pages
 # Introduction Page
@@ -368,225 +859,99 @@ if st.session_state["current_page"] == "Methodology":
 
 
 
-# Polling Model Page
-if st.session_state["current_page"] == "Polling Model":
+# Model Pages
+page_model = model_for_page(st.session_state["current_page"])
+
+if page_model is not None:
+    display_model_page(page_model)
+
+# Model Comparison Page
+elif st.session_state["current_page"] == "Model Comparison":
     col1, col2, col3 = st.columns([1,3,1])
 
     election_year = election_year_slider()
 
     with col2:
-        st.title(f"Polling Model – {election_year} Election Prediction")
-
-    st.markdown("<div style='height: 50px;'></div>", unsafe_allow_html=True)
-
-    display_vote_share_metrics(
-        election_year,
-        f"National Vote Share",
-        "data/polls_model/vote_share/polls_model_vote_share_2010.csv",
-        "data/polls_model/vote_share/polls_model_vote_share_2015.csv",
-        "data/polls_model/vote_share/polls_model_vote_share_2017.csv",
-        "data/polls_model/vote_share/polls_model_vote_share_2019.csv",
-        "data/polls_model/vote_share/polls_model_vote_share_2024.csv",
-    )
+        st.title(f"Model Comparison – {election_year} Election")
 
     st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
 
-    display_constituency_seat_metrics(
-        election_year,
-        "Constituency Seat Count",
-        "data/polls_model/seat_share/polls_model_seat_share_2010.csv",
-        "data/polls_model/seat_share/polls_model_seat_share_2015.csv",
-        "data/polls_model/seat_share/polls_model_seat_share_2017.csv",
-        "data/polls_model/seat_share/polls_model_seat_share_2019.csv",
-        "data/polls_model/seat_share/polls_model_seat_share_2024.csv",
-    )
-
-    st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
+    display_model_comparison(election_year)
 
-    st.markdown(f"<div style='display: flex; justify-content: center; align-items: center; font-size:1.8rem; font-weight: 600; margin: 0.5rem 0'>Constituency Seat Map</div>", unsafe_allow_html=True)
+# Backtest Page
+elif st.session_state["current_page"] == "Backtest":
+    st.title("Backtest")
 
-    display_legend(
-        election_year,
-        "data/polls_model/hexmap/polls_model_hexmap_2010.csv",
-        "data/polls_model/hexmap/polls_model_hexmap_2015.csv",
-        "data/polls_model/hexmap/polls_model_hexmap_2017.csv",
-        "data/polls_model/hexmap/polls_model_hexmap_2019.csv",
-        "data/polls_model/hexmap/polls_model_hexmap_2024.csv"
-    )
+    display_backtest()
 
-    display_hexmap(
-        election_year,
-        "data/polls_model/hexmap/polls_model_hexmap_2010.csv",
-        "data/polls_model/hexmap/polls_model_hexmap_2015.csv",
-        "data/polls_model/hexmap/polls_model_hexmap_2017.csv",
-        "data/polls_model/hexmap/polls_model_hexmap_2019.csv",
-        "data/polls_model/hexmap/polls_model_hexmap_2024.csv",
-    )
+# Seat Changes Page
+elif st.session_state["current_page"] == "Seat Changes":
+    st.title("Seat Changes")
 
-# Polling + Eco Model Page
-elif st.session_state["current_page"] == "Polling + Econ Model":
-    col1, col2, col3 = st.columns([1,3,1])
+    col1, col2 = st.columns(2)
 
-    election_year = election_year_slider()
+    with col1:
+        before = snapshot_picker("From", "before", default_year(election_years()))
 
     with col2:
-        st.title(f"Polling & Economic Model – {election_year} Election Prediction")
-
-    st.markdown("<div style='height: 50px;'></div>", unsafe_allow_html=True)
-
-    display_vote_share_metrics(
-        election_year,
-        "National Vote Share",
-        "data/polls_econ_model/vote_share/polls_model_econ_vote_share_2010.csv",
-        "data/polls_econ_model/vote_share/polls_model_econ_vote_share_2015.csv",
-        "data/polls_econ_model/vote_share/polls_model_econ_vote_share_2017.csv",
-        "data/polls_econ_model/vote_share/polls_model_econ_vote_share_2019.csv",
-        "data/polls_econ_model/vote_share/polls_model_econ_vote_share_2024.csv",
-    )
-
-    st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
-
-    display_constituency_seat_metrics(
-        election_year,
-        "Constituency Seat Count",
-        "data/polls_econ_model/seat_share/polls_model_econ_seat_share_2010.csv",
-        "data/polls_econ_model/seat_share/polls_model_econ_seat_share_2015.csv",
-        "data/polls_econ_model/seat_share/polls_model_econ_seat_share_2017.csv",
-        "data/polls_econ_model/seat_share/polls_model_econ_seat_share_2019.csv",
-        "data/polls_econ_model/seat_share/polls_model_econ_seat_share_2024.csv",
-    )
+        after = snapshot_picker("To", "after", election_years()[-1])
 
     st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
 
-    st.markdown(f"<div style='display: flex; justify-content: center; align-items: center; font-size:1.8rem; font-weight: 600; margin: 0.5rem 0'>Constituency Seat Map</div>", unsafe_allow_html=True)
+    display_seat_changes(before, after)
 
-    display_legend(
-        election_year,
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2010.csv",
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2015.csv",
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2017.csv",
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2019.csv",
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2024.csv"
-    )
+# Seat Simulator Page
+elif st.session_state["current_page"] == "Seat Simulator":
+    from simulation import SIMULATION_COUNTS
 
-    display_hexmap(
-        election_year,
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2010.csv",
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2015.csv",
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2017.csv",
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2019.csv",
-        "data/polls_econ_model/hexmap/polls_econ_model_hexmap_2024.csv"
-    )
+    st.title("Seat Simulator")
 
-# Polling + Alt Model Page
-elif st.session_state["current_page"] == "Polling + Social Media Model":
-    col1, col2, col3 = st.columns([1,3,1])
+    col1, col2, col3 = st.columns(3)
 
-    election_year = election_year_slider()
+    with col1:
+        model = st.selectbox("Model", list(model_labels), format_func=model_labels.get, key="simulator_model")
 
     with col2:
-        st.title(f"Polling & Social Media Model – {election_year} Election Prediction")
+        election_year = st.select_slider("Election year", options=election_years(), value=election_years()[-1], key="simulator_year")
 
-    st.markdown("<div style='height: 50px;'></div>", unsafe_allow_html=True)
-
-    display_vote_share_metrics(
-        election_year,
-        "National Vote Share",
-        "data/polls_alt_model/vote_share/polls_alt_model_vote_share_2010.csv",
-        "data/polls_alt_model/vote_share/polls_alt_model_vote_share_2015.csv",
-        "data/polls_alt_model/vote_share/polls_alt_model_vote_share_2017.csv",
-        "data/polls_alt_model/vote_share/polls_alt_model_vote_share_2019.csv",
-        "data/polls_alt_model/vote_share/polls_alt_model_vote_share_2024.csv",
-    )
+    with col3:
+        simulations = st.selectbox("Simulations", SIMULATION_COUNTS, index=len(SIMULATION_COUNTS) - 1, key="simulator_simulations")
 
     st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
 
-    display_constituency_seat_metrics(
-        election_year,
-        "Constituency Seat Count",
-        "data/polls_alt_model/seat_share/polls_alt_model_seat_share_2010.csv",
-        "data/polls_alt_model/seat_share/polls_alt_model_seat_share_2015.csv",
-        "data/polls_alt_model/seat_share/polls_alt_model_seat_share_2017.csv",
-        "data/polls_alt_model/seat_share/polls_alt_model_seat_share_2019.csv",
-        "data/polls_alt_model/seat_share/polls_alt_model_seat_share_2024.csv",
-    )
-
-    st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
-
-    st.markdown(f"<div style='display: flex; justify-content: center; align-items: center; font-size:1.8rem; font-weight: 600; margin: 0.5rem 0'>Constituency Seat Map</div>", unsafe_allow_html=True)
-
-    display_legend(
-        election_year,
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2010.csv",
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2015.csv",
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2017.csv",
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2019.csv",
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2024.csv"
-    )
+    display_seat_simulation(model, election_year, simulations)
 
-    display_hexmap(
-        election_year,
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2010.csv",
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2015.csv",
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2017.csv",
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2019.csv",
-        "data/polls_alt_model/hexmap/polls_alt_model_hexmap_2024.csv"
-    )
+# What If Page
+elif st.session_state["current_page"] == "What If":
+    st.title("What If")
 
-# Polling + Eco + Alt Page
-elif st.session_state["current_page"] == "Polling + Econ + Social Media Model":
-    col1, col2, col3 = st.columns([1,3,1])
+    col1, col2 = st.columns(2)
 
-    election_year = election_year_slider()
+    with col1:
+        model = st.selectbox("Model", list(model_labels), format_func=model_labels.get, key="what_if_model")
 
     with col2:
-        st.title(f"Polls, Economic & Social Media Model – {election_year} Election Prediction")
+        election_year = st.select_slider("Election year", options=election_years(), value=election_years()[-1], key="what_if_year")
 
-    st.markdown("<div style='height: 50px;'></div>", unsafe_allow_html=True)
+    st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
 
-    display_vote_share_metrics(
-        election_year,
-        "National Vote Share",
-        "data/polls_econ_alt_model/vote_share/polls_eco_alt_model_vote_share_2010.csv",
-        "data/polls_econ_alt_model/vote_share/polls_eco_alt_model_vote_share_2015.csv",
-        "data/polls_econ_alt_model/vote_share/polls_eco_alt_model_vote_share_2017.csv",
-        "data/polls_econ_alt_model/vote_share/polls_eco_alt_model_vote_share_2019.csv",
-        "data/polls_econ_alt_model/vote_share/polls_eco_alt_model_vote_share_2024.csv",
-    )
+    display_what_if(model, election_year)
 
-    st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
+# Election Night Page
+elif st.session_state["current_page"] == "Election Night":
+    st.title("Election Night")
 
-    display_constituency_seat_metrics(
-        election_year,
-        "Constituency Seat Count",
-        "data/polls_econ_alt_model/seat_share/polls_eco_alt_model_seat_share_2010.csv",
-        "data/polls_econ_alt_model/seat_share/polls_eco_alt_model_seat_share_2015.csv",
-        "data/polls_econ_alt_model/seat_share/polls_eco_alt_model_seat_share_2017.csv",
-        "data/polls_econ_alt_model/seat_share/polls_eco_alt_model_seat_share_2019.csv",
-        "data/polls_econ_alt_model/seat_share/polls_eco_alt_model_seat_share_2024.csv",
-    )
+    model = st.selectbox("Compare with", list(model_labels), format_func=model_labels.get, key="election_night_model")
 
     st.markdown("<div style='height: 20px;'></div>", unsafe_allow_html=True)
 
-    st.markdown(f"<div style='display: flex; justify-content: center; align-items: center; font-size:1.8rem; font-weight: 600; margin: 0.5rem 0'>Constituency Seat Map</div>", unsafe_allow_html=True)
+    display_election_night(model)
 
-    display_legend(
-        election_year,
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2010.csv",
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2015.csv",
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2017.csv",
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2019.csv",
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2024.csv"
-    )
+# Diagnostics Page
+elif st.session_state["current_page"] == "Diagnostics":
+    st.title("Diagnostics")
 
-    display_hexmap(
-        election_year,
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2010.csv",
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2015.csv",
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2017.csv",
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2019.csv",
-        "data/polls_econ_alt_model/hexmap/polls_econ_alt_model_hexmap_2024.csv"
-    )
+    display_diagnostics()
 
 # # Data Page
 # elif st.session_state["current_page"] == "Data":
@@ -667,3 +1032,6 @@ elif st.session_state["current_page"] == "Polling + Econ + Social Media Model":
 #         "data/vote_share/ge_2019_vote_share.csv",
 #         "data/vote_share/ge_2024_vote_share.csv",
 #     )
+
+# Instrumentation
+end_rerun(st.session_state["current_page"])
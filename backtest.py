@@ -0,0 +1,341 @@
+import argparse
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from analytics import constituency_index, fact_table
+from data_registry import DATA_DIR, dataset_paths, reference_version, tree_version
+from data_validation import PARTIES, clean_name, party_code
+from instrumentation import count, span
+from model_registry import models as registered_models
+
+# Backtest
+# Scores every model against data/actuals for every year with results, in one
+# grouped pass over the fact table and one comparison over the constituency
+# winner table. Seats called correctly need the actual winner of each seat,
+# read from data/actuals/hexmap/actual_hexmap_<year>.csv in the same layout as
+# the model hexmaps; years without that file are reported as n/a. The scores,
+# the leaderboard and the per-page scorecard deltas are built together once per
+# data version and shared by every session. `python backtest.py import` writes
+# an actuals hexmap from a per-constituency results file and `check` reports
+# years whose seat scores are missing.
+ACTUALS_HEXMAP_DIR = DATA_DIR / "actuals" / "hexmap"
+SCORE_COLUMNS = ["vote_share_mae", "vote_share_rmse", "seat_error", "seats_off",
+                 "seats_called", "seats_correct", "seat_accuracy"]
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def score_models(fact_df:pd.DataFrame, index:dict):
+    """
+    Scores every model and year against the actual result.
+
+    :param fact_df: Fact table from analytics.fact_table().
+    :param index: Constituency index from analytics.constituency_index().
+
+    :return: DataFrame indexed by (model, year) with SCORE_COLUMNS. Years without results are left out;
+        seats_called, seats_correct and seat_accuracy are NaN for years without an actuals hexmap.
+    """
+    scored = fact_df[fact_df["year"].isin(fact_df.loc[fact_df["actual_seats"].notna(), "year"].unique())]
+    vote_share_error = scored["vote_share"] - scored["actual_vote_share"]
+    seat_error = (scored["seats"].fillna(0) - scored["actual_seats"].fillna(0).astype("float64")).abs()
+    scored = pd.DataFrame({
+        "model": scored["model"].astype(str),
+        "year": scored["year"].astype(int),
+        "vote_share_error": vote_share_error.abs(),
+        "vote_share_squared": vote_share_error ** 2,
+        "seat_error": seat_error,
+    })
+
+    scores_df = scored.groupby(["model", "year"]).agg(
+        vote_share_mae=("vote_share_error", "mean"),
+        vote_share_rmse=("vote_share_squared", "mean"),
+        seat_error=("seat_error", "sum"),
+    )
+    scores_df["vote_share_rmse"] = np.sqrt(scores_df["vote_share_rmse"])
+    scores_df["seat_error"] = scores_df["seat_error"].astype(int)
+    # Every misallocated seat is counted twice in the absolute error sum
+    scores_df["seats_off"] = scores_df["seat_error"] // 2
+
+    # Winner codes per seat, -1 where a seat is missing from a snapshot
+    winners = index["winner_table"]
+    seats_called = np.full(len(scores_df), np.nan)
+    seats_correct = np.full(len(scores_df), np.nan)
+    if "actuals" in index["models"]:
+        actual = winners[:, index["models"].index("actuals"), :]
+        for position, (model, year) in enumerate(scores_df.index):
+            if model not in index["models"] or year not in index["years"]:
+                continue
+            column = index["years"].index(year)
+            predicted = winners[:, index["models"].index(model), column]
+            called = (actual[:, column] >= 0) & (predicted >= 0)
+            if called.any():
+                seats_called[position] = called.sum()
+                seats_correct[position] = (called & (predicted == actual[:, column])).sum()
+    scores_df["seats_called"] = seats_called
+    scores_df["seats_correct"] = seats_correct
+    scores_df["seat_accuracy"] = seats_correct / seats_called
+
+    return scores_df[SCORE_COLUMNS]
+
+
+def build_leaderboard(scores_df:pd.DataFrame):
+    """
+    Ranks the models over every year with results.
+
+    :param scores_df: Scores from score_models().
+
+    :return: DataFrame indexed by model, best vote share MAE first, with years, vote_share_mae,
+        vote_share_rmse, mean_seat_error and seat_accuracy columns.
+    """
+    grouped = scores_df.groupby(level="model")
+    leaderboard_df = pd.DataFrame({
+        "years": grouped.size(),
+        "vote_share_mae": grouped["vote_share_mae"].mean(),
+        "vote_share_rmse": np.sqrt(grouped["vote_share_rmse"].apply(lambda rmse: (rmse ** 2).mean())),
+        "mean_seat_error": grouped["seat_error"].mean(),
+        "seat_accuracy": grouped["seats_correct"].sum(min_count=1) / grouped["seats_called"].sum(min_count=1),
+    })
+    return leaderboard_df.sort_values("vote_share_mae")
+
+
+def build_leaderboard_figure(scores_df:pd.DataFrame, model_labels:dict):
+    """
+    Charts each model's vote share MAE and seat error per year.
+
+    :param scores_df: Scores from score_models().
+    :param model_labels: Dictionary of model directory name to display label.
+
+    :return: Figure.
+    """
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(rows=1, cols=2, subplot_titles=("Vote Share MAE (pts)", "Total Seat Error"))
+    for model, model_df in scores_df.groupby(level="model"):
+        years = model_df.index.get_level_values("year").astype(str)
+        label = model_labels.get(model, model)
+        fig.add_trace(go.Bar(name=label, x=years, y=model_df["vote_share_mae"], legendgroup=model), row=1, col=1)
+        fig.add_trace(go.Bar(name=label, x=years, y=model_df["seat_error"], legendgroup=model, showlegend=False), row=1, col=2)
+    fig.update_layout(barmode="group", height=400, margin=dict(l=0, r=0, t=40, b=0))
+    return fig
+
+
+def build_metric_deltas(fact_df:pd.DataFrame):
+    """
+    Computes the scorecard deltas, actual minus predicted, for every model and year with results.
+
+    :param fact_df: Fact table from analytics.fact_table().
+
+    :return: Dictionary of (model, year) to a dictionary with seats and vote_share keys, each a
+        dictionary of party code to delta, or None when that year has no actual result.
+    """
+    seat_years = set(fact_df.loc[fact_df["actual_seats"].notna(), "year"])
+    vote_share_years = set(fact_df.loc[fact_df["actual_vote_share"].notna(), "year"])
+
+    # Parties the actual result does not list count as zero, as in the scorecards
+    seat_delta = fact_df["actual_seats"].fillna(0).astype("float64").to_numpy() - fact_df["seats"].to_numpy()
+    vote_share_delta = np.round(fact_df["actual_vote_share"].fillna(0).to_numpy() - fact_df["vote_share"].to_numpy())
+    parties = fact_df["party"].astype(str).to_numpy()
+
+    deltas = {}
+    for (model, year), rows in fact_df.groupby(["model", "year"], observed=True).indices.items():
+        deltas[(str(model), int(year))] = dict(
+            seats=dict(zip(parties[rows], seat_delta[rows])) if year in seat_years else None,
+            vote_share=dict(zip(parties[rows], vote_share_delta[rows])) if year in vote_share_years else None,
+        )
+    return deltas
+
+
+def build_backtest():
+    """
+    Builds the scores, leaderboard, chart and scorecard deltas in one pass.
+
+    :return: Dictionary with scores, leaderboard, figure and deltas keys.
+    """
+    fact_df = fact_table()
+    scores_df = score_models(fact_df, constituency_index())
+    model_labels = {model["model"]: model["label"] for model in registered_models()}
+    return dict(
+        scores=scores_df,
+        leaderboard=build_leaderboard(scores_df),
+        figure=build_leaderboard_figure(scores_df, model_labels),
+        deltas=build_metric_deltas(fact_df),
+    )
+
+
+def backtest():
+    """
+    Returns the shared backtest, rebuilding it when any dataset or the nations table changes.
+
+    :return: Dictionary, see build_backtest.
+    """
+    version = (tree_version(), reference_version("constituency_nations"))
+    with _lock:
+        entry = _cache.get("backtest")
+        if entry is not None and entry[0] == version:
+            count("backtest.hit")
+            return entry[1]
+    count("backtest.miss")
+    with span("backtest.build"):
+        result = build_backtest()
+    with _lock:
+        _cache["backtest"] = (version, result)
+    return result
+
+
+def clear():
+    """
+    Drops the shared backtest, so the next lookup rebuilds it.
+    """
+    with _lock:
+        _cache.clear()
+
+
+def metric_deltas(model:str, year:int):
+    """
+    Looks up the precomputed scorecard deltas for one model page.
+
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Dictionary with seats and vote_share keys, see build_metric_deltas.
+    """
+    return backtest()["deltas"].get((model, int(year)), dict(seats=None, vote_share=None))
+
+
+# Actual Winners
+def actual_hexmap(results_df:pd.DataFrame, layout_df:pd.DataFrame):
+    """
+    Builds an actuals hexmap from the declared winner of every constituency.
+
+    :param results_df: DataFrame with Constituency and Winner columns, any accepted spelling of a party.
+    :param layout_df: A model hexmap supplying the constituency names and hex coordinates.
+
+    :raises ValueError: When a winner is not a known party or a hexmap constituency has no result.
+
+    :return: DataFrame in the hexmap layout, with labels and colours from data_validation.PARTIES.
+    """
+    winners = {}
+    for name, party in zip(results_df["Constituency"].astype(str), results_df["Winner"].astype(str)):
+        code = party_code(party)
+        if code is None:
+            raise ValueError(f"unknown party {party!r} for {name}")
+        winners[clean_name(name)] = code
+
+    names = [clean_name(name) for name in layout_df["Constituency"].astype(str)]
+    missing = sorted(set(names) - set(winners))
+    if missing:
+        raise ValueError(f"no result for {', '.join(missing)}")
+
+    codes = [winners[name] for name in names]
+    return pd.DataFrame({
+        "Constituency": names,
+        "Winner": codes,
+        "elected_mp_party": [PARTIES[code]["short"] for code in codes],
+        "elected_mp_party_name": [PARTIES[code]["name"] for code in codes],
+        "color": [PARTIES[code]["color"] for code in codes],
+        "constituency_name": [clean_name(name) for name in layout_df["constituency_name"].astype(str)],
+        "coord_one": layout_df["coord_one"].to_numpy(),
+        "coord_two": layout_df["coord_two"].to_numpy(),
+    })
+
+
+def import_actual_hexmap(results_path:Path, year:int, hexmap_dir:Path=ACTUALS_HEXMAP_DIR):
+    """
+    Writes actual_hexmap_<year>.csv from a results file, laid out like that year's model hexmaps.
+
+    The file is only written once it passes the checks preload runs: data_registry.read_dataset on
+    the file itself and data_registry.validate_datasets against the year's other actuals datasets.
+
+    :param results_path: CSV with Constituency and Winner columns.
+    :param year: Election year.
+    :param hexmap_dir: Directory of the actuals hexmaps.
+
+    :raises ValueError: When no model has a hexmap for the year, the results are incomplete (see
+        actual_hexmap) or the file fails validation.
+
+    :return: Path written.
+    """
+    from data_registry import load_dataset, read_dataset, validate_datasets
+
+    layouts = [key for key in dataset_paths() if key[1] == "hexmap" and key[2] == year and key[0] != "actuals"]
+    if not layouts:
+        raise ValueError(f"no model hexmap for {year} to take the layout from")
+    hexmap_df = actual_hexmap(pd.read_csv(results_path), load_dataset(*layouts[0]))
+
+    hexmap_dir.mkdir(parents=True, exist_ok=True)
+    csv_path = hexmap_dir / f"actual_hexmap_{year}.csv"
+    tmp_path = csv_path.with_suffix(".tmp")
+    hexmap_df.to_csv(tmp_path, index=False)
+    try:
+        key = ("actuals", "hexmap", year)
+        snapshot = {key: read_dataset(key, tmp_path)[1]}
+        for kind in ("seat_share", "vote_share"):
+            if ("actuals", kind, year) in dataset_paths():
+                snapshot[("actuals", kind, year)] = load_dataset("actuals", kind, year)
+        validate_datasets(snapshot)
+    except ValueError:
+        tmp_path.unlink()
+        raise
+    tmp_path.replace(csv_path)
+    return csv_path
+
+
+def score_problems(scores_df:pd.DataFrame, index:dict):
+    """
+    Checks that seats_correct is a number for every model in every scored year.
+
+    :param scores_df: Scores from score_models().
+    :param index: Constituency index the scores were computed from.
+
+    :return: List of messages, empty when every scored year has seat scores.
+    """
+    problems = []
+    for year in sorted(set(scores_df.index.get_level_values("year"))):
+        if ("actuals", year) not in index["snapshots"]:
+            problems.append(f"{year}: seats_correct is n/a, no {ACTUALS_HEXMAP_DIR.relative_to(DATA_DIR.parent)}/actual_hexmap_{year}.csv")
+            continue
+        year_df = scores_df.xs(year, level="year")
+        missing = [model for model, correct in year_df["seats_correct"].items() if not np.isfinite(correct)]
+        if missing:
+            problems.append(f"{year}: seats_correct is n/a for {', '.join(missing)}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import actual winners and check the backtest scores.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="write an actuals hexmap from a results CSV")
+    import_parser.add_argument("results", type=Path, help="CSV with Constituency and Winner columns")
+    import_parser.add_argument("--year", type=int, required=True, help="election year")
+    commands.add_parser("check", help="report years whose seat scores are missing")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        print(f"Wrote {import_actual_hexmap(args.results, args.year)}")
+        return 0
+
+    # The same validation the app runs at startup, so a file that passes here loads there
+    from data_registry import preload
+
+    try:
+        preload()
+    except ValueError as error:
+        print(error)
+        return 1
+    problems = score_problems(backtest()["scores"], constituency_index())
+    for problem in problems:
+        print(problem)
+    if problems:
+        return 1
+    print("Every scored year has seat scores")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+import argparse
+import cProfile
+import json
+import platform
+import pstats
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+# Render Benchmark
+# Drives every page and election year of app.py headlessly with AppTest against
+# the checked-in data/ tree and records wall time, peak memory, read_csv calls,
+# payload sizes and the time spent in each display_* function, plus the time the
+# largest Seat Simulator draw count takes. Results are JSON so two commits can be
+# compared with --compare.
+APP_DIR = Path(__file__).resolve().parent
+APP_PATH = APP_DIR / "app.py"
+
+BENCHMARKED_FUNCTIONS = ["display_hexmap", "display_legend",
+                         "display_constituency_seat_metrics", "display_vote_share_metrics"]
+
+# Modules holding process-wide caches, each emptied by its clear()
+CACHED_MODULES = ["model_registry", "data_validation", "data_registry", "analytics", "backtest", "render_cache",
+                  "live_results", "api"]
+
+# Metrics where a higher number is worse, checked by --compare
+COMPARED_METRICS = ["cold_seconds", "warm_seconds", "peak_memory_bytes", "cold_read_csv_calls",
+                    "warm_read_csv_calls", "figure_bytes", "payload_bytes"]
+
+
+def benchmark_cases(years=None):
+    """
+    Lists every page and year to benchmark.
+
+    :param years: Election years to include, defaults to all.
+
+    :return: List of (page, year) tuples, year None for pages without a year slider.
+    """
+    from model_registry import models
+    from static_export import STATIC_PAGES
+
+    return [(page, None) for page in STATIC_PAGES] + [
+        (model["page"], year) for model in models() for year in model["years"] if not years or year in years]
+
+
+def _clear_caches():
+    # Drop every process-wide cache so the next run starts as a new server would.
+    # A module the app has not imported yet has nothing cached.
+    import streamlit as st
+
+    for name in CACHED_MODULES:
+        module = sys.modules.get(name)
+        if module is not None:
+            module.clear()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+class _ReadCsvCounter:
+
+    def __init__(self):
+        import pandas as pd
+
+        self.calls = 0
+        self._read_csv = pd.read_csv
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self._read_csv(*args, **kwargs)
+
+
+def _run(page:str, year=None, cold:bool=False, counter=None):
+    from streamlit.testing.v1 import AppTest
+
+    # Every timed run is a rerun of an open session, as when a visitor moves the
+    # year slider. Widgets are only addressable after a first run.
+    app = AppTest.from_file(str(APP_PATH), default_timeout=120)
+    app.session_state["current_page"] = page
+    app.run()
+    if year is not None:
+        app.select_slider[0].set_value(year)
+    if cold:
+        _clear_caches()
+    if counter is not None:
+        counter.calls = 0
+
+    start = time.perf_counter()
+    app.run()
+    seconds = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"{page} {year}: {app.exception[0].message}")
+    return app, seconds
+
+
+def _payload_sizes(app):
+    charts = app.get("plotly_chart")
+    figure_bytes = sum(len(chart.proto.spec.encode()) for chart in charts)
+
+    payload_bytes = 0
+    stack = [app.main]
+    while stack:
+        node = stack.pop()
+        if hasattr(node, "children"):
+            stack.extend(node.children.values())
+        elif getattr(node, "proto", None) is not None:
+            payload_bytes += node.proto.ByteSize()
+    return figure_bytes, payload_bytes
+
+
+def _function_seconds(profile:cProfile.Profile):
+    stats = pstats.Stats(profile).stats
+    seconds = {name: 0.0 for name in BENCHMARKED_FUNCTIONS}
+    for (file_name, _, function_name), (_, _, _, cumulative, _) in stats.items():
+        if function_name in seconds and Path(file_name).resolve() == APP_PATH:
+            seconds[function_name] += cumulative
+    return seconds
+
+
+def benchmark_case(page:str, year=None, repeat:int=5):
+    """
+    Benchmarks one page and year.
+
+    The cold run follows a cache clear, so it includes loading the data tree. Peak memory
+    and per-function times come from separate runs so tracemalloc and the profiler do not
+    distort the wall times.
+
+    :param page: Page name as stored in st.session_state["current_page"].
+    :param year: Election year, or None.
+    :param repeat: Number of warm runs.
+
+    :return: Result dictionary.
+    """
+    import pandas as pd
+
+    counter = _ReadCsvCounter()
+    with mock.patch.object(pd, "read_csv", counter):
+        app, cold_seconds = _run(page, year, cold=True, counter=counter)
+        cold_read_csv_calls = counter.calls
+
+        warm_seconds = []
+        warm_read_csv_calls = 0
+        for _ in range(repeat):
+            warm_seconds.append(_run(page, year, counter=counter)[1])
+            warm_read_csv_calls = max(warm_read_csv_calls, counter.calls)
+
+    tracemalloc.start()
+    _run(page, year)
+    peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    profile = cProfile.Profile()
+    profile.enable()
+    _run(page, year)
+    profile.disable()
+
+    figure_bytes, payload_bytes = _payload_sizes(app)
+
+    return dict(
+        page=page,
+        year=year,
+        cold_seconds=cold_seconds,
+        warm_seconds=statistics.median(warm_seconds),
+        warm_seconds_min=min(warm_seconds),
+        peak_memory_bytes=peak_memory_bytes,
+        cold_read_csv_calls=cold_read_csv_calls,
+        warm_read_csv_calls=warm_read_csv_calls,
+        figure_bytes=figure_bytes,
+        payload_bytes=payload_bytes,
+        function_seconds=_function_seconds(profile),
+    )
+
+
+def benchmark_simulation(repeat:int=5):
+    """
+    Times the largest draw count offered on the Seat Simulator page, outside st.cache_data,
+    for the default model and its latest year.
+
+    :param repeat: Number of warm runs.
+
+    :return: Result dictionary with page "simulate", comparable by --compare like a page result.
+    """
+    from model_registry import models
+    from simulation import SIMULATION_COUNTS, simulate
+
+    model = models()[0]
+    simulations = max(SIMULATION_COUNTS)
+
+    # The first run also builds the constituency index and reads the predictions
+    start = time.perf_counter()
+    simulate(model["model"], model["years"][-1], simulations)
+    cold_seconds = time.perf_counter() - start
+
+    warm_seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        simulate(model["model"], model["years"][-1], simulations)
+        warm_seconds.append(time.perf_counter() - start)
+
+    return dict(
+        page="simulate",
+        year=model["years"][-1],
+        model=model["model"],
+        simulations=simulations,
+        cold_seconds=cold_seconds,
+        warm_seconds=statistics.median(warm_seconds),
+        warm_seconds_min=min(warm_seconds),
+    )
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_benchmarks(cases, repeat:int=5):
+    """
+    Benchmarks every case and collects environment details.
+
+    :param cases: List of (page, year) tuples.
+    :param repeat: Number of warm runs per case.
+
+    :return: Report dictionary with meta and results keys.
+    """
+    import pandas as pd
+    import plotly
+    import streamlit as st
+
+    results = [benchmark_case(page, year, repeat) for page, year in cases]
+    results.append(benchmark_simulation(repeat))
+    return dict(
+        meta=dict(
+            commit=_git_commit(),
+            created=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            python=platform.python_version(),
+            streamlit=st.__version__,
+            pandas=pd.__version__,
+            plotly=plotly.__version__,
+            bundle=(APP_DIR / "data" / "bundle.arrow").exists(),
+            repeat=repeat,
+            max_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        ),
+        results=results,
+    )
+
+
+def compare_reports(baseline:dict, current:dict, tolerance:float=0.1):
+    """
+    Compares two reports case by case.
+
+    :param baseline: Earlier report.
+    :param current: New report.
+    :param tolerance: Allowed relative increase before a metric counts as a regression.
+
+    :return: List of (page, year, metric, baseline value, current value, ratio) rows for regressions.
+    """
+    baseline_results = {(result["page"], result["year"]): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        previous = baseline_results.get((result["page"], result["year"]))
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + tolerance):
+                ratio = after / before if before else float("inf")
+                regressions.append((result["page"], result["year"], metric, before, after, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the render path of every page.")
+    parser.add_argument("--year", type=int, action="append", help="only benchmark these years")
+    parser.add_argument("--page", action="append", help="only benchmark these pages")
+    parser.add_argument("--repeat", type=int, default=5, help="warm runs per case")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    parser.add_argument("--compare", type=Path, metavar="BASELINE", help="fail on regressions against an earlier report")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative increase allowed by --compare")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in benchmark_cases(args.year) if not args.page or case[0] in args.page]
+    report = run_benchmarks(cases, args.repeat)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        args.output.write_text(output)
+
+    if args.compare:
+        regressions = compare_reports(json.loads(args.compare.read_text()), report, args.tolerance)
+        for page, year, metric, before, after, ratio in regressions:
+            print(f"{page} {year or ''} {metric}: {before:g} -> {after:g} ({ratio:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
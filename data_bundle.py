@@ -0,0 +1,227 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from data_registry import COLUMNS, DATA_DIR, DTYPES, discover_datasets
+from data_validation import PARTY_COLUMNS
+
+# Data Bundle
+# Compiles the data/ CSV tree into one Arrow IPC file that workers memory-map at
+# startup. The CSVs stay the source of truth: every dataset in the bundle records
+# the size and mtime of the CSV it came from and is only used while they match.
+BUNDLE_PATH = DATA_DIR / "bundle.arrow"
+
+# Union of every column in the tree, with the categorical columns dictionary encoded
+_ARROW_TYPES = {"category": pa.dictionary(pa.int8(), pa.string()), "int16": pa.int16(), "float64": pa.float64()}
+
+_BUNDLE_TYPES = {"Constituency": pa.string(), "constituency_name": pa.string()}
+for kind_dtypes in DTYPES.values():
+    for column, dtype in kind_dtypes.items():
+        _BUNDLE_TYPES[column] = _ARROW_TYPES[dtype]
+
+BUNDLE_SCHEMA = pa.schema(list(_BUNDLE_TYPES.items()))
+
+_MANIFEST_KEY = b"election_predictor_manifest"
+
+# The dtype pandas gives text columns read from CSV
+_STRING_DTYPE = pd.StringDtype("pyarrow", na_value=float("nan"))
+
+
+def _source_stamp(csv_path:Path):
+    stat = csv_path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _bundle_frame(dataset_df:pd.DataFrame, categories:dict):
+    # Give every dataset the full column set and shared categories so all record
+    # batches in the file use one dictionary per column
+    frame = pd.DataFrame(index=dataset_df.index)
+    for column in BUNDLE_SCHEMA.names:
+        values = dataset_df[column] if column in dataset_df else None
+        if column in categories:
+            frame[column] = pd.Series(values, index=dataset_df.index, dtype=pd.CategoricalDtype(categories[column]))
+        else:
+            frame[column] = values
+    return frame
+
+
+def build_bundle(data_dir:Path=DATA_DIR, bundle_path:Path=BUNDLE_PATH):
+    """
+    Compiles every dataset under the data directory into one Arrow IPC bundle.
+
+    :param data_dir: Root of the data tree.
+    :param bundle_path: Where to write the bundle.
+
+    :return: Number of datasets written.
+    """
+    paths = discover_datasets(data_dir)
+    datasets = {key: pd.read_csv(csv_path, dtype=DTYPES[key[1]]) for key, csv_path in paths.items()}
+
+    categories = {}
+    for field in BUNDLE_SCHEMA:
+        if pa.types.is_dictionary(field.type):
+            values = set()
+            for dataset_df in datasets.values():
+                if field.name in dataset_df:
+                    values.update(dataset_df[field.name].dropna().astype(str))
+            categories[field.name] = sorted(values)
+
+    manifest = []
+    tables = []
+    for index, (key, csv_path) in enumerate(paths.items()):
+        model, kind, year = key
+        frame = _bundle_frame(datasets[key], categories)
+        tables.append(pa.Table.from_pandas(frame, schema=BUNDLE_SCHEMA, preserve_index=False))
+        manifest.append(dict(
+            model=model, kind=kind, year=year, batch=index,
+            source=csv_path.relative_to(data_dir).as_posix(),
+            stamp=_source_stamp(csv_path)))
+
+    schema = BUNDLE_SCHEMA.with_metadata({_MANIFEST_KEY: json.dumps(manifest).encode()})
+
+    tmp_path = bundle_path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            for table in tables:
+                writer.write_batch(table.combine_chunks().to_batches()[0])
+    tmp_path.replace(bundle_path)
+
+    return len(manifest)
+
+
+class DataBundle:
+    """
+    Read-only view over a memory-mapped bundle file.
+    """
+
+    def __init__(self, bundle_path:Path=BUNDLE_PATH, data_dir:Path=DATA_DIR):
+        self.bundle_path = Path(bundle_path)
+        self.data_dir = Path(data_dir)
+        self._reader = pa.ipc.open_file(pa.memory_map(str(self.bundle_path), "r"))
+        self._categories = {}
+        manifest = json.loads(self._reader.schema.metadata[_MANIFEST_KEY])
+        self.entries = {(entry["model"], entry["kind"], entry["year"]): entry for entry in manifest}
+
+    def is_fresh(self, key):
+        """
+        Checks that a dataset in the bundle still matches the size and mtime of its CSV.
+
+        :param key: Tuple of (model, kind, year).
+
+        :return: True when the bundled copy can be used in place of the CSV.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        csv_path = self.data_dir / entry["source"]
+        return csv_path.exists() and _source_stamp(csv_path) == entry["stamp"]
+
+    def _category_dtype(self, column:str, dictionary:pa.Array):
+        # Every batch shares one dictionary per column, so its categories are built once
+        dtype = self._categories.get(column)
+        if dtype is None:
+            dtype = self._categories[column] = pd.CategoricalDtype(dictionary.to_pylist())
+        return dtype
+
+    def _column(self, column:str, array:pa.Array, dtype:str):
+        if array.null_count:
+            return array.to_pandas()
+        if dtype == "category":
+            codes = array.indices.to_numpy(zero_copy_only=True)
+            return pd.Categorical.from_codes(codes, dtype=self._category_dtype(column, array.dictionary), validate=False)
+        if dtype in ("int16", "float64"):
+            return array.to_numpy(zero_copy_only=True)
+        return pd.array(array, dtype=_STRING_DTYPE)
+
+    def read(self, key):
+        """
+        Reads one dataset from the bundle with the same columns and dtypes as the CSV loader.
+
+        Column values are views of the memory-mapped file rather than copies, so workers that map
+        the same bundle share its pages.
+
+        :param key: Tuple of (model, kind, year).
+
+        :return: DataFrame, to be treated as read-only.
+        """
+        entry = self.entries[key]
+        kind = entry["kind"]
+        batch = self._reader.get_batch(entry["batch"])
+        dtypes = DTYPES[kind]
+        dataset_df = pd.DataFrame(
+            {column: self._column(column, batch.column(column), dtypes.get(column)) for column in COLUMNS[kind]},
+            copy=False)
+
+        # Categories are shared by the whole bundle; the party column keeps only its own so
+        # validation sees the parties this dataset lists
+        column = PARTY_COLUMNS[kind]
+        dataset_df[column] = dataset_df[column].cat.remove_unused_categories()
+        return dataset_df
+
+
+def open_bundle(bundle_path:Path=BUNDLE_PATH):
+    """
+    Opens the bundle if it has been built.
+
+    :return: DataBundle, or None when no bundle exists.
+    """
+    if not Path(bundle_path).exists():
+        return None
+    return DataBundle(bundle_path)
+
+
+def check_bundle(bundle_path:Path=BUNDLE_PATH, data_dir:Path=DATA_DIR):
+    """
+    Compares every dataset in the bundle against a fresh parse of its CSV.
+
+    :return: List of problem descriptions, empty when the bundle is consistent.
+    """
+    bundle = DataBundle(bundle_path, data_dir)
+    paths = discover_datasets(data_dir)
+    problems = []
+
+    for key in sorted(set(paths) - set(bundle.entries)):
+        problems.append(f"{paths[key].relative_to(data_dir)}: missing from bundle")
+    for key in sorted(set(bundle.entries) - set(paths)):
+        problems.append(f"{bundle.entries[key]['source']}: in bundle but no longer on disk")
+
+    for key in sorted(set(paths) & set(bundle.entries)):
+        source = paths[key].relative_to(data_dir)
+        if not bundle.is_fresh(key):
+            problems.append(f"{source}: changed since the bundle was built")
+            continue
+        csv_df = pd.read_csv(paths[key], dtype=DTYPES[key[1]])
+        try:
+            pd.testing.assert_frame_equal(csv_df, bundle.read(key), check_categorical=False)
+        except AssertionError as error:
+            problems.append(f"{source}: contents differ ({str(error).splitlines()[0]})")
+
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile or check the columnar data bundle.")
+    parser.add_argument("command", choices=["build", "check"])
+    parser.add_argument("--bundle", type=Path, default=BUNDLE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_bundle(bundle_path=args.bundle)
+        print(f"Wrote {count} datasets to {args.bundle}")
+        return 0
+
+    problems = check_bundle(bundle_path=args.bundle)
+    for problem in problems:
+        print(problem)
+    if problems:
+        return 1
+    print("Bundle matches the CSV tree")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
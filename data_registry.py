@@ -0,0 +1,320 @@
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from data_validation import COLUMNS, dataset_problems, normalize_dataset, normalize_names, tree_problems
+from instrumentation import count, span
+from model_registry import DATA_DIR, KINDS, discover_datasets
+
+# Dataset Registry
+# Every CSV under data/<model>/<kind>/*_<year>.csv is parsed once per process and
+# shared by all Streamlit sessions. Entries are reloaded when a file's mtime changes.
+# Discovery lives in model_registry, which the sidebar uses without pandas.
+# While data_watcher is running the registry is "watched": the watcher re-parses
+# changed files and publishes them, and lookups trust the stored entries instead
+# of checking every file's mtime. Every dataset is validated and normalized by
+# data_validation as it is read, so cached frames hold party codes and clean names
+# only, and preload checks the files against each other once.
+
+# Per-constituency lookup tables that do not vary by model or year
+REFERENCE_DIR = DATA_DIR / "constituencies"
+
+DTYPES = {
+    "hexmap": {
+        "Winner": "category",
+        "elected_mp_party": "category",
+        "elected_mp_party_name": "category",
+        "color": "category",
+        "coord_one": "int16",
+        "coord_two": "int16",
+    },
+    "seat_share": {"Party": "category", "Total_Constituencies": "int16"},
+    "vote_share": {"Party": "category", "Vote_Share": "float64"},
+}
+
+_lock = threading.Lock()
+_datasets = {}
+_paths = {}
+_preloaded = threading.Event()
+_watched = threading.Event()
+_bundle = None
+
+
+def dataset_paths():
+    """
+    Returns the discovered dataset index, discovering it on first use.
+
+    :return: Dictionary of (model, kind, year) to CSV path, replaced rather than modified when the tree changes.
+    """
+    global _paths
+    if not _paths:
+        with _lock:
+            if not _paths:
+                _paths = discover_datasets()
+    return _paths
+
+
+def dataset_key(data_path):
+    """
+    Looks up the registry key for a CSV path.
+
+    :param data_path: Path to a dataset CSV, absolute or relative to the working directory.
+
+    :return: Tuple of (model, kind, year).
+    """
+    resolved = Path(data_path).resolve()
+    for key, csv_path in dataset_paths().items():
+        if csv_path == resolved:
+            return key
+    raise KeyError(f"{data_path} is not a registered dataset")
+
+
+def attach_bundle(bundle):
+    """
+    Serves datasets from a compiled data bundle wherever its copy still matches the CSV on disk.
+
+    :param bundle: DataBundle from data_bundle.open_bundle(), or None to read the CSVs directly.
+    """
+    global _bundle
+    with _lock:
+        _bundle = bundle
+        _datasets.clear()
+        _preloaded.clear()
+
+
+def _parse_dataset(key, csv_path:Path):
+    if _bundle is not None and _bundle.is_fresh(key):
+        with span("data.bundle_read"):
+            return _bundle.read(key)
+    with span("data.csv_read"):
+        return pd.read_csv(csv_path, dtype=DTYPES[key[1]])
+
+
+def _read_dataset(key, csv_path:Path):
+    try:
+        dataset_df = _parse_dataset(key, csv_path)
+    except (ValueError, pd.errors.ParserError) as error:
+        raise ValueError(f"{csv_path.name}: {error}") from error
+    with span("data.validate"):
+        validate_dataset(key[1], dataset_df, csv_path.name)
+    with span("data.normalize"):
+        return normalize_dataset(key[1], dataset_df)
+
+
+def _version(key, csv_path:Path):
+    if _watched.is_set():
+        entry = _datasets.get(key)
+        if entry is not None:
+            return entry[0]
+    return csv_path.stat().st_mtime_ns
+
+
+def validate_dataset(kind:str, dataset_df:pd.DataFrame, source=""):
+    """
+    Checks that a parsed dataset has the layout and contents the app expects.
+
+    :param kind: Dataset kind.
+    :param dataset_df: Parsed dataset.
+    :param source: File name used in error messages.
+
+    :raises ValueError: When columns are missing, reordered or contain empty values, or the contents fail
+        data_validation.dataset_problems().
+    """
+    errors, _ = dataset_problems(kind, dataset_df)
+    if errors:
+        raise ValueError(f"{source}: {'; '.join(errors)}")
+
+
+def read_dataset(key, csv_path:Path):
+    """
+    Parses, validates and normalizes one dataset without publishing it.
+
+    :param key: Tuple of (model, kind, year).
+    :param csv_path: Path to the CSV.
+
+    :raises ValueError: When the file cannot be parsed or fails validate_dataset.
+
+    :return: Tuple of (mtime, DataFrame).
+    """
+    mtime = csv_path.stat().st_mtime_ns
+    return mtime, _read_dataset(key, csv_path)
+
+
+def validate_datasets(datasets:dict):
+    """
+    Checks normalized datasets against each other and the nations table, e.g. that a seat_share file
+    agrees with its hexmap's winners.
+
+    :param datasets: Dictionary of (model, kind, year) to normalized DataFrame.
+
+    :raises ValueError: When data_validation.tree_problems() reports errors.
+    """
+    errors, _ = tree_problems(datasets, load_reference("constituency_nations"))
+    if errors:
+        raise ValueError("; ".join(errors))
+
+
+def publish(paths:dict, entries:dict):
+    """
+    Swaps a batch of re-parsed datasets and the new dataset index into the registry in one step.
+
+    A rerun that starts afterwards sees every file in the batch; one already running keeps
+    the frames it has.
+
+    :param paths: Complete dataset index, as returned by discover_datasets().
+    :param entries: Dictionary of (model, kind, year) to (mtime, DataFrame) from read_dataset.
+    """
+    global _paths
+    with _lock:
+        for key in [key for key in _datasets if key[0] != "constituencies" and key not in paths]:
+            del _datasets[key]
+        _datasets.update(entries)
+        _paths = paths
+
+
+def watch():
+    """
+    Marks the registry as kept up to date by data_watcher, so lookups stop checking file mtimes.
+    """
+    _watched.set()
+
+
+def loaded_versions():
+    """
+    Returns the mtime each loaded dataset was parsed at.
+
+    :return: Dictionary of (model, kind, year) to mtime in nanoseconds.
+    """
+    with _lock:
+        return {key: entry[0] for key, entry in _datasets.items() if key[0] != "constituencies"}
+
+
+def load_dataset(model:str, kind:str, year:int):
+    """
+    Returns the shared DataFrame for a dataset, parsing the CSV only when it is new or has changed on disk.
+
+    The returned frame is a shallow copy of the shared one and must be treated as read-only.
+
+    :param model: Model directory name, e.g. "polls_model" or "actuals".
+    :param kind: One of "hexmap", "seat_share" or "vote_share".
+    :param year: Election year.
+
+    :return: DataFrame.
+    """
+    key = (model, kind, int(year))
+    csv_path = dataset_paths()[key]
+    mtime = _version(key, csv_path)
+
+    entry = _datasets.get(key)
+    if entry is None or entry[0] != mtime:
+        with _lock:
+            mtime = _version(key, csv_path)
+            entry = _datasets.get(key)
+            if entry is None or entry[0] != mtime:
+                count("data_registry.miss")
+                entry = (mtime, _read_dataset(key, csv_path))
+                _datasets[key] = entry
+                return entry[1].copy(deep=False)
+
+    count("data_registry.hit")
+    return entry[1].copy(deep=False)
+
+
+def load_reference(name:str):
+    """
+    Returns a shared reference table from data/constituencies, e.g. "constituency_nations".
+
+    Like load_dataset, the CSV is parsed once and again only when its mtime changes.
+
+    :param name: File name without the .csv suffix.
+
+    :return: DataFrame, to be treated as read-only.
+    """
+    key = ("constituencies", name, None)
+    csv_path = REFERENCE_DIR / f"{name}.csv"
+    mtime = csv_path.stat().st_mtime_ns
+
+    entry = _datasets.get(key)
+    if entry is None or entry[0] != mtime:
+        with _lock:
+            entry = (mtime, normalize_names(pd.read_csv(csv_path)))
+            _datasets[key] = entry
+
+    return entry[1].copy(deep=False)
+
+
+def reference_version(name:str):
+    """
+    Returns the on-disk version of a reference table.
+
+    :return: File mtime in nanoseconds.
+    """
+    return (REFERENCE_DIR / f"{name}.csv").stat().st_mtime_ns
+
+
+def dataset_version(model:str, kind:str, year:int):
+    """
+    Returns the on-disk version of a dataset, used by caches built on top of the registry.
+
+    :param model: Model directory name.
+    :param kind: Dataset kind.
+    :param year: Election year.
+
+    :return: File mtime in nanoseconds, or None when the dataset does not exist.
+    """
+    key = (model, kind, int(year))
+    csv_path = dataset_paths().get(key)
+    if csv_path is None:
+        return None
+    return _version(key, csv_path)
+
+
+def tree_version(kinds=KINDS):
+    """
+    Returns a combined version for every dataset of the given kinds.
+
+    :param kinds: Dataset kinds to include.
+
+    :return: Tuple that changes whenever any matching CSV is modified.
+    """
+    return tuple(
+        (key, _version(key, csv_path))
+        for key, csv_path in dataset_paths().items()
+        if key[1] in kinds
+    )
+
+
+def has_dataset(model:str, kind:str, year:int):
+    """
+    Checks whether a dataset was discovered in the data tree.
+
+    :return: True when the dataset exists.
+    """
+    return (model, kind, int(year)) in dataset_paths()
+
+
+def preload():
+    """
+    Parses and validates every discovered dataset once per process so the first page view does not
+    pay for it and a broken data tree fails at startup rather than on some page.
+
+    :raises ValueError: When a dataset fails validate_dataset or the datasets fail validate_datasets.
+    """
+    if _preloaded.is_set():
+        return
+    datasets = {key: load_dataset(*key) for key in dataset_paths()}
+    with span("data.validate_tree"):
+        validate_datasets(datasets)
+    _preloaded.set()
+
+
+def clear():
+    """
+    Drops every cached dataset and the discovered index.
+    """
+    global _paths
+    with _lock:
+        _datasets.clear()
+        _paths = {}
+        _preloaded.clear()
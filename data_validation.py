@@ -0,0 +1,368 @@
+import argparse
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Data Validation
+# Runs once when a CSV is ingested, before anything is cached or rendered. Every
+# spelling of a party (CON, Con, Conservative) is mapped to one code with one short
+# label and one name, names are repaired and whitespace-collapsed, and the party
+# columns become categoricals with a fixed category set, so the render path never
+# cleans strings or reconciles vocabularies. dataset_problems() checks one file,
+# tree_problems() the files against each other; both work on categorical codes
+# and integer arrays rather than strings. `python data_validation.py` checks the
+# whole tree and exits non-zero on errors.
+
+# Columns of each dataset kind, in file order
+COLUMNS = {
+    "hexmap": ["Constituency", "Winner", "elected_mp_party", "elected_mp_party_name", "color",
+               "constituency_name", "coord_one", "coord_two"],
+    "seat_share": ["Party", "Total_Constituencies"],
+    "vote_share": ["Party", "Vote_Share"],
+}
+
+# Party column of each dataset kind
+PARTY_COLUMNS = {"hexmap": "Winner", "seat_share": "Party", "vote_share": "Party"}
+
+# Columns holding constituency names, in datasets and reference tables
+NAME_COLUMNS = ("Constituency", "constituency_name")
+
+# Canonical party vocabulary: code, short label, name and colour, in display order
+PARTIES = {
+    "CON": dict(short="Con", name="Conservative", color="#005af0"),
+    "LAB": dict(short="Lab", name="Labour", color="#dd0018"),
+    "LIB": dict(short="LD", name="Liberal Democrats", color="#ffa331"),
+    "SNP": dict(short="SNP", name="SNP", color="#fff293"),
+    "PLC": dict(short="PC", name="Plaid Cymru", color="#00d4a7"),
+    "GRE": dict(short="Green", name="Green", color="#00bc3e"),
+    "OTH": dict(short="Others", name="Others", color="#909090"),
+}
+PARTY_CODES = list(PARTIES)
+
+# Every accepted spelling, lower case, to its party code
+PARTY_ALIASES = {
+    alias.lower(): code
+    for code, party in PARTIES.items()
+    for alias in (code, party["short"], party["name"])
+} | {
+    "lib dem": "LIB", "lib dems": "LIB", "liberal democrat": "LIB",
+    "plaid": "PLC", "green party": "GRE", "other": "OTH",
+}
+
+SEATS = 650
+
+# Text that is UTF-8 bytes decoded as Windows-1252, e.g. "Ynys MÃ´n"
+_MOJIBAKE_MARKERS = ("Ã", "Â")
+
+# Names with mojibake, line breaks or stray whitespace
+_DIRTY_NAME = r"Ã|Â|\s\s|[\n\r\t]|^\s|\s$"
+
+
+@lru_cache(maxsize=None)
+def clean_name(name:str):
+    """
+    Collapses whitespace, including line breaks inside quoted names, and repairs UTF-8 read as Windows-1252.
+
+    :param name: Constituency name as read from a CSV.
+
+    :return: Cleaned name.
+    """
+    text = " ".join(str(name).split())
+    if any(marker in text for marker in _MOJIBAKE_MARKERS):
+        try:
+            text = text.encode("cp1252").decode("utf-8")
+        except UnicodeError:
+            pass
+    return text
+
+
+def party_code(value):
+    """
+    Maps any accepted spelling of a party to its code.
+
+    :param value: Party code, short label or name.
+
+    :return: Party code, or None when the spelling is unknown.
+    """
+    return PARTY_ALIASES.get(" ".join(str(value).split()).lower())
+
+
+def party_dtype(codes=()):
+    """
+    Returns the categorical dtype party columns are normalized to.
+
+    :param codes: Codes found in a file. Unknown ones are kept after the known codes, so nothing is lost
+        before validation reports them.
+
+    :return: CategoricalDtype.
+    """
+    return _party_dtype(tuple(sorted(set(codes) - set(PARTIES))))
+
+
+@lru_cache(maxsize=None)
+def _party_dtype(unknown:tuple):
+    return pd.CategoricalDtype(sorted(PARTIES) + list(unknown))
+
+
+@lru_cache(maxsize=None)
+def _label_categories(categories:tuple, field:str):
+    return pd.CategoricalDtype([PARTIES[code][field] if code in PARTIES else code for code in categories])
+
+
+def _categories_and_codes(values:pd.Series):
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    return [str(category) for category in values.cat.categories], values.cat.codes.to_numpy()
+
+
+def _dirty_names(names:pd.Series):
+    return names.str.contains(_DIRTY_NAME, regex=True).to_numpy(dtype=bool)
+
+
+def normalize_names(dataset_df:pd.DataFrame):
+    """
+    Cleans the constituency name columns of a dataset or reference table in place. Only the names
+    that need it are touched.
+
+    :param dataset_df: DataFrame, modified in place.
+
+    :return: The same DataFrame.
+    """
+    for column in NAME_COLUMNS:
+        if column in dataset_df:
+            dirty = _dirty_names(dataset_df[column])
+            if dirty.any():
+                names = dataset_df[column].to_numpy(dtype=object).copy()
+                names[dirty] = [clean_name(name) for name in names[dirty]]
+                dataset_df[column] = pd.array(names, dtype=dataset_df[column].dtype)
+    return dataset_df
+
+
+def normalize_dataset(kind:str, dataset_df:pd.DataFrame):
+    """
+    Normalizes a freshly parsed dataset: party columns to codes with a fixed category set, hexmap
+    party labels to the canonical ones for each winner, and constituency names cleaned.
+
+    :param kind: Dataset kind.
+    :param dataset_df: Parsed dataset, modified in place.
+
+    :return: The same DataFrame.
+    """
+    # Spellings are resolved once per category rather than once per row
+    column = PARTY_COLUMNS[kind]
+    categories, codes = _categories_and_codes(dataset_df[column])
+    resolved = [party_code(category) or category for category in categories]
+    dtype = party_dtype(resolved)
+    position = {code: index for index, code in enumerate(dtype.categories)}
+    codes = np.array([position[code] for code in resolved] + [-1], dtype=np.int8)[codes]
+    dataset_df[column] = pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+
+    if kind == "hexmap":
+        normalize_names(dataset_df)
+        # Labels follow the winner code, so they agree with it by construction
+        for label_column, field in (("elected_mp_party", "short"), ("elected_mp_party_name", "name")):
+            label_dtype = _label_categories(tuple(dtype.categories), field)
+            dataset_df[label_column] = pd.Categorical.from_codes(codes, dtype=label_dtype, validate=False)
+    return dataset_df
+
+
+def clear():
+    """
+    Drops the cached name repairs and party dtypes.
+    """
+    clean_name.cache_clear()
+    _party_dtype.cache_clear()
+    _label_categories.cache_clear()
+
+
+def _hexmap_problems(dataset_df:pd.DataFrame, parties, party_codes, errors, warnings):
+    if len(dataset_df) != SEATS:
+        errors.append(f"{len(dataset_df)} constituencies, expected {SEATS}")
+
+    # Labels and colours are compared once per distinct (winner, label) pair of category codes
+    for label_column in ("elected_mp_party", "elected_mp_party_name", "color"):
+        labels, label_codes = _categories_and_codes(dataset_df[label_column])
+        pairs, counts = np.unique(party_codes.astype(np.int32) * len(labels) + label_codes, return_counts=True)
+        for pair, rows in zip(pairs.tolist(), counts.tolist()):
+            party, label = parties[pair // len(labels)], labels[pair % len(labels)]
+            code = party_code(party)
+            if code is None:
+                continue
+            if label_column == "color":
+                if label.lower() != PARTIES[code]["color"]:
+                    warnings.append(f"{party} drawn in {label} rather than {PARTIES[code]['color']} in {rows} rows")
+            elif party_code(label) != code:
+                errors.append(f"{label_column} {label} disagrees with Winner {party} in {rows} rows")
+
+    column = dataset_df["Constituency"]
+    names = column.to_numpy(dtype=object)
+    broken = np.unique(names[_dirty_names(column)])
+    if len(broken):
+        warnings.append(f"names repaired on load: {', '.join(map(repr, broken))}")
+    if len(set(names)) < len(names):
+        unique_names, name_counts = np.unique(names, return_counts=True)
+        warnings.append(f"constituencies listed twice: {', '.join(unique_names[name_counts > 1])}")
+
+    # Coordinates packed into one integer per hex
+    hexes = dataset_df["coord_one"].to_numpy(dtype=np.int32) * 65536 + dataset_df["coord_two"].to_numpy(dtype=np.int32)
+    unique_hexes, inverse, counts = np.unique(hexes, return_inverse=True, return_counts=True)
+    if len(unique_hexes) < len(hexes):
+        stacks = {}
+        for row in np.flatnonzero(counts[inverse] > 1).tolist():
+            stacks.setdefault(inverse[row], []).append(names[row])
+        warnings.append(f"{len(stacks)} hexes drawn on top of each other: "
+                        f"{'; '.join(' / '.join(stack) for stack in stacks.values())}")
+
+
+def dataset_problems(kind:str, dataset_df:pd.DataFrame):
+    """
+    Checks one parsed, not yet normalized dataset: layout, empty values, party vocabulary, row counts,
+    label and colour agreement with the winner, names and coordinate uniqueness.
+
+    :param kind: Dataset kind.
+    :param dataset_df: Parsed dataset.
+
+    :return: Tuple of (errors, warnings), each a list of messages.
+    """
+    errors = []
+    warnings = []
+
+    columns = list(dataset_df.columns)
+    if columns != COLUMNS[kind]:
+        return [f"expected columns {','.join(COLUMNS[kind])}, found {','.join(map(str, columns))}"], warnings
+    if dataset_df.empty:
+        return ["no rows"], warnings
+    empty = [column for column, missing in zip(columns, dataset_df.isna().to_numpy().any(axis=0)) if missing]
+    if empty:
+        return [f"empty values in {', '.join(empty)}"], warnings
+
+    column = PARTY_COLUMNS[kind]
+    parties, party_codes = _categories_and_codes(dataset_df[column])
+    unknown = sorted(party for party in parties if party_code(party) is None)
+    if unknown:
+        errors.append(f"unknown parties in {column}: {', '.join(unknown)}")
+
+    if kind == "hexmap":
+        _hexmap_problems(dataset_df, parties, party_codes, errors, warnings)
+    else:
+        value_column = COLUMNS[kind][1]
+        listed = [party_code(parties[code]) or parties[code] for code in party_codes.tolist()]
+        repeated = sorted({code for code in listed if listed.count(code) > 1})
+        if repeated:
+            errors.append(f"parties listed more than once: {', '.join(repeated)}")
+        values = dataset_df[value_column].to_numpy()
+        if (values < 0).any():
+            errors.append(f"negative {value_column}")
+        if kind == "seat_share" and int(values.sum()) != SEATS:
+            errors.append(f"{value_column} totals {int(values.sum())}, expected {SEATS}")
+        if kind == "vote_share" and (values > 100).any():
+            errors.append(f"{value_column} above 100")
+
+    return errors, warnings
+
+
+def tree_problems(datasets:dict, nations_df:pd.DataFrame=None):
+    """
+    Checks normalized datasets against each other: seat counts against hexmap winners, and every
+    hexmap constituency against the nations table. For the actuals, whose published seat counts
+    predate the current boundaries, a seat count difference is a warning.
+
+    :param datasets: Dictionary of (model, kind, year) to normalized DataFrame.
+    :param nations_df: Normalized constituency_nations table, or None to skip that check.
+
+    :return: Tuple of (errors, warnings), each a list of messages prefixed with the dataset.
+    """
+    errors = []
+    warnings = []
+    nations = set(nations_df["Constituency"].tolist()) if nations_df is not None else None
+
+    for (model, kind, year), hexmap_df in datasets.items():
+        if kind != "hexmap":
+            continue
+        source = f"{model} {year}"
+
+        seat_df = datasets.get((model, "seat_share", year))
+        if seat_df is not None:
+            # One counting pass over the winner codes, compared on the shared party categories
+            winners = hexmap_df["Winner"].cat
+            won = dict(zip(winners.categories, np.bincount(winners.codes.to_numpy(), minlength=len(winners.categories)).tolist()))
+            published = dict(zip(seat_df["Party"].astype(str), seat_df["Total_Constituencies"].tolist()))
+            difference = {party: published.get(party, 0) - won.get(party, 0) for party in sorted(set(won) | set(published))}
+            difference = {party: delta for party, delta in difference.items() if delta}
+            if difference:
+                message = (f"{source}: seat_share disagrees with the hexmap winners "
+                           f"({', '.join(f'{party} {delta:+d}' for party, delta in difference.items())})")
+                # Published results count seats on the boundaries of their day, while an actuals
+                # hexmap places each winner on the current constituencies, so the two can differ
+                (warnings if model == "actuals" else errors).append(message)
+
+        if nations is not None:
+            missing = sorted(set(hexmap_df["Constituency"].tolist()) - nations)
+            if missing:
+                errors.append(f"{source}: no nation for {', '.join(missing)}")
+
+    return errors, warnings
+
+
+def validate_tree():
+    """
+    Parses and checks every dataset in the data tree.
+
+    :return: Dictionary with errors and warnings (lists of (source, message) tuples), datasets,
+        parse_seconds and validate_seconds.
+    """
+    from data_registry import DTYPES, REFERENCE_DIR
+    from model_registry import discover_datasets
+
+    paths = discover_datasets()
+    start = time.perf_counter()
+    raw = {key: pd.read_csv(csv_path, dtype=DTYPES[key[1]]) for key, csv_path in paths.items()}
+    nations_df = pd.read_csv(REFERENCE_DIR / "constituency_nations.csv")
+    parse_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    errors = []
+    warnings = []
+    datasets = {}
+    for key, dataset_df in raw.items():
+        source = paths[key].name
+        file_errors, file_warnings = dataset_problems(key[1], dataset_df)
+        errors += [(source, message) for message in file_errors]
+        warnings += [(source, message) for message in file_warnings]
+        if list(dataset_df.columns) == COLUMNS[key[1]]:
+            datasets[key] = normalize_dataset(key[1], dataset_df)
+    tree_errors, tree_warnings = tree_problems(datasets, normalize_names(nations_df))
+    errors += [tuple(message.split(": ", 1)) for message in tree_errors]
+    warnings += [tuple(message.split(": ", 1)) for message in tree_warnings]
+    validate_seconds = time.perf_counter() - start
+
+    return dict(errors=errors, warnings=warnings, datasets=len(raw),
+                parse_seconds=parse_seconds, validate_seconds=validate_seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check every CSV in the data tree and the files against each other.")
+    parser.add_argument("--quiet", action="store_true", help="only print errors")
+    args = parser.parse_args(argv)
+
+    report = validate_tree()
+
+    # The same message from several files is printed once with the files listed
+    for level, problems in (("error", report["errors"]), ("warning", [] if args.quiet else report["warnings"])):
+        sources = {}
+        for source, message in problems:
+            sources.setdefault(message, []).append(source)
+        for message, files in sources.items():
+            where = files[0] if len(files) == 1 else f"{len(files)} files"
+            print(f"{level}: {where}: {message}")
+
+    print(f"{report['datasets']} datasets, {len(report['errors'])} errors, {len(report['warnings'])} warnings; "
+          f"parsed in {report['parse_seconds'] * 1000:.0f} ms, validated in {report['validate_seconds'] * 1000:.0f} ms")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import logging
+import os
+import threading
+import time
+
+import data_registry
+import render_cache
+from instrumentation import count, span
+from model_registry import DATA_DIR, KINDS, discover_datasets
+
+# Data Watcher
+# Hot-reloads the data/ tree while the server runs. File system events only mark
+# the tree as dirty; after a short quiet period the watcher compares every CSV's
+# mtime with the version loaded in the registry, re-parses and validates just the
+# changed files, publishes them together and rebuilds only the renders built from
+# them. A file that fails validation is logged and the previous version stays
+# live until the file changes again. A file that is valid alone but disagrees
+# with the other files of its model and year is held back and checked again on
+# every sync, so a hexmap written a moment before its seat_share is published
+# together with it. Uses watchdog when it is installed, otherwise polls.
+# Switched off with ELECTION_PREDICTOR_WATCH=0.
+ENABLED = os.environ.get("ELECTION_PREDICTOR_WATCH", "1") not in ("", "0", "false")
+
+# Seconds without events before a batch is ingested, so a model's three files
+# regenerated together are swapped in together
+DEBOUNCE_SECONDS = 0.5
+
+# Seconds between scans when watchdog is not installed
+POLL_SECONDS = 2.0
+
+logger = logging.getLogger("election_predictor.data_watcher")
+
+_lock = threading.Lock()
+_dirty = threading.Event()
+_thread = None
+_rejected = {}
+_held = {}
+
+
+def changed_datasets(paths:dict, loaded:dict):
+    """
+    Compares the files on disk with the versions loaded in the registry.
+
+    :param paths: Dataset index from discover_datasets().
+    :param loaded: Dictionary of (model, kind, year) to loaded mtime, from data_registry.loaded_versions().
+
+    :return: Tuple of (changed keys, removed keys). New files count as changed.
+    """
+    changed = []
+    for key, csv_path in paths.items():
+        try:
+            mtime = csv_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        if loaded.get(key) != mtime and _rejected.get(key) != mtime:
+            changed.append(key)
+    removed = [key for key in loaded if key not in paths]
+    return changed, removed
+
+
+def _reject(key, mtime, error, rejected:list):
+    _rejected[key] = mtime
+    _held.pop(key, None)
+    rejected.append(key)
+    count("data_watcher.rejected")
+    logger.warning("Keeping the previous %s %s %s: %s", *key, error)
+
+
+def _hold(key, error, held:list):
+    # Not memoized by mtime: the file is read again on the next sync, when the
+    # rest of its snapshot may have caught up. Logged once per distinct problem.
+    held.append(key)
+    count("data_watcher.held")
+    if _held.get(key) != str(error):
+        _held[key] = str(error)
+        logger.warning("Holding back %s %s %s until the rest of its snapshot agrees: %s", *key, error)
+
+
+def _snapshot(model:str, year:int, paths:dict, entries:dict):
+    # The changed files of one model and year next to the versions of the others still live
+    snapshot = {}
+    for kind in KINDS:
+        key = (model, kind, year)
+        if key in entries:
+            snapshot[key] = entries[key][1]
+        elif key in paths and key in data_registry.dataset_paths():
+            try:
+                snapshot[key] = data_registry.load_dataset(*key)
+            except (OSError, ValueError):
+                continue
+    return snapshot
+
+
+def sync(data_dir=DATA_DIR):
+    """
+    Ingests every dataset that changed since it was loaded.
+
+    :param data_dir: Root of the data tree.
+
+    :return: Dictionary with loaded, rejected (failed validation), held (valid alone but inconsistent with
+        their snapshot), removed and rebuilt lists.
+    """
+    with _lock, span("data_watcher.sync"):
+        paths = discover_datasets(data_dir)
+        changed, removed = changed_datasets(paths, data_registry.loaded_versions())
+        removed = sorted(set(removed) | (set(data_registry.dataset_paths()) - set(paths)))
+
+        # A change to any file of a model and year retries its rejected siblings too
+        touched = {(key[0], key[2]) for key in changed}
+        for key in sorted(key for key in _rejected if (key[0], key[2]) in touched and key in paths and key not in changed):
+            del _rejected[key]
+            changed.append(key)
+
+        entries = {}
+        rejected = []
+        held = []
+        for key in changed:
+            try:
+                entries[key] = data_registry.read_dataset(key, paths[key])
+            except (OSError, ValueError) as error:
+                _reject(key, paths[key].stat().st_mtime_ns if paths[key].exists() else None, error, rejected)
+                continue
+            _rejected.pop(key, None)
+
+        # The same cross-file checks preload runs, e.g. seat_share against the hexmap winners
+        for model, year in sorted({(key[0], key[2]) for key in entries}):
+            try:
+                data_registry.validate_datasets(_snapshot(model, year, paths, entries))
+            except ValueError as error:
+                for key in sorted(key for key in entries if key[0] == model and key[2] == year):
+                    del entries[key]
+                    _hold(key, error, held)
+
+        if not entries and not removed:
+            return dict(loaded=[], rejected=rejected, held=held, removed=[], rebuilt=[])
+
+        for key in list(entries) + removed:
+            _held.pop(key, None)
+        data_registry.publish(paths, entries)
+        count("data_watcher.loaded", len(entries))
+        rebuilt = render_cache.refresh(list(entries) + removed)
+        logger.info("Loaded %s, removed %s, rebuilt %s renders",
+                    ", ".join(" ".join(map(str, key)) for key in entries) or "nothing",
+                    ", ".join(" ".join(map(str, key)) for key in removed) or "nothing", len(rebuilt))
+        return dict(loaded=sorted(entries), rejected=rejected, held=held, removed=removed, rebuilt=sorted(rebuilt))
+
+
+def _run(data_dir, timeout):
+    while True:
+        _dirty.wait(timeout)
+        # Let a burst of writes settle so files regenerated together are published together
+        while _dirty.is_set():
+            _dirty.clear()
+            time.sleep(DEBOUNCE_SECONDS)
+        try:
+            sync(data_dir)
+        except Exception:
+            logger.exception("Data reload failed")
+
+
+def _start_observer(data_dir):
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return False
+
+    class DirtyHandler(FileSystemEventHandler):
+
+        def on_any_event(self, event):
+            if event.src_path.endswith(".csv") or getattr(event, "dest_path", "").endswith(".csv"):
+                _dirty.set()
+
+    observer = Observer()
+    observer.schedule(DirtyHandler(), str(data_dir), recursive=True)
+    observer.daemon = True
+    observer.start()
+    return True
+
+
+def start(data_dir=DATA_DIR):
+    """
+    Starts watching the data tree, once per process. Call after the registry has been preloaded.
+
+    :param data_dir: Root of the data tree.
+
+    :return: True when the watcher is running.
+    """
+    global _thread
+    if not ENABLED:
+        return False
+    with _lock:
+        if _thread is not None:
+            return True
+        data_registry.watch()
+        # With watchdog the thread sleeps until a CSV changes, otherwise it scans every POLL_SECONDS
+        timeout = None if _start_observer(data_dir) else POLL_SECONDS
+        _thread = threading.Thread(target=_run, args=(data_dir, timeout), name="data-watcher", daemon=True)
+        _thread.start()
+    # Catch anything written while the registry was loading
+    _dirty.set()
+    return True
@@ -0,0 +1,309 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Hexmap Figure Engine
+# In compact mode, the default, each hex's colour is sent as an index into a
+# small palette, coordinates and indices as the smallest integer typed arrays
+# and the figure carries no template, since Streamlit applies its own theme.
+# ELECTION_PREDICTOR_COMPACT_FIGURES=0 restores the full figures and
+# ELECTION_PREDICTOR_WEBGL=1 draws the hexes with Scattergl.
+COMPACT = os.environ.get("ELECTION_PREDICTOR_COMPACT_FIGURES", "1") not in ("", "0", "false")
+WEBGL = os.environ.get("ELECTION_PREDICTOR_WEBGL", "") not in ("", "0", "false")
+
+HEX_SIZE = 16
+HEXMAP_HEIGHT = 800
+HEX_LINE = dict(color='black', width=0.5)
+UNCHANGED_COLOR = '#262730'
+HIGHLIGHT_LINE = dict(color='white', width=3)
+HIGHLIGHT_ZOOM = 3
+ANIMATION_FRAME_MS = 1000
+ANIMATION_FONT_COLOR = '#FAFAFA'
+
+
+def transform_coords(coord_one, coord_two):
+    """
+    Flips and rotates the hexmap coordinates so the UK is drawn upright.
+
+    Works on whole columns at once rather than row by row.
+
+    :param coord_one: Array of first hexmap coordinates.
+    :param coord_two: Array of second hexmap coordinates.
+
+    :return: Tuple of rotated x and y arrays.
+    """
+    x = np.asarray(coord_one)
+    y = np.asarray(coord_two)
+
+    # Flip vertically
+    x_flipped, y_flipped = x, -y
+
+    # Rotate anticlockwise
+    x_rotated, y_rotated = -y_flipped, x_flipped
+
+    return x_rotated, y_rotated
+
+
+def hexmap_layout():
+    """
+    Returns the shared layout used by every hexmap figure.
+
+    :return: Layout dictionary.
+    """
+    return dict(
+        xaxis=dict(showgrid=False, zeroline=False, visible=False),
+        yaxis=dict(showgrid=False, zeroline=False, visible=False),
+        plot_bgcolor='#0E1117',
+        margin=dict(l=0, r=0, t=0, b=0),
+        height=HEXMAP_HEIGHT,
+        hovermode='closest',
+        showlegend=False,
+        dragmode=False
+    )
+
+
+def build_hexmap_figure(constituency_df:pd.DataFrame, text=None):
+    """
+    Builds the constituency hexmap as a single Scatter trace with a per-point colour array.
+
+    Points are drawn in file order, so overlapping hexes stack exactly as they did
+    when every constituency had its own trace.
+
+    :param constituency_df: Hexmap data with coord_one, coord_two, color and constituency_name columns.
+    :param text: Optional array of hover labels in row order, defaults to the constituency names.
+
+    :return: Plotly figure.
+    """
+    return hexmap_figure(
+        constituency_df['coord_one'].to_numpy(),
+        constituency_df['coord_two'].to_numpy(),
+        constituency_df['color'].to_numpy(),
+        constituency_df['constituency_name'].to_numpy() if text is None else text)
+
+
+def smallest_int_array(values):
+    """
+    Casts integer values to the narrowest dtype that holds them, so they go out as short typed arrays.
+
+    :param values: Array of integers.
+
+    :return: Array.
+    """
+    values = np.asarray(values)
+    for dtype in (np.int8, np.uint8, np.int16, np.uint16, np.int32):
+        info = np.iinfo(dtype)
+        if values.size == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return values.astype(dtype, copy=False)
+    return values
+
+
+def palette_colors(colors):
+    """
+    Replaces per-point colour strings with indices into a palette of the distinct colours.
+
+    :param colors: Array of colours, one per point.
+
+    :return: Tuple of (palette list, index array).
+    """
+    palette, codes = np.unique(np.asarray(colors, dtype=object).astype(str), return_inverse=True)
+    return palette.tolist(), smallest_int_array(codes)
+
+
+def palette_colorscale(palette):
+    """
+    Builds a colour scale on which each integer from 0 to len(palette) - 1 lands exactly on its colour.
+
+    :param palette: List of colours.
+
+    :return: Plotly colour scale.
+    """
+    if len(palette) == 1:
+        return [[0, palette[0]], [1, palette[0]]]
+    return [[position / (len(palette) - 1), color] for position, color in enumerate(palette)]
+
+
+def hexmap_figure(coord_one, coord_two, colors, text, opacity=None, compact:bool=None, webgl:bool=None):
+    """
+    Builds a hexmap from raw arrays, one point per constituency.
+
+    :param coord_one: Array of first hexmap coordinates.
+    :param coord_two: Array of second hexmap coordinates.
+    :param colors: Array of hex colours, one per constituency.
+    :param text: Array of hover labels, one per constituency.
+    :param opacity: Optional array of marker opacities, one per constituency.
+    :param compact: Send colours as palette indices and drop the template, defaults to COMPACT.
+    :param webgl: Draw with Scattergl, defaults to WEBGL.
+
+    :return: Plotly figure.
+    """
+    compact = COMPACT if compact is None else compact
+    webgl = WEBGL if webgl is None else webgl
+
+    x, y = transform_coords(coord_one, coord_two)
+
+    marker = dict(
+        size=HEX_SIZE,
+        color=colors,
+        line=HEX_LINE,
+        angle=90)
+    if opacity is not None:
+        marker['opacity'] = opacity
+
+    layout = hexmap_layout()
+    if compact:
+        x, y = smallest_int_array(x), smallest_int_array(y)
+        palette, codes = palette_colors(colors)
+        marker.update(color=codes, colorscale=palette_colorscale(palette), cmin=0, cmax=max(len(palette) - 1, 1), showscale=False)
+        if opacity is not None:
+            marker['opacity'] = np.asarray(opacity, dtype=np.float32)
+        layout['template'] = 'none'
+
+    trace = go.Scattergl if webgl else go.Scatter
+    fig = go.Figure(trace(
+        x=x,
+        y=y,
+        mode='markers',
+        marker_symbol='hexagon2',
+        marker=marker,
+        text=text,
+        hoverinfo='text'
+    ))
+
+    fig.update_layout(**layout)
+
+    return fig
+
+
+def build_animated_hexmap_figure(coord_one, coord_two, text, frame_names, frame_codes, palette, frame_duration:int=ANIMATION_FRAME_MS):
+    """
+    Builds a hexmap that plays through several snapshots in the browser, one Plotly frame each.
+
+    Every frame shares the base trace's coordinates, hover text and colour scale and only
+    carries its own array of palette indices, so each extra snapshot costs one small
+    integer array rather than a whole figure.
+
+    :param coord_one: Array of first hexmap coordinates.
+    :param coord_two: Array of second hexmap coordinates.
+    :param text: Array of hover labels, shared by every frame.
+    :param frame_names: Frame labels, e.g. election years, in play order.
+    :param frame_codes: One array of indices into palette per frame.
+    :param palette: List of colours.
+    :param frame_duration: Milliseconds each frame is shown when playing.
+
+    :return: Plotly figure.
+    """
+    frame_codes = [smallest_int_array(codes) for codes in frame_codes]
+    frame_names = [str(name) for name in frame_names]
+
+    fig = hexmap_figure(coord_one, coord_two, np.asarray(palette, dtype=object)[frame_codes[0]], text, compact=True)
+    fig.update_traces(marker=dict(color=frame_codes[0], colorscale=palette_colorscale(palette), cmin=0, cmax=max(len(palette) - 1, 1)))
+    fig.frames = [go.Frame(name=name, data=[dict(type=fig.data[0].type, marker=dict(color=codes))], traces=[0])
+                  for name, codes in zip(frame_names, frame_codes)]
+
+    def animate(names, duration, **options):
+        return [names, dict(mode='immediate', frame=dict(duration=duration, redraw=True), transition=dict(duration=0), **options)]
+
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=0, b=60),
+        updatemenus=[dict(
+            type='buttons', direction='left', showactive=False, x=0, y=0, xanchor='left', yanchor='top',
+            pad=dict(t=10), bgcolor=UNCHANGED_COLOR, font=dict(color=ANIMATION_FONT_COLOR),
+            buttons=[
+                dict(label='Play', method='animate', args=animate(None, frame_duration, fromcurrent=True)),
+                dict(label='Pause', method='animate', args=animate([None], 0)),
+            ])],
+        sliders=[dict(
+            active=0, x=0.1, len=0.9, y=0, yanchor='top', pad=dict(t=10),
+            font=dict(color=ANIMATION_FONT_COLOR), currentvalue=dict(visible=False),
+            steps=[dict(label=name, method='animate', args=animate([name], 0)) for name in frame_names])])
+    return fig
+
+
+def build_diff_hexmap_figure(coord_one, coord_two, names, before_parties, after_parties, after_colors, changed):
+    """
+    Builds a hexmap where only the seats that changed hands are coloured, by their new winner.
+
+    :param coord_one: Array of first hexmap coordinates.
+    :param coord_two: Array of second hexmap coordinates.
+    :param names: Array of constituency names.
+    :param before_parties: Array of winning party labels in the first snapshot.
+    :param after_parties: Array of winning party labels in the second snapshot.
+    :param after_colors: Array of colours for the second snapshot's winners.
+    :param changed: Boolean array, True where the winner differs.
+
+    :return: Plotly figure.
+    """
+    names = np.asarray(names, dtype=object)
+    colors = np.where(changed, after_colors, UNCHANGED_COLOR)
+    text = np.where(
+        changed,
+        names + "<br>" + np.asarray(before_parties, dtype=object) + " → " + np.asarray(after_parties, dtype=object),
+        names + "<br>" + np.asarray(after_parties, dtype=object) + " hold")
+
+    return hexmap_figure(coord_one, coord_two, colors, text)
+
+
+def build_probability_hexmap_figure(coord_one, coord_two, names, party_names, party_colors, win_probability):
+    """
+    Builds a hexmap coloured by each seat's most likely winner and shaded by how likely that win is.
+
+    :param coord_one: Array of first hexmap coordinates.
+    :param coord_two: Array of second hexmap coordinates.
+    :param names: Array of constituency names.
+    :param party_names: Array of party names, one per probability column.
+    :param party_colors: Array of party colours, one per probability column.
+    :param win_probability: Array of constituencies x parties win probabilities.
+
+    :return: Plotly figure.
+    """
+    win_probability = np.asarray(win_probability)
+    favourite = win_probability.argmax(axis=1)
+    probability = win_probability[np.arange(len(favourite)), favourite]
+
+    names = np.asarray(names, dtype=object)
+    text = names + "<br>" + np.asarray(party_names, dtype=object)[favourite] + " " + np.char.mod("%.0f%%", probability * 100).astype(object)
+
+    # Toss-ups fade out but stay visible
+    opacity = 0.25 + 0.75 * probability
+
+    return hexmap_figure(coord_one, coord_two, np.asarray(party_colors, dtype=object)[favourite], text, opacity)
+
+
+def highlight_hexmap(figure_dict:dict, coord_one, coord_two, seat:int, zoom:float=HIGHLIGHT_ZOOM):
+    """
+    Outlines one constituency and zooms the map onto it.
+
+    The base trace and its arrays are reused as they are: only the marker size and axis
+    ranges are overridden and a one-point outline trace is added on top.
+
+    :param figure_dict: Hexmap figure as a dictionary, e.g. from render_cache.figure_dict().
+    :param coord_one: Array of first hexmap coordinates of every constituency.
+    :param coord_two: Array of second hexmap coordinates of every constituency.
+    :param seat: Position of the constituency in the coordinate arrays.
+    :param zoom: How far to zoom in.
+
+    :return: Figure dictionary.
+    """
+    x, y = transform_coords(coord_one, coord_two)
+    half_width = (x.max() - x.min()) / (2 * zoom)
+    half_height = (y.max() - y.min()) / (2 * zoom)
+    size = HEX_SIZE * zoom
+
+    base = figure_dict['data'][0]
+    outline = dict(
+        type='scatter',
+        x=[x[seat]],
+        y=[y[seat]],
+        mode='markers',
+        marker=dict(symbol='hexagon2', size=size, color='rgba(0,0,0,0)', line=HIGHLIGHT_LINE, angle=90),
+        hoverinfo='skip')
+
+    layout = figure_dict['layout']
+    return dict(
+        data=[dict(base, marker=dict(base['marker'], size=size)), outline],
+        layout=dict(
+            layout,
+            xaxis=dict(layout['xaxis'], range=[x[seat] - half_width, x[seat] + half_width]),
+            yaxis=dict(layout['yaxis'], range=[y[seat] - half_height, y[seat] + half_height])))
@@ -0,0 +1,258 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# Instrumentation
+# Span timings, cache hit/miss counters and bytes sent per rerun, kept per process
+# and shown on the hidden Diagnostics page, logged as one JSON line per rerun and
+# served as Prometheus text. Switched on with ELECTION_PREDICTOR_METRICS=1. When it
+# is off, span() hands back a shared no-op context manager, count() returns at once
+# and timed() leaves functions undecorated. Standard library only, so importing it
+# does not slow down the static pages.
+ENABLED = os.environ.get("ELECTION_PREDICTOR_METRICS", "") not in ("", "0", "false")
+
+# Port for the Prometheus text endpoint, unset to serve none
+METRICS_PORT = os.environ.get("ELECTION_PREDICTOR_METRICS_PORT")
+
+# Upper bounds in seconds of the span histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+RECENT_RERUNS = 200
+
+logger = logging.getLogger("election_predictor.metrics")
+
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_reruns = deque(maxlen=RECENT_RERUNS)
+_current = threading.local()
+_NULL_SPAN = nullcontext()
+
+
+def _record_span(name:str, seconds:float):
+    with _lock:
+        entry = _spans.get(name)
+        if entry is None:
+            entry = _spans[name] = dict(count=0, total=0.0, max=0.0, buckets=[0] * len(BUCKETS))
+        entry["count"] += 1
+        entry["total"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+        for position, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                entry["buckets"][position] += 1
+                break
+
+    rerun = getattr(_current, "rerun", None)
+    if rerun is not None:
+        calls, total = rerun["spans"].get(name, (0, 0.0))
+        rerun["spans"][name] = (calls + 1, total + seconds)
+
+
+@contextmanager
+def _span(name:str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_span(name, time.perf_counter() - start)
+
+
+def span(name:str):
+    """
+    Times a block of code.
+
+    :param name: Span name, e.g. "data.read".
+
+    :return: Context manager.
+    """
+    if not ENABLED:
+        return _NULL_SPAN
+    return _span(name)
+
+
+def timed(name:str=None):
+    """
+    Decorator that records a span for every call of the function.
+
+    :param name: Span name, defaults to the function name.
+
+    :return: Decorator. The function is returned unchanged when instrumentation is off.
+    """
+    def decorate(function):
+        if not ENABLED:
+            return function
+        span_name = name or function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with _span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name:str, amount:int=1):
+    """
+    Adds to a counter, e.g. count("render_cache.hit").
+
+    :param name: Counter name.
+    :param amount: Amount to add.
+    """
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def _count_sent_bytes(ctx):
+    # Wrap the session's message queue once so every ForwardMsg is measured after
+    # Streamlit has swapped cached messages for references
+    enqueue = ctx._enqueue
+    if getattr(enqueue, "_measures_bytes", False):
+        return
+
+    def measured_enqueue(msg):
+        rerun = getattr(_current, "rerun", None)
+        if rerun is not None:
+            rerun["bytes_sent"] += msg.ByteSize()
+            rerun["messages"] += 1
+        enqueue(msg)
+
+    measured_enqueue._measures_bytes = True
+    ctx._enqueue = measured_enqueue
+
+
+def begin_rerun():
+    """
+    Starts collecting spans and sent bytes for one script run.
+    """
+    if not ENABLED:
+        return
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        _count_sent_bytes(ctx)
+    _current.rerun = dict(start=time.perf_counter(), spans={}, bytes_sent=0, messages=0)
+
+
+def end_rerun(page:str):
+    """
+    Finishes the current script run, stores it with the recent reruns and logs it as one JSON line.
+
+    :param page: Page that was rendered.
+    """
+    rerun = getattr(_current, "rerun", None)
+    if not ENABLED or rerun is None:
+        return
+    _current.rerun = None
+
+    seconds = time.perf_counter() - rerun.pop("start")
+    rerun.update(page=page, seconds=seconds, timestamp=time.time())
+    _record_span("rerun", seconds)
+    count("rerun.bytes_sent", rerun["bytes_sent"])
+    with _lock:
+        _reruns.append(rerun)
+
+    logger.info(json.dumps(dict(event="rerun", **rerun)))
+
+
+def snapshot():
+    """
+    Copies the current metrics.
+
+    :return: Dictionary with enabled, spans, counters and reruns keys.
+    """
+    with _lock:
+        return dict(
+            enabled=ENABLED,
+            spans={name: dict(entry, buckets=list(entry["buckets"])) for name, entry in _spans.items()},
+            counters=dict(_counters),
+            reruns=list(_reruns),
+        )
+
+
+def _metric_name(name:str):
+    return "".join(char if char.isalnum() else "_" for char in name)
+
+
+def prometheus_text():
+    """
+    Formats the metrics in the Prometheus text exposition format.
+
+    :return: String.
+    """
+    metrics = snapshot()
+    lines = [
+        "# HELP election_predictor_span_seconds Time spent in instrumented code.",
+        "# TYPE election_predictor_span_seconds histogram",
+    ]
+    for name, entry in sorted(metrics["spans"].items()):
+        cumulative = 0
+        for bound, bucket in zip(BUCKETS, entry["buckets"]):
+            cumulative += bucket
+            lines.append(f'election_predictor_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'election_predictor_span_seconds_bucket{{span="{name}",le="+Inf"}} {entry["count"]}')
+        lines.append(f'election_predictor_span_seconds_sum{{span="{name}"}} {entry["total"]}')
+        lines.append(f'election_predictor_span_seconds_count{{span="{name}"}} {entry["count"]}')
+    for name, value in sorted(metrics["counters"].items()):
+        metric = f"election_predictor_{_metric_name(name)}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+_server = None
+
+
+def start_metrics_server(port=None):
+    """
+    Serves prometheus_text() at /metrics from a background thread, once per process.
+
+    :param port: Port to listen on, defaults to ELECTION_PREDICTOR_METRICS_PORT.
+
+    :return: True when a server is running.
+    """
+    global _server
+    port = port or METRICS_PORT
+    if not ENABLED or not port:
+        return False
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", int(port)), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return True
+
+
+def reset():
+    """
+    Clears every span, counter and stored rerun.
+    """
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _reruns.clear()
@@ -0,0 +1,335 @@
+import argparse
+import csv
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from data_validation import clean_name, party_code
+from instrumentation import count, span
+from model_registry import DATA_DIR, election_years
+
+# Live Results
+# Election-night ingestion. Declarations are dropped into data/live/ as small CSV
+# files with Constituency and Winner columns, one or many rows each; writers
+# should write to a temporary name and rename to *.csv so half-written files are
+# never read. A background thread polls the directory, applies new files in name
+# order to one in-memory table of declared winners and bumps a version counter
+# once per batch. The live figure, already serialized, and the seat deltas against
+# a model's prediction are built once per version and model and shared by every
+# session. Each session checks the version on a refresh timer and reruns its page
+# only when seats have changed, so thousands of viewers cost one render per version
+# rather than one per viewer, and a quiet tick sends no elements at all. Every
+# worker started by serve.py polls the same directory. Switched off with
+# ELECTION_PREDICTOR_LIVE=0.
+ENABLED = os.environ.get("ELECTION_PREDICTOR_LIVE", "1") not in ("", "0", "false")
+
+LIVE_DIR = DATA_DIR / "live"
+
+# Seconds between scans of the drop directory. Declarations arriving within one
+# scan are applied together as one version.
+POLL_SECONDS = 1.0
+
+# Seconds between a session's version checks
+REFRESH_SECONDS = 2.0
+
+# Declarations listed under the map
+LATEST_COUNT = 10
+
+logger = logging.getLogger("election_predictor.live_results")
+
+_lock = threading.Lock()
+_declared = {}
+_latest = deque(maxlen=LATEST_COUNT)
+_files = {}
+_version = 0
+_renders = {}
+_thread = None
+
+
+# Declarations
+def read_declarations(csv_path:Path):
+    """
+    Reads one declaration file.
+
+    :param csv_path: CSV with Constituency and Winner columns.
+
+    :return: List of (constituency, party) tuples as written in the file.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as declaration_file:
+        return [(row.get("Constituency") or "", row.get("Winner") or "") for row in csv.DictReader(declaration_file)]
+
+
+def declare(declarations):
+    """
+    Applies declared winners. A constituency declared again, e.g. after a recount, takes the new winner.
+
+    :param declarations: Iterable of (constituency, party) tuples. Names are cleaned and any spelling of a
+        party accepted, as for the CSV datasets; rows with an unknown party are logged and skipped.
+
+    :return: The new version, or the current one when nothing changed.
+    """
+    global _version
+    with _lock:
+        changed = 0
+        for name, party in declarations:
+            name, code = clean_name(name), party_code(party)
+            if not name or code is None:
+                count("live.rejected")
+                logger.warning("Skipping declaration %r for %r", party, name)
+                continue
+            if _declared.get(name) != code:
+                _declared[name] = code
+                _latest.appendleft((name, code))
+                changed += 1
+        if changed:
+            _version += 1
+            count("live.declared", changed)
+        return _version
+
+
+def scan(live_dir:Path=LIVE_DIR):
+    """
+    Applies every declaration file that is new or has changed since the last scan.
+
+    :param live_dir: Drop directory.
+
+    :return: Number of files applied.
+    """
+    if not live_dir.is_dir():
+        return 0
+    declarations = []
+    applied = 0
+    for csv_path in sorted(live_dir.glob("*.csv")):
+        try:
+            mtime = csv_path.stat().st_mtime_ns
+            if _files.get(csv_path.name) == mtime:
+                continue
+            declarations += read_declarations(csv_path)
+        except (OSError, UnicodeError, csv.Error) as error:
+            logger.warning("Skipping %s: %s", csv_path.name, error)
+            continue
+        _files[csv_path.name] = mtime
+        applied += 1
+    if declarations:
+        declare(declarations)
+    return applied
+
+
+def version():
+    """
+    Returns the current results version, bumped once per batch of new declarations.
+
+    :return: Integer.
+    """
+    return _version
+
+
+def reset():
+    """
+    Forgets every declaration, e.g. between a rehearsal and the real night. Files already in the drop
+    directory are applied again on the next scan.
+    """
+    global _version
+    with _lock:
+        _declared.clear()
+        _latest.clear()
+        _files.clear()
+        _version += 1
+
+
+def clear():
+    """
+    Drops the shared live renders, keeping the declarations. The next lookup builds them again.
+    """
+    with _lock:
+        _renders.clear()
+
+
+def _run(live_dir, timeout):
+    while True:
+        try:
+            scan(live_dir)
+        except Exception:
+            logger.exception("Live results scan failed")
+        time.sleep(timeout)
+
+
+def start(live_dir:Path=LIVE_DIR):
+    """
+    Starts polling the drop directory, once per process.
+
+    :param live_dir: Drop directory.
+
+    :return: True when the poller is running.
+    """
+    global _thread
+    if not ENABLED:
+        return False
+    with _lock:
+        if _thread is not None:
+            return True
+        _thread = threading.Thread(target=_run, args=(live_dir, POLL_SECONDS), name="live-results", daemon=True)
+        _thread.start()
+    return True
+
+
+# Shared Render
+def live_year():
+    """
+    Returns the election the live results are compared against: the latest year any model predicts.
+
+    :return: Year.
+    """
+    return election_years()[-1]
+
+
+def build_live_render(model:str, year:int, index:dict, declared:dict, latest):
+    """
+    Builds the live hexmap and the seat deltas against one model's prediction.
+
+    :param model: Model directory name.
+    :param year: Election year the model predicted.
+    :param index: Constituency index from analytics.constituency_index().
+    :param declared: Dictionary of constituency name to declared party code.
+    :param latest: (constituency, party code) tuples of the latest declarations, newest first.
+
+    :return: Dictionary with figure_json (the hexmap as Plotly JSON), seat_metrics, declared (seats declared),
+        seats, called (declared seats the model called correctly), unknown (declared names not in the index)
+        and latest keys.
+    """
+    import plotly.io as pio
+
+    from hexmap import UNCHANGED_COLOR, hexmap_figure
+
+    party_codes = index["party_codes"]
+    party_names = index["party_names"]
+    names = np.asarray(index["constituency"], dtype=object)
+
+    # Declared winners as party codes in constituency id order, -1 while undeclared
+    position = {code: party for party, code in enumerate(party_codes)}
+    winners = np.full(len(names), -1, dtype=np.int8)
+    seats = {}
+    for seat, name in enumerate(names):
+        seats.setdefault(name, []).append(seat)
+    unknown = []
+    for name, code in declared.items():
+        if name not in seats or code not in position:
+            unknown.append(name)
+            continue
+        winners[seats[name]] = position[code]
+    predicted = index["snapshots"].get((model, year), np.full(len(names), -1, dtype=np.int8))
+
+    is_declared = winners >= 0
+    has_prediction = predicted >= 0
+    labels = np.append(party_names, "n/a")
+    text = (np.asarray(index["constituency_name"], dtype=object)
+            + np.where(is_declared, "<br>Declared: " + labels[winners], "<br>Awaiting declaration")
+            + np.where(has_prediction, "<br>Predicted: " + labels[predicted], ""))
+    colors = np.where(is_declared, index["party_colors"][winners], UNCHANGED_COLOR)
+    figure = hexmap_figure(index["coord_one"], index["coord_two"], colors, text)
+
+    # Seats declared so far against the model's calls for the same seats
+    party_count = len(party_codes)
+    declared_counts = np.bincount(winners[is_declared], minlength=party_count)
+    predicted_counts = np.bincount(predicted[is_declared & has_prediction], minlength=party_count)
+    seat_metrics = [
+        dict(label=party_names[party], value=int(declared_counts[party]),
+             delta=int(declared_counts[party] - predicted_counts[party]),
+             delta_color="normal" if declared_counts[party] != predicted_counts[party] else "off")
+        for party in np.argsort(-declared_counts, kind="stable")
+        if declared_counts[party] or predicted_counts[party]
+    ]
+
+    return dict(
+        figure_json=pio.to_json(figure, validate=False),
+        seat_metrics=seat_metrics,
+        declared=int(is_declared.sum()),
+        seats=len(names),
+        called=int((winners == predicted)[is_declared].sum()),
+        unknown=sorted(unknown),
+        latest=[(name, party_names[position[code]] if code in position else code) for name, code in latest],
+    )
+
+
+def get_live_render(model:str):
+    """
+    Returns the shared live render for a model, building it once per results version.
+
+    :param model: Model directory name.
+
+    :return: Tuple of (version, render dictionary, see build_live_render).
+    """
+    from analytics import constituency_index
+
+    # A reloaded hexmap gives a new constituency index, which also invalidates the render
+    index = constituency_index()
+    with _lock:
+        current = (_version, id(index))
+        entry = _renders.get(model)
+        if entry is not None and entry[0] == current:
+            count("live.render.hit")
+            return current[0], entry[1]
+        declared = dict(_declared)
+        latest = list(_latest)
+
+    count("live.render.miss")
+    with span("live.render"):
+        render = build_live_render(model, live_year(), index, declared, latest)
+    with _lock:
+        _renders[model] = (current, render)
+    return current[0], render
+
+
+def replay(model:str, year:int, per_minute:int, live_dir:Path=LIVE_DIR, batch:int=1):
+    """
+    Writes a hexmap snapshot's winners into the drop directory as declarations, for rehearsals and load tests.
+
+    :param model: Model whose hexmap supplies the winners.
+    :param year: Election year of the hexmap.
+    :param per_minute: Declarations written per minute.
+    :param live_dir: Drop directory.
+    :param batch: Declarations per file.
+
+    :return: Number of declarations written.
+    """
+    from data_registry import load_dataset
+
+    constituency_df = load_dataset(model, "hexmap", year)
+    rows = list(zip(constituency_df["Constituency"].astype(str), constituency_df["Winner"].astype(str)))
+    order = np.random.default_rng(year).permutation(len(rows))
+
+    live_dir.mkdir(parents=True, exist_ok=True)
+    interval = 60.0 * batch / per_minute
+    for number, start in enumerate(range(0, len(rows), batch)):
+        temporary = live_dir / f"declaration_{number:05d}.tmp"
+        with open(temporary, "w", newline="", encoding="utf-8") as declaration_file:
+            writer = csv.writer(declaration_file)
+            writer.writerow(["Constituency", "Winner"])
+            writer.writerows(rows[row] for row in order[start:start + batch])
+        temporary.rename(temporary.with_suffix(".csv"))
+        time.sleep(interval)
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rehearse election night by replaying a hexmap as live declarations.")
+    parser.add_argument("--model", required=True, help="model whose hexmap supplies the winners")
+    parser.add_argument("--year", type=int, required=True, help="election year of the hexmap")
+    parser.add_argument("--per-minute", type=int, default=300, help="declarations per minute")
+    parser.add_argument("--batch", type=int, default=1, help="declarations per file")
+    parser.add_argument("--live-dir", type=Path, default=LIVE_DIR, help="drop directory")
+    args = parser.parse_args(argv)
+
+    written = replay(args.model, args.year, args.per_minute, args.live_dir, args.batch)
+    print(f"Wrote {written} declarations to {args.live_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
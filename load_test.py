@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+# Load Test
+# Opens Streamlit sessions against a running server the way a browser does: a
+# WebSocket to /_stcore/stream, one rerun request, and every message up to the
+# end of the script run. Reports completed sessions per second and latency. With
+# --workers it starts serve.py once per worker count and reports how throughput
+# scales. With --api it sends keep-alive HTTP requests to the prediction API
+# (api.py) instead and reports requests per second.
+APP_DIR = Path(__file__).resolve().parent
+
+
+async def open_session(url:str, query_string:str=""):
+    """
+    Runs one Streamlit session to the end of its first script run.
+
+    :param url: WebSocket URL of /_stcore/stream.
+    :param query_string: Query string the page is opened with.
+
+    :return: Tuple of (seconds, bytes received).
+    """
+    import websockets
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    start = time.perf_counter()
+    received = 0
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as websocket:
+        message = BackMsg()
+        message.rerun_script.query_string = query_string
+        message.rerun_script.page_script_hash = ""
+        await websocket.send(message.SerializeToString())
+
+        forward_message = ForwardMsg()
+        while True:
+            data = await websocket.recv()
+            received += len(data)
+            forward_message.ParseFromString(data)
+            if forward_message.WhichOneof("type") == "script_finished":
+                break
+    return time.perf_counter() - start, received
+
+
+async def run_load(url:str, clients:int, duration:float, query_string:str=""):
+    """
+    Keeps a number of clients opening sessions back to back for a fixed time.
+
+    :param url: WebSocket URL of /_stcore/stream.
+    :param clients: Concurrent clients.
+    :param duration: Seconds to run for.
+    :param query_string: Query string each session opens with.
+
+    :return: Result dictionary with sessions, errors, sessions_per_second and latency percentiles.
+    """
+    latencies = []
+    errors = 0
+    received = 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors, received
+        while time.perf_counter() < deadline:
+            try:
+                seconds, size = await open_session(url, query_string)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(seconds)
+            received += size
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return dict(
+        clients=clients,
+        sessions=len(latencies),
+        errors=errors,
+        seconds=elapsed,
+        sessions_per_second=len(latencies) / elapsed,
+        bytes_per_session=received / len(latencies) if latencies else None,
+        latency_p50=statistics.median(latencies) if latencies else None,
+        latency_p95=latencies[int(len(latencies) * 0.95)] if latencies else None,
+    )
+
+
+def api_paths(api_url:str):
+    """
+    Lists a mix of API paths to request: every list endpoint and one constituency per model and year.
+
+    :param api_url: Base URL of the API.
+
+    :return: List of paths.
+    """
+    with urllib.request.urlopen(f"{api_url}/models") as response:
+        registry = json.load(response)
+    paths = ["/models"]
+    for seat, (entry, year) in enumerate((entry, year) for entry in registry for year in entry["years"]):
+        for endpoint in ("vote_share", "seats", "nations", "constituencies", f"constituencies/{seat * 37 % 650}"):
+            paths.append(f"/predictions/{entry['model']}/{year}/{endpoint}")
+    return paths
+
+
+async def run_api_load(api_url:str, clients:int, duration:float, conditional:bool=False):
+    """
+    Keeps a number of keep-alive connections sending API requests back to back for a fixed time.
+
+    :param api_url: Base URL of the API, e.g. http://127.0.0.1:8502.
+    :param clients: Concurrent connections.
+    :param duration: Seconds to run for.
+    :param conditional: Send If-None-Match with the ETag last seen for each path, as a polling partner would.
+
+    :return: Result dictionary with requests, statuses, requests_per_second and latency percentiles.
+    """
+    host, port = api_url.split("//", 1)[1].rstrip("/").split(":")
+    paths = api_paths(api_url)
+    latencies = []
+    statuses = {}
+    received = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(offset):
+        nonlocal received
+        etags = {}
+        reader, writer = await asyncio.open_connection(host, int(port))
+        position = offset
+        while time.perf_counter() < deadline:
+            path = paths[position % len(paths)]
+            position += 1
+            request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: gzip\r\n"
+            if conditional and path in etags:
+                request += f"If-None-Match: {etags[path]}\r\n"
+            start = time.perf_counter()
+            writer.write((request + "\r\n").encode())
+            head = (await reader.readuntil(b"\r\n\r\n")).decode().split("\r\n")
+            headers = dict(line.lower().split(": ", 1) for line in head[1:] if line)
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            latencies.append(time.perf_counter() - start)
+
+            status = int(head[0].split()[1])
+            statuses[status] = statuses.get(status, 0) + 1
+            received += len(body)
+            if "etag" in headers:
+                etags[path] = headers["etag"]
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(offset) for offset in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return dict(
+        clients=clients,
+        requests=len(latencies),
+        statuses=statuses,
+        seconds=elapsed,
+        requests_per_second=len(latencies) / elapsed,
+        bytes_per_request=received / len(latencies) if latencies else None,
+        latency_p50=statistics.median(latencies) if latencies else None,
+        latency_p95=latencies[int(len(latencies) * 0.95)] if latencies else None,
+    )
+
+
+def _wait_for(port:int, process, timeout:float=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"serve.py exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("serve.py did not start in time")
+
+
+def scaling_report(worker_counts, clients:int, duration:float, port:int):
+    """
+    Starts serve.py with each worker count in turn and load-tests it.
+
+    :param worker_counts: Worker counts to try.
+    :param clients: Concurrent clients per run.
+    :param duration: Seconds per run.
+    :param port: Load balancer port.
+
+    :return: List of result dictionaries with a workers key added.
+    """
+    results = []
+    for workers in worker_counts:
+        process = subprocess.Popen([sys.executable, str(APP_DIR / "serve.py"), "--workers", str(workers),
+                                    "--host", "127.0.0.1", "--port", str(port), "--worker-port", str(port + 100)])
+        try:
+            _wait_for(port, process)
+            url = f"ws://127.0.0.1:{port}/_stcore/stream"
+            # Warm every worker's caches before measuring
+            asyncio.run(run_load(url, workers, 2))
+            result = asyncio.run(run_load(url, clients, duration))
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait()
+        results.append(dict(workers=workers, **result))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit app over its WebSocket protocol.")
+    parser.add_argument("--url", default="ws://127.0.0.1:8501/_stcore/stream", help="server to test")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per run")
+    parser.add_argument("--workers", type=int, nargs="+", help="start serve.py with each worker count instead of using --url")
+    parser.add_argument("--port", type=int, default=8900, help="load balancer port used with --workers")
+    parser.add_argument("--api", help="load-test the prediction API at this URL instead, e.g. http://127.0.0.1:8502")
+    parser.add_argument("--conditional", action="store_true", help="send If-None-Match on repeated API requests")
+    args = parser.parse_args(argv)
+
+    if args.api:
+        results = asyncio.run(run_api_load(args.api, args.clients, args.duration, args.conditional))
+    elif args.workers:
+        results = scaling_report(args.workers, args.clients, args.duration, args.port)
+        print(f"cores {os.cpu_count()}")
+        print(f"{'workers':>8}{'sessions/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        for result in results:
+            print(f"{result['workers']:>8}{result['sessions_per_second']:>12.1f}{(result['latency_p50'] or 0) * 1000:>10.0f}"
+                  f"{(result['latency_p95'] or 0) * 1000:>10.0f}{result['errors']:>8}")
+    else:
+        results = asyncio.run(run_load(args.url, args.clients, args.duration))
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+import argparse
+import json
+import resource
+import sys
+from pathlib import Path
+
+# Memory Report
+# Splits this process's memory into the shared resources held once per process
+# (datasets, indexes, rendered figures) and the state each browser session keeps,
+# so replicas can be sized as process baseline + sessions x per-session growth.
+# Sessions only hold navigation and widget values: every dataset, index and figure
+# lives in the process-wide caches of data_registry, analytics, backtest and
+# render_cache, or in st.cache_resource.
+#
+# The per-session figure is not the size of st.session_state. That misses the
+# script run, the element tree and the widget registry Streamlit keeps for every
+# session, and a hex selection has no upper bound: shift-clicking keeps adding
+# points. Instead the report opens real AppTest sessions that tour every page and
+# measures how much the process grows per session.
+APP_DIR = Path(__file__).resolve().parent
+
+# Pages each measured session visits, next to the static and model pages
+TOUR_PAGES = ["Model Comparison", "Backtest", "Seat Changes", "Seat Simulator", "What If"]
+
+def deep_size(value, seen=None):
+    """
+    Estimates the memory held by an object and everything it references.
+
+    NumPy arrays and pandas objects are counted by their buffers rather than walked.
+
+    :param value: Any object.
+    :param seen: Ids already counted, shared between calls to avoid counting shared objects twice.
+
+    :return: Size in bytes.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    module = type(value).__module__
+    if hasattr(value, "ByteSize") and hasattr(value, "SerializeToString"):
+        # Protocol buffer widget states
+        return sys.getsizeof(value) + value.ByteSize()
+    if module.startswith("pandas"):
+        if hasattr(value, "memory_usage"):
+            usage = value.memory_usage(deep=True)
+            return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+        return sys.getsizeof(value)
+    if module == "numpy":
+        size = sys.getsizeof(value)
+        if getattr(value, "dtype", None) is not None and value.dtype == object:
+            size += sum(deep_size(item, seen) for item in value.ravel())
+        return size
+    if module.startswith("plotly"):
+        return deep_size(value.to_plotly_json(), seen)
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += deep_size(vars(value), seen)
+    return size
+
+
+def process_memory():
+    """
+    Reads this process's resident memory.
+
+    :return: Dictionary with rss_bytes (None where /proc is not available) and peak_rss_bytes.
+    """
+    rss_bytes = None
+    try:
+        with open("/proc/self/statm") as statm:
+            rss_bytes = int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_bytes = peak if sys.platform == "darwin" else peak * 1024
+    return dict(rss_bytes=rss_bytes, peak_rss_bytes=peak_rss_bytes)
+
+
+def shared_memory():
+    """
+    Measures the process-wide caches shared by every session. Modules that have not been imported yet count as empty.
+
+    :return: Dictionary of resource name to size in bytes.
+    """
+    sizes = {}
+    modules = sys.modules
+    seen = set()
+
+    if "data_registry" in modules:
+        datasets = dict(modules["data_registry"]._datasets)
+        sizes["datasets"] = sum(deep_size(entry[1], seen) for entry in datasets.values())
+        bundle = modules["data_registry"]._bundle
+        sizes["bundle_mapped"] = bundle.bundle_path.stat().st_size if bundle is not None else 0
+    if "analytics" in modules:
+        sizes["indexes"] = sum(deep_size(entry[1], seen) for entry in dict(modules["analytics"]._cache).values())
+    if "backtest" in modules:
+        sizes["backtest"] = sum(deep_size(entry[1], seen) for entry in dict(modules["backtest"]._cache).values())
+    if "render_cache" in modules:
+        sizes["figures"] = sum(deep_size(entry[1], seen) for entry in dict(modules["render_cache"]._entries).values())
+    return sizes
+
+
+def session_memory(state):
+    """
+    Measures the state one session holds: its own keys and the values of every widget, keyed or not.
+
+    :param state: The session's streamlit.runtime.state.SessionState.
+
+    :return: Size in bytes.
+    """
+    seen = set()
+    return (deep_size(state._new_session_state, seen) + deep_size(state._old_state, seen)
+            + deep_size(state._new_widget_state.states, seen))
+
+
+def current_session_memory():
+    """
+    Measures the state of the session running the current script.
+
+    :return: Size in bytes, or None outside a script run.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    return session_memory(ctx.session_state._state)
+
+
+def active_sessions():
+    """
+    Measures every session connected to this Streamlit server.
+
+    :return: List of dictionaries with id and bytes keys, empty outside a running server.
+    """
+    try:
+        from streamlit.runtime import Runtime
+
+        sessions = Runtime.instance()._session_mgr.list_active_sessions()
+    except Exception:
+        return []
+
+    return [dict(id=session_info.session.id, bytes=session_memory(session_info.session.session_state))
+            for session_info in sessions]
+
+
+def session_growth(sessions:int=10):
+    """
+    Opens AppTest sessions that each tour every page, keeps them all open and measures how much
+    the process's resident memory grew per session.
+
+    One session tours the pages first and is discarded, so figures and st.cache_data entries
+    built on first use are not counted against the others.
+
+    :param sessions: Number of sessions to hold open at once.
+
+    :return: Dictionary with sessions, rss_growth_bytes, bytes_per_session and state_bytes_per_session keys.
+    """
+    import gc
+
+    from streamlit.testing.v1 import AppTest
+
+    from model_registry import models
+    from static_export import STATIC_PAGES
+
+    pages = list(STATIC_PAGES) + [model["page"] for model in models()] + TOUR_PAGES
+
+    def tour():
+        app = AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=120)
+        app.run()
+        for page in pages:
+            app.session_state["current_page"] = page
+            app.run()
+            if app.exception:
+                raise RuntimeError(f"{page}: {app.exception[0].message}")
+        return app
+
+    tour()
+    gc.collect()
+    before = process_memory()["rss_bytes"]
+    apps = [tour() for _ in range(sessions)]
+    gc.collect()
+    after = process_memory()["rss_bytes"]
+    if before is None or after is None:
+        raise RuntimeError("resident memory needs /proc")
+
+    state_bytes = [session_memory(app.session_state._state._state) for app in apps]
+    return dict(
+        sessions=sessions,
+        rss_growth_bytes=after - before,
+        bytes_per_session=max(0, after - before) // sessions,
+        state_bytes_per_session=max(state_bytes),
+    )
+
+def capacity(memory_limit_bytes:int, baseline_bytes:int, session_bytes:int):
+    """
+    Works out how many sessions fit in a replica.
+
+    :param memory_limit_bytes: Memory available to one replica.
+    :param baseline_bytes: Resident memory of a warmed-up process with no sessions.
+    :param session_bytes: Resident memory each open session adds, from session_growth().
+
+    :return: Number of sessions.
+    """
+    return max(0, (memory_limit_bytes - baseline_bytes) // max(session_bytes, 1))
+
+def build_report(memory_limit_mb:int=None, sessions:int=10):
+    """
+    Loads and prebuilds every shared resource, then reports process, shared and per-session memory.
+
+    :param memory_limit_mb: Replica memory limit in MB used to work out the session capacity.
+    :param sessions: Number of AppTest sessions to measure per-session growth with, 0 to skip.
+
+    :return: Report dictionary.
+    """
+    sys.path.insert(0, str(APP_DIR))
+    import analytics
+    import backtest
+    import data_registry
+    import render_cache
+    from data_bundle import open_bundle
+
+    before = process_memory()
+    data_registry.attach_bundle(open_bundle())
+    data_registry.preload()
+    analytics.constituency_index()
+    analytics.name_index()
+    analytics.fact_table()
+    backtest.backtest()
+    render_cache.prebuild()
+    after = process_memory()
+
+    report = dict(
+        process=after,
+        process_before_load=before,
+        shared=shared_memory(),
+    )
+    if sessions:
+        report["sessions"] = session_growth(sessions)
+        if memory_limit_mb:
+            report["sessions_per_replica"] = capacity(memory_limit_mb * 1024 * 1024, after["rss_bytes"] or after["peak_rss_bytes"],
+                                                      report["sessions"]["bytes_per_session"])
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report shared and per-session memory for sizing replicas.")
+    parser.add_argument("--limit-mb", type=int, help="replica memory limit, to work out sessions per replica")
+    parser.add_argument("--sessions", type=int, default=10, help="AppTest sessions to measure per-session growth with, 0 to skip")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.limit_mb, args.sessions)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        args.output.write_text(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import re
+import threading
+from pathlib import Path
+
+# Model Registry
+# Models and election years are discovered from the data/ tree: every directory
+# data/<model>/<kind>/ holding *_<year>.csv files is a dataset, whatever the file
+# name prefix (polls_model_econ_*, polls_eco_alt_model_* ...). The registry is
+# standard library only so the sidebar can be built without importing pandas.
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+KINDS = ("hexmap", "seat_share", "vote_share")
+
+# Directories under data/ that hold results or lookups rather than a model
+NON_MODEL_DIRS = ("actuals", "constituencies")
+
+# Display names for the known models, in sidebar order. A model directory that is
+# not listed here is still shown, with names derived from the directory.
+MODEL_INFO = {
+    "polls_model": dict(page="Polling Model", button="Polls Model",
+                        title="Polling Model", label="Polls"),
+    "polls_econ_model": dict(page="Polling + Econ Model", button="Polls & Economic Model",
+                             title="Polling & Economic Model", label="Polls & Economic"),
+    "polls_alt_model": dict(page="Polling + Social Media Model", button="Polls & Social Media Model",
+                            title="Polling & Social Media Model", label="Polls & Social Media"),
+    "polls_econ_alt_model": dict(page="Polling + Econ + Social Media Model", button="Polls, Economic & Social Media Model",
+                                 title="Polls, Economic & Social Media Model", label="Polls, Economic & Social Media"),
+}
+
+# Year the model pages open on, when the model has it
+DEFAULT_YEAR = 2019
+
+_YEAR_PATTERN = re.compile(r"_(\d{4})\.csv$")
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def discover_datasets(data_dir:Path=DATA_DIR):
+    """
+    Walks the data directory and indexes every dataset file.
+
+    :param data_dir: Root of the data tree.
+
+    :return: Dictionary of (model, kind, year) to CSV path.
+    """
+    paths = {}
+    for csv_path in sorted(data_dir.glob("*/*/*.csv")):
+        kind = csv_path.parent.name
+        match = _YEAR_PATTERN.search(csv_path.name)
+        if kind not in KINDS or match is None:
+            continue
+        model = csv_path.parent.parent.name
+        paths[(model, kind, int(match.group(1)))] = csv_path
+    return paths
+
+
+def _tree_signature(data_dir:Path):
+    # Adding or removing a file changes its directory's mtime, so the directory
+    # mtimes are enough to tell when the registry has to be rebuilt
+    return tuple((path.name, path.stat().st_mtime_ns) for path in sorted(data_dir.glob("*/*")) if path.is_dir())
+
+
+def _model_info(model:str):
+    info = MODEL_INFO.get(model)
+    if info is not None:
+        return info
+    name = model.replace("_", " ").title()
+    return dict(page=name, button=name, title=name, label=name)
+
+
+def build_models(data_dir:Path=DATA_DIR):
+    """
+    Builds the list of models that have a complete page: a hexmap, seat share and vote share for at least one year.
+
+    :param data_dir: Root of the data tree.
+
+    :return: List of dictionaries with model, page, button, title, label and years keys.
+    """
+    paths = discover_datasets(data_dir)
+    years = {}
+    for model, kind, year in paths:
+        if model not in NON_MODEL_DIRS:
+            years.setdefault(model, {}).setdefault(year, set()).add(kind)
+
+    order = list(MODEL_INFO) + sorted(set(years) - set(MODEL_INFO))
+    models = []
+    for model in order:
+        complete = sorted(year for year, kinds in years.get(model, {}).items() if kinds == set(KINDS))
+        if complete:
+            models.append(dict(model=model, years=complete, **_model_info(model)))
+    return models
+
+
+def models(data_dir:Path=DATA_DIR):
+    """
+    Returns the model registry, rebuilding it when files are added to or removed from the data tree.
+
+    :param data_dir: Root of the data tree.
+
+    :return: List of model dictionaries, see build_models.
+    """
+    signature = _tree_signature(data_dir)
+    with _lock:
+        entry = _cache.get(data_dir)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+    registry = build_models(data_dir)
+    with _lock:
+        _cache[data_dir] = (signature, registry)
+    return registry
+
+
+def clear():
+    """
+    Drops the cached model registry, so the next lookup walks the data tree again.
+    """
+    with _lock:
+        _cache.clear()
+
+
+def model_for_page(page:str):
+    """
+    Looks up the model shown on a page.
+
+    :param page: Page name as stored in st.session_state["current_page"].
+
+    :return: Model dictionary, or None when the page is not a model page.
+    """
+    for model in models():
+        if model["page"] == page:
+            return model
+    return None
+
+
+def election_years():
+    """
+    Returns every election year that at least one model covers.
+
+    :return: Sorted list of years.
+    """
+    return sorted({year for model in models() for year in model["years"]})
+
+
+def default_year(years):
+    """
+    Picks the year a year slider starts on.
+
+    :param years: Available years.
+
+    :return: DEFAULT_YEAR when available, otherwise the latest year.
+    """
+    return DEFAULT_YEAR if DEFAULT_YEAR in years else years[-1]
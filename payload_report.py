@@ -0,0 +1,188 @@
+import argparse
+import gzip
+import json
+import sys
+from pathlib import Path
+
+# Payload Report
+# Measures the hexmap figure JSON that st.plotly_chart sends for every model and
+# year, in the full, compact and compact WebGL modes of hexmap.hexmap_figure. Sizes
+# are taken after Streamlit's own conversion of the figure, so they match what goes
+# to the browser, and are reported raw and gzipped. Each model's animated hexmap,
+# every year in one figure, is measured against its single-year figures.
+#
+# On the Election Night page a refresh tick without new declarations sends no
+# elements, only the fragment run's session and status messages (about 1 KB in
+# total). A tick after seats change reruns the page and sends the live hexmap
+# again, measured here with nothing and everything declared.
+MODES = {
+    "full": dict(compact=False, webgl=False),
+    "compact": dict(compact=True, webgl=False),
+    "compact_webgl": dict(compact=True, webgl=True),
+}
+
+
+def spec_json(figure):
+    """
+    Serializes a figure the way st.plotly_chart does.
+
+    :param figure: Plotly figure or figure dictionary.
+
+    :return: JSON string.
+    """
+    import plotly.io as pio
+    import plotly.tools
+
+    # Importing Streamlit's chart element registers its default Plotly template
+    import streamlit.elements.plotly_chart  # noqa: F401
+
+    return pio.to_json(plotly.tools.return_figure_from_figure_or_data(figure, validate_figure=True), validate=False)
+
+
+def measure_case(model:str, year:int):
+    """
+    Measures one model page's hexmap in every mode.
+
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Dictionary of mode to a dictionary with bytes, gzip_bytes and the size of each trace key.
+    """
+    from data_registry import load_dataset
+    from hexmap import hexmap_figure
+    from render_cache import render_hover_text
+
+    constituency_df = load_dataset(model, "hexmap", year)
+    text = render_hover_text(model, year, constituency_df)
+
+    sizes = {}
+    for mode, options in MODES.items():
+        figure = hexmap_figure(
+            constituency_df["coord_one"].to_numpy(),
+            constituency_df["coord_two"].to_numpy(),
+            constituency_df["color"].to_numpy(),
+            text,
+            **options)
+        spec = spec_json(figure)
+        parsed = json.loads(spec)
+        sizes[mode] = dict(
+            bytes=len(spec.encode()),
+            gzip_bytes=len(gzip.compress(spec.encode())),
+            parts={key: len(json.dumps(value)) for key, value in parsed["data"][0].items()} | {
+                "layout": len(json.dumps(parsed["layout"]))},
+        )
+    return sizes
+
+
+def measure_animation(model:str, years):
+    """
+    Measures a model's animated hexmap against the mean of its single-year compact figures.
+
+    :param model: Model directory name.
+    :param years: Years the model has a hexmap for.
+
+    :return: Dictionary with frames, bytes, gzip_bytes, frames_bytes, single_year_bytes and single_year_gzip_bytes.
+    """
+    from render_cache import figure_spec, get_animation, get_render
+
+    spec = spec_json(get_animation(model))
+    parsed = json.loads(spec)
+    single_year = [figure_spec(get_render(model, year)).encode() for year in years]
+    return dict(
+        frames=len(parsed["frames"]),
+        bytes=len(spec.encode()),
+        gzip_bytes=len(gzip.compress(spec.encode())),
+        frames_bytes=len(json.dumps(parsed["frames"])),
+        single_year_bytes=sum(map(len, single_year)) // len(single_year),
+        single_year_gzip_bytes=sum(len(gzip.compress(body)) for body in single_year) // len(single_year),
+    )
+
+
+def measure_live(model:str):
+    """
+    Measures the live hexmap a refresh tick sends after seats change, before any declaration and
+    with every seat declared as the model predicted it.
+
+    :param model: Model directory name.
+
+    :return: Dictionary with empty_bytes, empty_gzip_bytes, declared_bytes and declared_gzip_bytes.
+    """
+    from analytics import constituency_index
+    from live_results import build_live_render, live_year
+
+    index = constituency_index()
+    year = live_year()
+    winners = index["snapshots"].get((model, year), [])
+    declared = {name: index["party_codes"][code] for name, code in zip(index["constituency"], winners) if code >= 0}
+
+    sizes = {}
+    for label, declarations in (("empty", {}), ("declared", declared)):
+        body = build_live_render(model, year, index, declarations, [])["figure_json"].encode()
+        sizes[f"{label}_bytes"] = len(body)
+        sizes[f"{label}_gzip_bytes"] = len(gzip.compress(body))
+    return sizes
+
+
+def build_report(years=None):
+    """
+    Measures every model and year.
+
+    :param years: Election years to include, defaults to all.
+
+    :return: Report dictionary with results, totals, animations and live keys.
+    """
+    from model_registry import models
+
+    results = []
+    for model in models():
+        for year in model["years"]:
+            if not years or year in years:
+                results.append(dict(model=model["model"], year=year, modes=measure_case(model["model"], year)))
+
+    totals = {}
+    for mode in MODES:
+        raw = sum(result["modes"][mode]["bytes"] for result in results)
+        gzipped = sum(result["modes"][mode]["gzip_bytes"] for result in results)
+        totals[mode] = dict(bytes=raw, gzip_bytes=gzipped)
+    for mode in MODES:
+        totals[mode]["ratio"] = totals[mode]["bytes"] / totals["full"]["bytes"] if totals["full"]["bytes"] else None
+    animations = {model["model"]: measure_animation(model["model"], model["years"]) for model in models()}
+    live = {model["model"]: measure_live(model["model"]) for model in models()}
+    return dict(results=results, totals=totals, animations=animations, live=live)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the hexmap figure payload size in each figure mode.")
+    parser.add_argument("--year", type=int, action="append", help="only measure these years")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.year)
+
+    print(f"{'model':<24}{'year':>6}" + "".join(f"{mode:>16}" for mode in MODES))
+    for result in report["results"]:
+        print(f"{result['model']:<24}{result['year']:>6}" + "".join(
+            f"{result['modes'][mode]['bytes']:>16,}" for mode in MODES))
+    print(f"{'total':<30}" + "".join(f"{report['totals'][mode]['bytes']:>16,}" for mode in MODES))
+    print(f"{'total gzipped':<30}" + "".join(f"{report['totals'][mode]['gzip_bytes']:>16,}" for mode in MODES))
+
+    print()
+    print(f"{'animated model':<24}{'frames':>6}{'animated':>16}{'gzipped':>16}{'frame data':>16}{'one year':>16}{'gzipped':>16}")
+    for model, sizes in report["animations"].items():
+        print(f"{model:<24}{sizes['frames']:>6}{sizes['bytes']:>16,}{sizes['gzip_bytes']:>16,}{sizes['frames_bytes']:>16,}"
+              f"{sizes['single_year_bytes']:>16,}{sizes['single_year_gzip_bytes']:>16,}")
+
+    print()
+    print(f"{'live model':<24}{'empty':>16}{'gzipped':>16}{'declared':>16}{'gzipped':>16}")
+    for model, sizes in report["live"].items():
+        print(f"{model:<24}{sizes['empty_bytes']:>16,}{sizes['empty_gzip_bytes']:>16,}"
+              f"{sizes['declared_bytes']:>16,}{sizes['declared_gzip_bytes']:>16,}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import plotly.io as pio
+import pyarrow as pa
+
+from analytics import constituency_index, hover_text, seat_tally
+from backtest import metric_deltas
+from data_registry import DATA_DIR, dataset_paths, dataset_version, load_dataset, reference_version, tree_version
+from data_validation import PARTIES
+from hexmap import UNCHANGED_COLOR, build_animated_hexmap_figure, build_hexmap_figure
+from instrumentation import count, span
+from model_registry import models
+
+# Render Cache
+# Holds the finished hexmap figure, legend markup and metric values for each
+# (model, year) so a slider move is a dictionary lookup rather than a DataFrame pipeline.
+MAX_ENTRIES = 32
+
+# Pre-rendered pages for multi-process serving. serve.py writes every render once
+# to this Arrow file and each worker memory-maps it, using an entry only while the
+# data versions it was built from still match.
+RENDER_BUNDLE_PATH = DATA_DIR / "renders.arrow"
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_animations = {}
+_render_bundle = None
+
+
+def build_legend_html(winning_parties):
+    """
+    Builds the legend markup for the parties that won at least one seat.
+
+    :param winning_parties: Names of the parties that won at least one seat, from analytics.seat_tally().
+
+    :return: HTML string.
+    """
+    legend_html = ""
+    for party in PARTIES.values():
+        if party["name"] in winning_parties:
+            legend_html += f"<span style='font-size:20px; color:{party['color']};'>⬣</span> <span style='font-size:15px;'>{party['name']}</span> &nbsp;&nbsp;&nbsp;"
+    return f"<div style='display: flex; justify-content: center; align-items: center;'>{legend_html}</div>"
+
+
+def build_seat_metrics(party_count_df, seat_deltas=None):
+    """
+    Builds the seat count scorecards, with deltas against the actual result when known.
+
+    :param party_count_df: Predicted seat share data.
+    :param seat_deltas: Dictionary of party to actual minus predicted seats from backtest.metric_deltas(), or None.
+
+    :return: List of metric dictionaries with label, value, delta and delta_color keys.
+    """
+    metrics = []
+    for party_name, predicted_count in zip(party_count_df['Party'], party_count_df['Total_Constituencies']):
+        metric = dict(label=party_name, value=int(predicted_count), delta=None, delta_color="normal")
+        if seat_deltas is not None:
+            delta = int(seat_deltas[party_name])
+            metric.update(delta=delta, delta_color="normal" if delta != 0 else "off")
+        metrics.append(metric)
+    return metrics
+
+
+def build_vote_share_metrics(party_share_df, vote_share_deltas=None):
+    """
+    Builds the vote share scorecards, with deltas against the actual result when known.
+
+    :param party_share_df: Predicted vote share data.
+    :param vote_share_deltas: Dictionary of party to rounded actual minus predicted share from
+        backtest.metric_deltas(), or None.
+
+    :return: List of metric dictionaries with label, value, delta and delta_color keys.
+    """
+    metrics = []
+    for party_name, predicted_share in zip(party_share_df['Party'], party_share_df['Vote_Share']):
+        metric = dict(label=party_name, value=str(predicted_share) + "%", delta=None, delta_color="normal")
+        if vote_share_deltas is not None:
+            delta = vote_share_deltas[party_name]
+            metric.update(delta=delta, delta_color="normal" if delta != 0 else "off")
+        metrics.append(metric)
+    return metrics
+
+
+def _dependencies(model:str, year:int):
+    return (
+        (model, "hexmap", year),
+        (model, "seat_share", year),
+        (model, "vote_share", year),
+        ("actuals", "seat_share", year),
+        ("actuals", "vote_share", year),
+    )
+
+
+def _versions(model:str, year:int):
+    # Tooltips list every model's winner for the year, so each hexmap of that year is an input
+    hexmaps = tuple(dataset_version(*key) for key in dataset_paths() if key[1] == "hexmap" and key[2] == year)
+    return (tuple(dataset_version(*key) for key in _dependencies(model, year)),
+            hexmaps, reference_version("constituency_nations"))
+
+
+def dependents(keys):
+    """
+    Lists the cached renders built from any of the given datasets.
+
+    :param keys: Iterable of (model, kind, year) dataset keys.
+
+    :return: Set of (model, year) render keys.
+    """
+    with _lock:
+        cached = list(_entries)
+    return {
+        (model, year)
+        for dataset_model, kind, dataset_year in keys
+        for model, year in cached
+        if year == dataset_year and (model == dataset_model or dataset_model == "actuals" or kind == "hexmap")
+    }
+
+
+def render_hover_text(model:str, year:int, constituency_df):
+    """
+    Builds the hexmap tooltips for one model and year, in the order of its hexmap CSV.
+
+    :param model: Model directory name.
+    :param year: Election year.
+    :param constituency_df: Hexmap data for the model and year.
+
+    :return: Array of hover labels.
+    """
+    # Tooltips come from the constituency index, reordered to this CSV's rows
+    index = constituency_index()
+    row_seats = index["row_seats"][(model, year)]
+    text = hover_text(index, model, year, {entry["model"]: entry["label"] for entry in models()})
+    return np.where(row_seats >= 0, text[row_seats], constituency_df["constituency_name"].to_numpy(dtype=object))
+
+
+def build_render(model:str, year:int):
+    """
+    Builds every rendered artefact for one model page and election year.
+
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Dictionary with figure_json, legend_html, seat_metrics and vote_share_metrics keys. Only the
+        serialized figure is kept; see figure_spec() and figure_dict() for the forms built on demand.
+    """
+    constituency_df = load_dataset(model, "hexmap", year)
+    text = render_hover_text(model, year, constituency_df)
+
+    # Deltas against the actual result come precomputed with the backtest
+    deltas = metric_deltas(model, year)
+
+    with span("figure.build"):
+        figure = build_hexmap_figure(constituency_df, text)
+    with span("figure.to_json"):
+        figure_json = pio.to_json(figure, validate=False)
+
+    return dict(
+        figure_json=figure_json,
+        legend_html=build_legend_html(set(constituency_index()["party_names"][seat_tally(model, year)["legend"]])),
+        seat_metrics=build_seat_metrics(load_dataset(model, "seat_share", year), deltas["seats"]),
+        vote_share_metrics=build_vote_share_metrics(load_dataset(model, "vote_share", year), deltas["vote_share"]),
+    )
+
+
+def figure_spec(render:dict):
+    """
+    Returns a render's figure as the Plotly JSON string st.plotly_chart sends.
+
+    :param render: Render dictionary from get_render().
+
+    :return: JSON string.
+    """
+    figure_json = render["figure_json"]
+    return figure_json if isinstance(figure_json, str) else str(figure_json, "utf-8")
+
+
+def figure_dict(render:dict):
+    """
+    Parses a render's figure into a new dictionary, for callers that change it before sending.
+
+    :param render: Render dictionary from get_render().
+
+    :return: Figure dictionary owned by the caller.
+    """
+    return json.loads(figure_spec(render))
+
+
+def get_render(model:str, year:int):
+    """
+    Returns the cached render for a model and year, rebuilding it when any input CSV has changed.
+
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Render dictionary, see build_render.
+    """
+    key = (model, int(year))
+    versions = _versions(*key)
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] == versions:
+            _entries.move_to_end(key)
+            count("render_cache.hit")
+            return entry[1]
+
+    count("render_cache.miss")
+    render = _bundled_render(key, versions)
+    if render is None:
+        with span("render.build"):
+            render = build_render(*key)
+
+    with _lock:
+        _entries[key] = (versions, render)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+    return render
+
+
+def _bundled_render(key, versions):
+    bundle = _render_bundle
+    if bundle is None or key not in bundle["rows"]:
+        return None
+    row = bundle["rows"][key]
+    table = bundle["table"]
+    if table["versions"][row].as_py() != json.dumps(versions):
+        return None
+
+    count("render_cache.bundle_hit")
+    with span("render.bundle_read"):
+        return dict(
+            figure_json=_mapped_string(table["figure_json"], row),
+            legend_html=table["legend_html"][row].as_py(),
+            seat_metrics=json.loads(table["seat_metrics"][row].as_py()),
+            vote_share_metrics=json.loads(table["vote_share_metrics"][row].as_py()),
+        )
+
+
+def _mapped_string(column:pa.ChunkedArray, row:int):
+    # The value's bytes as a slice of the memory-mapped file, so every worker serves
+    # the same pages of the page cache instead of holding its own copy of the JSON
+    for chunk in column.chunks:
+        if row < len(chunk):
+            break
+        row -= len(chunk)
+    offsets = np.frombuffer(chunk.buffers()[1], dtype=np.int32)[chunk.offset + row:chunk.offset + row + 2]
+    return chunk.buffers()[2].slice(int(offsets[0]), int(offsets[1] - offsets[0]))
+
+
+def build_animation(model:str):
+    """
+    Builds the animated hexmap of one model over every year it has a hexmap for.
+
+    Seats are in constituency id order. A seat missing from a year's hexmap is drawn in the
+    neutral colour for that frame.
+
+    :param model: Model directory name.
+
+    :return: Figure.
+    """
+    index = constituency_index()
+    model_column = index["models"].index(model)
+    columns = [column for column, year in enumerate(index["years"]) if (model, year) in index["snapshots"]]
+    codes = index["winner_table"][:, model_column, columns]
+
+    # The missing-seat colour goes last in the palette
+    palette = list(index["party_colors"]) + [UNCHANGED_COLOR]
+    codes = np.where(codes >= 0, codes, len(palette) - 1)
+
+    # Tooltips list the seat's winning party code in every frame, so one text array serves all frames
+    party_codes = np.array(index["party_codes"] + ["-"], dtype=object)
+    text = index["constituency_name"].astype(object) + "<br>"
+    for position, column in enumerate(columns):
+        text = text + f"{', ' if position else ''}{index['years'][column]} " + party_codes[codes[:, position]]
+
+    with span("animation.build"):
+        return build_animated_hexmap_figure(index["coord_one"], index["coord_two"], text,
+                                            [index["years"][column] for column in columns],
+                                            [codes[:, position] for position in range(len(columns))], palette)
+
+
+def get_animation(model:str):
+    """
+    Returns the cached animated hexmap for a model, rebuilding it when any hexmap CSV or the nations table changes.
+
+    :param model: Model directory name.
+
+    :return: Figure, see build_animation.
+    """
+    versions = (tree_version(("hexmap",)), reference_version("constituency_nations"))
+    with _lock:
+        entry = _animations.get(model)
+        if entry is not None and entry[0] == versions:
+            count("render_cache.animation_hit")
+            return entry[1]
+
+    count("render_cache.animation_miss")
+    figure = build_animation(model)
+    with _lock:
+        _animations[model] = (versions, figure)
+    return figure
+
+
+def write_render_bundle(bundle_path:Path=RENDER_BUNDLE_PATH):
+    """
+    Builds every render and writes them to one Arrow IPC file for workers to memory-map.
+
+    :param bundle_path: Where to write the bundle.
+
+    :return: Number of renders written.
+    """
+    # Renders are collected here rather than read back from _entries, which only
+    # holds the MAX_ENTRIES most recently used. Versions are read before the render
+    # is built, so a file changing in between leaves a row workers will reject.
+    entries = []
+    for key in render_keys():
+        versions = _versions(*key)
+        entries.append((key, (versions, get_render(*key))))
+
+    table = pa.table({
+        "model": [key[0] for key, _ in entries],
+        "year": pa.array([key[1] for key, _ in entries], pa.int16()),
+        "versions": [json.dumps(versions) for _, (versions, _) in entries],
+        "figure_json": [figure_spec(render) for _, (_, render) in entries],
+        "legend_html": [render["legend_html"] for _, (_, render) in entries],
+        "seat_metrics": [json.dumps(render["seat_metrics"]) for _, (_, render) in entries],
+        "vote_share_metrics": [json.dumps(render["vote_share_metrics"]) for _, (_, render) in entries],
+    })
+
+    tmp_path = Path(bundle_path).with_suffix(".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    tmp_path.replace(bundle_path)
+    return table.num_rows
+
+
+def attach_render_bundle(bundle_path:Path=RENDER_BUNDLE_PATH):
+    """
+    Memory-maps the pre-rendered pages written by write_render_bundle, when the file exists.
+
+    :param bundle_path: Bundle file.
+
+    :return: True when a bundle was attached.
+    """
+    global _render_bundle
+    if not Path(bundle_path).exists():
+        _render_bundle = None
+        return False
+    table = pa.ipc.open_file(pa.memory_map(str(bundle_path), "r")).read_all()
+    rows = {(model, year): row for row, (model, year) in enumerate(zip(table["model"].to_pylist(), table["year"].to_pylist()))}
+    _render_bundle = dict(table=table, rows=rows)
+    return True
+
+
+def render_keys():
+    """
+    Lists every model and year with a hexmap in the data tree.
+
+    :return: Sorted list of (model, year) render keys.
+    """
+    return sorted((model, year) for model, kind, year in dataset_paths() if kind == "hexmap" and model != "actuals")
+
+
+def prebuild():
+    """
+    Builds the render for every model and year found in the data tree.
+    """
+    for model, year in render_keys():
+        get_render(model, year)
+
+
+def invalidate(model:str=None, year:int=None):
+    """
+    Drops cached renders. With no arguments everything is dropped.
+
+    :param model: Only drop renders for this model.
+    :param year: Only drop renders for this election year.
+    """
+    with _lock:
+        for key in list(_entries):
+            if (model is None or key[0] == model) and (year is None or key[1] == int(year)):
+                del _entries[key]
+
+
+def clear():
+    """
+    Drops every cached render and animation. An attached render bundle stays attached.
+    """
+    with _lock:
+        _entries.clear()
+        _animations.clear()
+
+
+def refresh(keys):
+    """
+    Drops and rebuilds the renders that depend on changed datasets, leaving every other render cached.
+
+    :param keys: Iterable of (model, kind, year) dataset keys that changed.
+
+    :return: Set of (model, year) render keys that were rebuilt.
+    """
+    stale = dependents(keys)
+    with _lock:
+        for key in stale:
+            _entries.pop(key, None)
+
+    paths = dataset_paths()
+    rebuilt = set()
+    for model, year in sorted(stale):
+        if (model, "hexmap", year) in paths:
+            get_render(model, year)
+            rebuilt.add((model, year))
+    return rebuilt
@@ -0,0 +1,185 @@
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+# Multi-process Serving
+# Runs N `streamlit run app.py` workers on local ports behind an asyncio TCP proxy
+# on the public port. Each browser session is one WebSocket connection, so it stays
+# on the worker it was first sent to; new connections go to the worker with the
+# fewest open connections. Before the workers start, the data bundle is rebuilt if
+# it is stale and every page is pre-rendered into one Arrow file; workers
+# memory-map both, so the operating system keeps a single copy of the compiled
+# data and figures in its page cache for all of them. With --api-port the read-only
+# prediction API (api.py) runs next to them on the same data.
+APP_DIR = Path(__file__).resolve().parent
+APP_PATH = APP_DIR / "app.py"
+
+# Seconds a worker may take to answer its health check
+STARTUP_TIMEOUT = 120
+
+# Seconds a worker may take to stop before it is killed
+SHUTDOWN_TIMEOUT = 10
+
+BUFFER_SIZE = 64 * 1024
+
+
+def prepare_shared_data():
+    """
+    Builds the data bundle when it is missing or stale and pre-renders every page.
+
+    :return: Path of the render bundle.
+    """
+    import data_bundle
+    import data_registry
+    import render_cache
+
+    if not data_bundle.BUNDLE_PATH.exists() or data_bundle.check_bundle():
+        data_bundle.build_bundle()
+    data_registry.attach_bundle(data_bundle.open_bundle())
+    render_cache.write_render_bundle()
+    return render_cache.RENDER_BUNDLE_PATH
+
+
+def start_worker(port:int, render_bundle:Path):
+    """
+    Starts one Streamlit worker listening on localhost.
+
+    :param port: Worker port.
+    :param render_bundle: Pre-rendered pages for the worker to memory-map.
+
+    :return: Popen.
+    """
+    env = dict(os.environ, ELECTION_PREDICTOR_RENDER_BUNDLE=str(render_bundle))
+    return subprocess.Popen([
+        sys.executable, "-m", "streamlit", "run", str(APP_PATH),
+        "--server.address", "127.0.0.1",
+        "--server.port", str(port),
+        "--server.headless", "true",
+        "--browser.gatherUsageStats", "false",
+    ], cwd=APP_DIR, env=env)
+
+
+def start_api(host:str, port:int):
+    """
+    Starts the read-only prediction API (api.py) next to the workers.
+
+    :param host: Address to listen on.
+    :param port: Port to listen on.
+
+    :return: Popen.
+    """
+    return subprocess.Popen([sys.executable, str(APP_DIR / "api.py"), "--host", host, "--port", str(port)], cwd=APP_DIR)
+
+
+def wait_until_healthy(port:int, process, timeout:float=STARTUP_TIMEOUT, path:str="/_stcore/health"):
+    """
+    Waits for a worker to answer its health check.
+
+    :raises RuntimeError: When the worker exits or does not answer in time.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"worker on port {port} exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"worker on port {port} did not start within {timeout:.0f}s")
+
+
+class LoadBalancer:
+    """
+    TCP proxy that hands each new connection to the worker with the fewest open connections.
+    """
+
+    def __init__(self, worker_ports):
+        self.connections = {port: 0 for port in worker_ports}
+
+    async def _pipe(self, reader, writer):
+        try:
+            while data := await reader.read(BUFFER_SIZE):
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, client_reader, client_writer):
+        port = min(self.connections, key=self.connections.get)
+        self.connections[port] += 1
+        try:
+            worker_reader, worker_writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            self.connections[port] -= 1
+            client_writer.close()
+            return
+        try:
+            await asyncio.gather(self._pipe(client_reader, worker_writer), self._pipe(worker_reader, client_writer))
+        finally:
+            self.connections[port] -= 1
+
+    async def serve(self, host:str, port:int):
+        """
+        Proxies connections until SIGINT or SIGTERM. Open connections are dropped on the way out.
+        """
+        server = await asyncio.start_server(self.handle, host, port)
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+        await stopped.wait()
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve app.py from several worker processes behind a local load balancer.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of Streamlit workers")
+    parser.add_argument("--host", default="0.0.0.0", help="address the load balancer listens on")
+    parser.add_argument("--port", type=int, default=8501, help="port the load balancer listens on")
+    parser.add_argument("--worker-port", type=int, default=8600, help="port of the first worker")
+    parser.add_argument("--api-port", type=int, help="also serve the prediction API on this port")
+    args = parser.parse_args(argv)
+
+    render_bundle = prepare_shared_data()
+
+    ports = [args.worker_port + offset for offset in range(args.workers)]
+    workers = [start_worker(port, render_bundle) for port in ports]
+    if args.api_port:
+        workers.append(start_api(args.host, args.api_port))
+
+    # SIGTERM during startup unwinds like Ctrl-C so the workers are stopped either way
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for port, worker in zip(ports, workers):
+            wait_until_healthy(port, worker)
+        if args.api_port:
+            wait_until_healthy(args.api_port, workers[-1], path="/models")
+        print(f"Serving {args.workers} workers on http://{args.host}:{args.port}", flush=True)
+        asyncio.run(LoadBalancer(ports).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            try:
+                worker.wait(SHUTDOWN_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+                worker.wait()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
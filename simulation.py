@@ -0,0 +1,273 @@
+import numpy as np
+
+from analytics import NATIONS, constituency_index
+from data_registry import load_dataset
+
+# Seat Simulation
+# The predictions only give a national vote share and a winner per seat, so each
+# seat's baseline is the national share with the predicted winner lifted clear of
+# its strongest rival. The lead is wider for seats every snapshot agrees on and
+# narrower for seats that change hands between models and years.
+MIN_MARGIN = 2.0
+MAX_MARGIN = 20.0
+
+# Standard deviation, in vote share points, of national, per-nation and per-seat swings
+NATIONAL_SWING_SD = 2.5
+REGIONAL_SWING_SD = 1.5
+LOCAL_SWING_SD = 3.0
+
+# Swings between parties are pulled towards zero-sum by this much
+SWING_ANTICORRELATION = 0.8
+
+# Parties that only stand in one nation
+NATION_ONLY_PARTIES = {"SNP": "Scotland", "PLC": "Wales"}
+
+# Only the leading parties in each seat's baseline are simulated; with swings of a
+# few points anyone further back cannot realistically overtake the winner. The
+# What-if sliders move shares arbitrarily far, so they consider every party.
+CONTENDERS = 3
+
+CHUNK_SIZE = 4096
+
+# Draw counts offered on the Seat Simulator page. The largest has to finish well
+# under a second on one core; benchmark.py times it on every run.
+SIMULATION_COUNTS = [5000, 10000, 20000]
+
+
+def national_shares(index:dict, model:str, year:int):
+    """
+    Returns a model's predicted national vote share aligned to the index party codes.
+
+    :param index: Constituency index from analytics.constituency_index().
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Float array with one share per party code, 0 for parties without a prediction.
+    """
+    vote_share_df = load_dataset(model, "vote_share", year)
+    shares = dict(zip(vote_share_df["Party"].astype(str), vote_share_df["Vote_Share"]))
+    return np.array([shares.get(code, 0.0) for code in index["party_codes"]], dtype=np.float32)
+
+
+def seat_margins(index:dict, model:str, year:int):
+    """
+    Returns how far each seat's predicted winner is placed ahead of its nearest rival.
+
+    :param index: Constituency index from analytics.constituency_index().
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Float array of margins in vote share points, one per constituency.
+    """
+    winners = index["snapshots"][(model, year)]
+    snapshots = np.stack(list(index["snapshots"].values()))
+    agreement = (snapshots == winners).mean(axis=0)
+    return (MIN_MARGIN + (MAX_MARGIN - MIN_MARGIN) * agreement).astype(np.float32)
+
+
+def constituency_baseline(index:dict, model:str, year:int):
+    """
+    Builds a per-constituency vote share baseline from the national prediction and the hexmap winners.
+
+    :param index: Constituency index from analytics.constituency_index().
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Float array of shape (constituencies, parties).
+    """
+    shares = national_shares(index, model, year)
+    winners = index["snapshots"][(model, year)].astype(np.intp)
+    seats = np.arange(len(winners))
+
+    baseline = np.repeat(shares[None, :], len(winners), axis=0)
+
+    # Nation-only parties take no votes elsewhere
+    for code, nation in NATION_ONLY_PARTIES.items():
+        if code in index["party_codes"]:
+            baseline[index["nation"] != NATIONS.index(nation), index["party_codes"].index(code)] = 0.0
+
+    rivals = baseline.copy()
+    rivals[seats, winners] = -np.inf
+    baseline[seats, winners] = rivals.max(axis=1) + seat_margins(index, model, year)
+
+    return baseline
+
+
+def _party_swing_scale(shares):
+    # Small parties swing less in absolute terms than large ones
+    return np.sqrt(shares / max(shares.mean(), 1e-6)).astype(np.float32)
+
+
+def simulate(model:str, year:int, simulations:int=20000, seed:int=0):
+    """
+    Draws correlated national, per-nation and per-seat swings and counts the seats each party wins in every draw.
+
+    All draws in a chunk are evaluated together as one array; nothing loops per draw.
+
+    :param model: Model directory name.
+    :param year: Election year.
+    :param simulations: Number of draws.
+    :param seed: Random seed, so repeated calls give the same result.
+
+    :return: Dictionary with party_codes, seat_counts (simulations x parties) and
+        win_probability (constituencies x parties).
+    """
+    index = constituency_index()
+    baseline = constituency_baseline(index, model, year)
+    nation = index["nation"].astype(np.intp)
+    seat_count, party_count = baseline.shape
+    scale = _party_swing_scale(national_shares(index, model, year))
+
+    # Leading parties per seat, winner first. Seats sharing a nation and the same
+    # contenders share their swings, so swings are drawn per group and gathered per seat.
+    contenders = np.argsort(-baseline, axis=1, kind="stable")[:, :CONTENDERS]
+    leads = np.take_along_axis(baseline, contenders, axis=1)
+    leads = leads[:, 1:] - leads[:, :1]
+    groups, group_of_seat = np.unique(np.column_stack([nation, contenders]), axis=0, return_inverse=True)
+    group_of_seat = group_of_seat.ravel()
+    contender_codes = contenders.astype(np.int8)
+
+    rng = np.random.default_rng(seed)
+    seat_counts = np.empty((simulations, party_count), dtype=np.int16)
+    seat_wins = np.zeros((seat_count, party_count), dtype=np.int64)
+
+    for start in range(0, simulations, CHUNK_SIZE):
+        draws = min(CHUNK_SIZE, simulations - start)
+
+        national = rng.standard_normal((draws, party_count), dtype=np.float32)
+        national -= SWING_ANTICORRELATION * national.mean(axis=1, keepdims=True)
+        national *= NATIONAL_SWING_SD * scale
+
+        swing = rng.standard_normal((draws, len(NATIONS), party_count), dtype=np.float32)
+        swing *= REGIONAL_SWING_SD * scale
+        swing += national[:, None, :]
+
+        group_swing = swing[:, groups[:, :1], groups[:, 1:]]
+        local = rng.standard_normal((draws, seat_count), dtype=np.float32)
+        local *= LOCAL_SWING_SD
+
+        # Each challenger's share minus the winner's, per draw and seat, written into
+        # reused buffers so a chunk allocates as little as possible
+        winners = np.empty((draws, seat_count), dtype=np.int8)
+        winners[:] = contender_codes[:, 0]
+        best_margin = np.zeros((draws, seat_count), dtype=np.float32)
+        margin = np.empty((draws, seat_count), dtype=np.float32)
+        ahead = np.empty((draws, seat_count), dtype=bool)
+        for k in range(1, CONTENDERS):
+            np.take(group_swing[:, :, k] - group_swing[:, :, 0], group_of_seat, axis=1, out=margin)
+            margin += leads[:, k - 1]
+            margin -= local
+            np.greater(margin, best_margin, out=ahead)
+            np.copyto(winners, contender_codes[:, k], where=ahead)
+            np.maximum(best_margin, margin, out=best_margin)
+
+        for party in range(party_count):
+            won = winners == party
+            seat_counts[start:start + draws, party] = np.count_nonzero(won, axis=1)
+            seat_wins[:, party] += np.count_nonzero(won, axis=0)
+
+    return dict(
+        party_codes=index["party_codes"],
+        seat_counts=seat_counts,
+        win_probability=seat_wins / simulations,
+    )
+
+
+def seat_quantiles(seat_counts, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """
+    Summarises simulated seat counts for a fan chart.
+
+    :param seat_counts: Array of simulations x parties from simulate().
+    :param quantiles: Quantiles to compute.
+
+    :return: Float array of quantiles x parties.
+    """
+    return np.quantile(seat_counts, quantiles, axis=0)
+
+
+# What-if Swing
+# A uniform national swing moves every party's share by the same number of points
+# in every seat it stands in, so a challenger takes a seat once its swing relative
+# to the winner exceeds the seat's lead. Every party standing in a seat is a
+# challenger, however far back, so a large swing to a small party is counted.
+# Leads are sorted per (winner, challenger) pair, which turns each slider tick into
+# a few dozen binary searches over those thresholds; only the seats they return
+# are re-evaluated.
+def build_swing_table(model:str, year:int):
+    """
+    Precomputes the sorted flip thresholds of every party standing in each seat for one prediction.
+
+    :param model: Model directory name.
+    :param year: Election year.
+
+    :return: Dictionary with party_codes, shares, winners, contenders, leads, pairs, pair_seats and
+        pair_leads keys. contenders holds every party per seat, winner first, and leads the winner's
+        lead over each of the others (inf where a party does not stand). pairs lists (winner,
+        challenger, start, end) slices into pair_seats and pair_leads, which hold seat ids and leads
+        sorted by lead within each pair.
+    """
+    index = constituency_index()
+    baseline = constituency_baseline(index, model, year)
+    seat_count, party_count = baseline.shape
+
+    contenders = np.argsort(-baseline, axis=1, kind="stable")
+    contender_shares = np.take_along_axis(baseline, contenders, axis=1)
+    leads = contender_shares[:, :1] - contender_shares[:, 1:]
+    # A party that does not stand in a seat cannot swing into it
+    leads[contender_shares[:, 1:] <= 0] = np.inf
+
+    seat_ids = np.tile(np.arange(seat_count), party_count - 1)
+    winner_flat = np.tile(contenders[:, 0], party_count - 1)
+    challenger_flat = contenders[:, 1:].T.ravel()
+    lead_flat = leads.T.ravel()
+    keep = np.isfinite(lead_flat)
+    seat_ids, winner_flat, challenger_flat, lead_flat = (
+        seat_ids[keep], winner_flat[keep], challenger_flat[keep], lead_flat[keep])
+
+    order = np.lexsort((lead_flat, challenger_flat, winner_flat))
+    winner_flat, challenger_flat = winner_flat[order], challenger_flat[order]
+    boundaries = np.flatnonzero(np.diff(winner_flat * len(index["party_codes"]) + challenger_flat)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(order)]])
+
+    return dict(
+        party_codes=index["party_codes"],
+        shares=national_shares(index, model, year),
+        winners=contenders[:, 0].astype(np.int8),
+        contenders=contenders,
+        leads=leads,
+        pairs=[(int(winner_flat[start]), int(challenger_flat[start]), int(start), int(end))
+               for start, end in zip(starts, ends)],
+        pair_seats=seat_ids[order],
+        pair_leads=lead_flat[order],
+    )
+
+
+def apply_swing(swing_table:dict, shares):
+    """
+    Recomputes seat winners for a new set of national vote shares.
+
+    :param swing_table: Table from build_swing_table().
+    :param shares: Array of national vote shares aligned to swing_table["party_codes"].
+
+    :return: Int8 array of winning party indexes, one per constituency.
+    """
+    swing = np.asarray(shares, dtype=np.float32) - swing_table["shares"]
+    winners = swing_table["winners"].copy()
+
+    # Seats where some challenger's relative swing exceeds its lead
+    crossing = []
+    for winner, challenger, start, end in swing_table["pairs"]:
+        gap = swing[challenger] - swing[winner]
+        if gap > swing_table["pair_leads"][start]:
+            count = np.searchsorted(swing_table["pair_leads"][start:end], gap)
+            crossing.append(swing_table["pair_seats"][start:start + count])
+    if not crossing:
+        return winners
+
+    seats = np.unique(np.concatenate(crossing))
+    contenders = swing_table["contenders"][seats]
+    margins = swing[contenders] - swing[contenders[:, :1]]
+    margins[:, 1:] -= swing_table["leads"][seats]
+    winners[seats] = contenders[np.arange(len(seats)), margins.argmax(axis=1)]
+    return winners
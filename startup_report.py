@@ -0,0 +1,179 @@
+import argparse
+import json
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+# Startup Report
+# Measures import cost per module, the first render of each page in a fresh
+# interpreter and the time for `streamlit run` to serve its first byte. Prints
+# JSON so CI can compare runs, and exits non-zero when a --max budget is exceeded.
+APP_DIR = Path(__file__).resolve().parent
+APP_PATH = APP_DIR / "app.py"
+
+PROBE_MODULES = ["streamlit", "pandas", "numpy", "pyarrow", "plotly.graph_objects",
+                 "data_registry", "data_bundle", "hexmap", "render_cache"]
+
+# Modules the static pages must not pull in. plotly is not listed because
+# streamlit imports it itself to register its chart theme.
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "data_registry", "render_cache"]
+
+PAGES = ["Introduction", "Methodology", "Polling Model"]
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+_PAGE_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.session_state["current_page"] = {page!r}
+before = set(sys.modules)
+start = time.perf_counter()
+at.run()
+seconds = time.perf_counter() - start
+print(json.dumps(dict(
+    seconds=seconds,
+    imported=sorted(m for m in {heavy!r} if m in sys.modules and m not in before),
+    error=bool(at.exception))))
+"""
+
+
+def measure_import(module:str):
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+
+    :param module: Dotted module name.
+
+    :return: Cumulative import time in seconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(4) == module:
+            return int(match.group(2)) / 1e6
+    return 0.0
+
+
+def measure_page(page:str):
+    """
+    Renders one page with AppTest in a fresh interpreter.
+
+    :param page: Page name as stored in st.session_state["current_page"].
+
+    :return: Dictionary with seconds, the heavy modules the render imported and an error flag.
+    """
+    probe = _PAGE_PROBE.format(app=str(APP_PATH), page=page, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", probe], cwd=APP_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_time_to_first_byte(timeout:float=60.0):
+    """
+    Starts `streamlit run app.py` and waits for the first byte of the index page.
+
+    :param timeout: Seconds to wait before giving up.
+
+    :return: Seconds from process start to first byte.
+    """
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(APP_PATH), "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    response.read(1)
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"streamlit did not answer within {timeout} seconds")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def build_report(include_server:bool=True):
+    """
+    Runs every measurement.
+
+    :param include_server: Also measure time to first byte from a real server.
+
+    :return: Report dictionary, flat metric names to seconds plus page details.
+    """
+    report = dict(metrics={}, pages={})
+    for module in PROBE_MODULES:
+        report["metrics"][f"import.{module}"] = measure_import(module)
+    for page in PAGES:
+        page_result = measure_page(page)
+        report["pages"][page] = page_result
+        report["metrics"][f"page.{page}"] = page_result["seconds"]
+    if include_server:
+        report["metrics"]["ttfb"] = measure_time_to_first_byte()
+    return report
+
+
+def check_budget(report:dict, budgets:dict):
+    """
+    Compares a report against per-metric budgets.
+
+    Static pages that import any heavy module are always reported.
+
+    :param report: Report from build_report.
+    :param budgets: Dictionary of metric name to maximum seconds.
+
+    :return: List of violation messages.
+    """
+    violations = []
+    for name, limit in budgets.items():
+        value = report["metrics"].get(name)
+        if value is not None and value > limit:
+            violations.append(f"{name}: {value:.3f}s exceeds budget of {limit:.3f}s")
+    for page in ("Introduction", "Methodology"):
+        imported = report["pages"].get(page, {}).get("imported")
+        if imported:
+            violations.append(f"page.{page}: imported {', '.join(imported)}")
+    return violations
+
+
+def _parse_budget(value:str):
+    name, _, seconds = value.partition("=")
+    return name, float(seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report app.py cold-start timings.")
+    parser.add_argument("--no-server", action="store_true", help="skip the streamlit run time to first byte")
+    parser.add_argument("--max", action="append", type=_parse_budget, default=[], metavar="METRIC=SECONDS",
+                        help="fail when a metric exceeds its budget, e.g. --max page.Introduction=0.5")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = build_report(include_server=not args.no_server)
+    violations = check_budget(report, dict(args.max))
+    report["violations"] = violations
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        args.output.write_text(output)
+
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
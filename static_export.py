@@ -0,0 +1,363 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from model_registry import default_year, model_for_page, models
+
+# Static Export
+# Renders the Introduction, Methodology and every model/year page to static HTML
+# for CDN serving. Pages are produced by running app.py itself under Streamlit's
+# AppTest, so the same display_* functions build the content; the resulting
+# element tree is written out as HTML with the Plotly figure JSON embedded and
+# plotly.js shared between pages. A manifest records a hash of each page's inputs
+# (the app code and the CSVs it reads) so unchanged pages are not rendered again.
+APP_DIR = Path(__file__).resolve().parent
+APP_PATH = APP_DIR / "app.py"
+EXPORT_DIR = APP_DIR / "export"
+MANIFEST_NAME = "manifest.json"
+
+STATIC_PAGES = ["Introduction", "Methodology"]
+
+# Code every page render depends on
+CODE_FILES = ["app.py", "render_cache.py", "hexmap.py", "analytics.py", "backtest.py", "data_registry.py", "data_validation.py",
+              "model_registry.py", "static_export.py"]
+
+STYLE_CSS = """
+body { margin: 0; background: #0E1117; color: #FAFAFA; font-family: "Source Sans Pro", sans-serif; }
+a { color: #FF4B4B; }
+nav { position: fixed; top: 0; bottom: 0; left: 0; width: 240px; padding: 24px 16px; background: #262730; overflow-y: auto; }
+nav a { display: block; margin: 6px 0; color: #FAFAFA; text-decoration: none; }
+nav a.current { font-weight: 600; color: #FF4B4B; }
+main { margin-left: 272px; padding: 32px 48px; }
+.row { display: flex; gap: 16px; }
+.column { min-width: 0; }
+.metric { width: 100%; min-width: 120px; max-width: 220px; padding: 10px; }
+.metric-label { font-size: 14px; }
+.metric-value { font-size: 36px; }
+.metric-delta { font-size: 14px; }
+.delta-green { color: #09AB3B; }
+.delta-red { color: #FF2B2B; }
+.delta-gray { color: #808495; }
+.years { display: flex; justify-content: center; gap: 16px; margin: 8px 0; }
+.years span { font-weight: 600; }
+"""
+
+APP_JS = """
+document.querySelectorAll("script[data-plotly]").forEach(function (script) {
+    var figure = JSON.parse(script.textContent);
+    var target = document.getElementById(script.dataset.plotly);
+    Plotly.newPlot(target, figure.data, figure.layout || {}, {displayModeBar: false, responsive: true});
+});
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<link rel="stylesheet" href="assets/style.css">
+<script src="assets/{plotly_js}"></script>
+</head>
+<body>
+<nav>
+<h3>Precision Scope | UK General Election Predictor</h3>
+{nav}
+</nav>
+<main>
+{body}
+</main>
+<script src="assets/app.js"></script>
+</body>
+</html>
+"""
+
+
+def page_file(page:str, year=None):
+    """
+    Returns the output file name for a page.
+
+    :param page: Page name as stored in st.session_state["current_page"].
+    :param year: Election year for model pages, None for static pages.
+
+    :return: File name such as "polling-model-2019.html".
+    """
+    slug = "".join(char if char.isalnum() else "-" for char in page.lower())
+    slug = "-".join(part for part in slug.split("-") if part)
+    return f"{slug}.html" if year is None else f"{slug}-{year}.html"
+
+
+def export_pages():
+    """
+    Lists every page that is exported, with one page per year for every model in the registry.
+
+    :return: List of (page, year) tuples, year None for static pages.
+    """
+    return [(page, None) for page in STATIC_PAGES] + [(model["page"], year) for model in models() for year in model["years"]]
+
+
+def page_inputs(page:str, year=None):
+    """
+    Lists the files a page render depends on.
+
+    :param page: Page name.
+    :param year: Election year, or None.
+
+    :return: Sorted list of paths.
+    """
+    inputs = [APP_DIR / name for name in CODE_FILES]
+    page_model = model_for_page(page)
+    if page_model is not None:
+        from data_registry import REFERENCE_DIR, dataset_paths
+
+        # The constituency index behind the tooltips and legend is built from every model's
+        # hexmap and the nations table, so those change the page too
+        for (model, kind, dataset_year), csv_path in dataset_paths().items():
+            if dataset_year == year and (kind == "hexmap" or model in (page_model["model"], "actuals")):
+                inputs.append(csv_path)
+        inputs.append(REFERENCE_DIR / "constituency_nations.csv")
+    return sorted(inputs)
+
+
+def input_hash(paths):
+    """
+    Hashes the names and contents of a list of files.
+
+    :param paths: Iterable of paths.
+
+    :return: Hex digest.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).relative_to(APP_DIR).as_posix().encode())
+        digest.update(b"\0")
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def _inline(text:str):
+    from markdown_it import MarkdownIt
+
+    return MarkdownIt("commonmark", {"html": True}).renderInline(text)
+
+
+def _render_element(element, context:dict):
+    kind = type(element).__name__
+
+    if kind in ("Block", "Column", "SpecialBlock"):
+        parts = [_render_element(child, context) for child in element.children.values()]
+        if kind == "Column":
+            return f"<div class='column' style='flex: {element.weight}'>{''.join(parts)}</div>"
+        if kind == "Block" and element.proto.WhichOneof("type") == "flex_container" and element.children \
+                and all(type(child).__name__ == "Column" for child in element.children.values()):
+            return f"<div class='row'>{''.join(parts)}</div>"
+        return "".join(parts)
+
+    if kind in ("Title", "Header", "Subheader"):
+        tag = element.proto.tag or {"Title": "h1", "Header": "h2", "Subheader": "h3"}[kind]
+        return f"<{tag}>{_inline(element.value)}</{tag}>"
+
+    if kind == "Markdown":
+        from markdown_it import MarkdownIt
+
+        return MarkdownIt("commonmark", {"html": element.proto.allow_html}).render(element.value)
+
+    if kind == "Metric":
+        delta = ""
+        if element.proto.delta:
+            arrow = {"UP": "↑ ", "DOWN": "↓ "}.get(element.proto.MetricDirection.Name(element.proto.direction), "")
+            color = element.proto.MetricColor.Name(element.proto.color).lower()
+            delta = f"<div class='metric-delta delta-{color}'>{arrow}{html.escape(element.proto.delta)}</div>"
+        return (f"<div class='metric'><div class='metric-label'>{html.escape(element.proto.label)}</div>"
+                f"<div class='metric-value'>{html.escape(element.proto.body)}</div>{delta}</div>")
+
+    # AppTest has no dedicated class for charts, so they are matched on type
+    if getattr(element, "type", None) == "plotly_chart":
+        figure_id = f"figure-{context['figures']}"
+        context["figures"] += 1
+        spec = element.proto.spec.replace("</", "<\\/")
+        return f"<div id='{figure_id}'></div><script type='application/json' data-plotly='{figure_id}'>{spec}</script>"
+
+    if kind == "SelectSlider" and context["year"] is not None:
+        # The year slider becomes links to the page's other years
+        links = [
+            f"<span>{year}</span>" if year == context["year"]
+            else f"<a href='{page_file(context['page'], year)}'>{year}</a>"
+            for year in model_for_page(context["page"])["years"]
+        ]
+        return f"<div class='years'>{''.join(links)}</div>"
+
+    # Buttons and other widgets have no static equivalent
+    return ""
+
+
+def _navigation(current:str):
+    links = []
+    pages = [(page, None) for page in STATIC_PAGES] + [(model["page"], default_year(model["years"])) for model in models()]
+    for page, year in pages:
+        file_name = page_file(page, year)
+        css_class = " class='current'" if page == current else ""
+        links.append(f"<a href='{file_name}'{css_class}>{html.escape(page)}</a>")
+    return "\n".join(links)
+
+
+def render_page(page:str, year=None, plotly_js:str="plotly.min.js"):
+    """
+    Runs app.py for one page and year and converts the rendered elements to HTML.
+
+    :param page: Page name.
+    :param year: Election year for model pages, None for static pages.
+    :param plotly_js: File name of the shared plotly.js asset.
+
+    :return: HTML document as a string.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(APP_PATH), default_timeout=120)
+    app.session_state["current_page"] = page
+    app.run()
+    if year is not None and app.select_slider:
+        app.select_slider[0].set_value(year).run()
+    if app.exception:
+        raise RuntimeError(f"{page} {year}: {app.exception[0].message}")
+
+    context = dict(page=page, year=year, figures=0)
+    body = _render_element(app.main, context)
+    title = page if year is None else f"{page} – {year}"
+
+    return PAGE_TEMPLATE.format(title=html.escape(title), plotly_js=plotly_js, nav=_navigation(page), body=body)
+
+
+def _render_to_file(job):
+    page, year, output_path, plotly_js = job
+    content = render_page(page, year, plotly_js).encode()
+    tmp_path = Path(output_path).with_suffix(".tmp")
+    tmp_path.write_bytes(content)
+    tmp_path.replace(output_path)
+    return hashlib.sha256(content).hexdigest()
+
+
+def _write_asset(assets_dir:Path, name:str, content:bytes):
+    # Assets are named by content hash so CDNs can cache them indefinitely
+    digest = hashlib.sha256(content).hexdigest()
+    stem, _, suffix = name.rpartition(".")
+    file_name = f"{stem}.{digest[:12]}.{suffix}"
+    asset_path = assets_dir / file_name
+    if not asset_path.exists():
+        asset_path.write_bytes(content)
+    return file_name, digest
+
+
+def write_assets(output_dir:Path):
+    """
+    Writes the shared CSS and JavaScript files.
+
+    :param output_dir: Export directory.
+
+    :return: Dictionary of asset name to dict(file, sha256).
+    """
+    import plotly
+
+    assets_dir = output_dir / "assets"
+    assets_dir.mkdir(parents=True, exist_ok=True)
+
+    plotly_js_path = Path(plotly.__file__).parent / "package_data" / "plotly.min.js"
+    assets = {}
+    file_name, digest = _write_asset(assets_dir, "plotly.min.js", plotly_js_path.read_bytes())
+    assets["plotly.min.js"] = dict(file=file_name, sha256=digest)
+
+    # Pages reference these two by fixed name
+    for name, content in (("style.css", STYLE_CSS), ("app.js", APP_JS)):
+        (assets_dir / name).write_text(content)
+        assets[name] = dict(file=name, sha256=hashlib.sha256(content.encode()).hexdigest())
+    return assets
+
+
+def load_manifest(output_dir:Path):
+    manifest_path = output_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return dict(pages={}, assets={})
+    return json.loads(manifest_path.read_text())
+
+
+def _is_current(entry, inputs_digest:str, output_path:Path):
+    if entry is None or entry.get("inputs") != inputs_digest or not output_path.exists():
+        return False
+    return hashlib.sha256(output_path.read_bytes()).hexdigest() == entry.get("sha256")
+
+
+def export(output_dir:Path=EXPORT_DIR, workers=None, force:bool=False):
+    """
+    Renders every page whose inputs changed since the last export.
+
+    :param output_dir: Directory to write the site to.
+    :param workers: Number of worker processes, defaults to the CPU count.
+    :param force: Render every page even when its inputs are unchanged.
+
+    :return: Dictionary with rendered and skipped page file names.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    assets = write_assets(output_dir)
+    plotly_js = assets["plotly.min.js"]["file"]
+
+    # A new plotly.js means every page has to point at the new file name
+    if manifest.get("assets", {}).get("plotly.min.js", {}).get("file") != plotly_js:
+        force = True
+
+    pages = {}
+    jobs = []
+    for page, year in export_pages():
+        file_name = page_file(page, year)
+        inputs_digest = input_hash(page_inputs(page, year))
+        entry = manifest["pages"].get(file_name)
+        pages[file_name] = dict(page=page, year=year, inputs=inputs_digest, sha256=entry and entry.get("sha256"))
+        if force or not _is_current(entry, inputs_digest, output_dir / file_name):
+            jobs.append((page, year, str(output_dir / file_name), plotly_js))
+
+    if jobs:
+        # AppTest swaps out __main__ while app.py runs, so workers must find the
+        # job function through this module's import name rather than __main__
+        import static_export
+
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for job, digest in zip(jobs, pool.map(static_export._render_to_file, jobs)):
+                pages[Path(job[2]).name]["sha256"] = digest
+
+    index_path = output_dir / "index.html"
+    shutil.copyfile(output_dir / page_file(STATIC_PAGES[0]), index_path)
+
+    manifest = dict(pages=pages, assets=assets)
+    tmp_path = output_dir / (MANIFEST_NAME + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    tmp_path.replace(output_dir / MANIFEST_NAME)
+
+    rendered = [Path(job[2]).name for job in jobs]
+    return dict(rendered=rendered, skipped=sorted(set(pages) - set(rendered)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export every page to static HTML.")
+    parser.add_argument("--output", type=Path, default=EXPORT_DIR)
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--force", action="store_true", help="render every page even if unchanged")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = export(args.output, workers=args.workers, force=args.force)
+    seconds = time.perf_counter() - start
+    print(f"Rendered {len(result['rendered'])} pages, skipped {len(result['skipped'])} unchanged "
+          f"in {seconds:.1f}s to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+import data_registry
+from model_registry import DATA_DIR, discover_datasets
+
+# Test Data Tree
+# Copies data/ to a temporary directory and points the dataset registry at it,
+# so tests can rewrite CSVs without touching the real tree. Files are copied
+# rather than copied with their metadata, so every copy gets a fresh mtime and
+# no cache keyed by file versions can mistake it for the original.
+
+
+@contextmanager
+def temporary_data_tree():
+    """
+    Serves the registry from a fresh copy of the data tree for the duration of the block.
+
+    :return: Path of the copied data directory.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        shutil.copytree(DATA_DIR, data_dir, copy_function=shutil.copy, ignore=shutil.ignore_patterns("*.arrow", "*.tmp", "live"))
+        with mock.patch.object(data_registry, "discover_datasets", lambda: discover_datasets(data_dir)), \
+                mock.patch.object(data_registry, "REFERENCE_DIR", data_dir / "constituencies"):
+            data_registry.clear()
+            try:
+                yield data_dir
+            finally:
+                data_registry.clear()
+                data_registry._watched.clear()
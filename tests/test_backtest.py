@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import data_registry
+from analytics import constituency_index, fact_table
+from backtest import import_actual_hexmap, score_models
+from tests.data_tree import temporary_data_tree
+
+YEAR = 2019
+
+
+class ImportActualHexmapTest(unittest.TestCase):
+
+    def test_imported_hexmap_preloads_and_scores_seats(self):
+        with temporary_data_tree() as data_dir:
+            # Results in the shape a declaration feed gives them: names and party names
+            layout_df = pd.read_csv(data_dir / "polls_econ_model" / "hexmap" / f"polls_econ_model_hexmap_{YEAR}.csv")
+            results_path = data_dir / "results.csv"
+            results_df = layout_df[["Constituency", "elected_mp_party_name"]].rename(columns={"elected_mp_party_name": "Winner"})
+            results_df.to_csv(results_path, index=False)
+
+            csv_path = import_actual_hexmap(results_path, YEAR, data_dir / "actuals" / "hexmap")
+            self.assertTrue(csv_path.exists())
+
+            data_registry.clear()
+            data_registry.preload()
+            scores_df = score_models(fact_table(), constituency_index())
+            year_df = scores_df.xs(YEAR, level="year")
+            self.assertTrue(np.isfinite(year_df["seats_correct"]).all())
+            self.assertEqual(year_df.loc["polls_econ_model", "seats_called"], 650)
+
+    def test_invalid_results_are_not_written(self):
+        with temporary_data_tree() as data_dir:
+            results_path = data_dir / "results.csv"
+            pd.DataFrame({"Constituency": ["Aldershot"], "Winner": ["Conservative"]}).to_csv(results_path, index=False)
+            with self.assertRaises(ValueError):
+                import_actual_hexmap(results_path, YEAR, data_dir / "actuals" / "hexmap")
+            self.assertFalse((data_dir / "actuals" / "hexmap" / f"actual_hexmap_{YEAR}.csv").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
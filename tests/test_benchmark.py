@@ -0,0 +1,47 @@
+import sys
+import unittest
+from unittest import mock
+
+import instrumentation
+from benchmark import CACHED_MODULES, _clear_caches, _run, benchmark_simulation
+from model_registry import models
+
+# A counter that must show a miss on a cold run, for every cache a model page reads
+COLD_MISSES = ["data_registry.miss", "analytics.constituency_index.miss", "analytics.fact_table.miss",
+               "analytics.seat_tally.miss", "backtest.miss", "render_cache.miss"]
+
+
+class ClearCachesTest(unittest.TestCase):
+
+    def test_cold_run_misses_every_cache(self):
+        model = models()[0]
+        with mock.patch.object(instrumentation, "ENABLED", True):
+            _run(model["page"], model["years"][-1])
+            instrumentation.reset()
+            _run(model["page"], model["years"][-1])
+            warm = instrumentation.snapshot()["counters"]
+            self.assertFalse([name for name in COLD_MISSES if warm.get(name)], "warm run missed a cache")
+
+            instrumentation.reset()
+            _run(model["page"], model["years"][-1], cold=True)
+            cold = instrumentation.snapshot()["counters"]
+            self.assertEqual([name for name in COLD_MISSES if not cold.get(name)], [])
+
+    def test_every_cached_module_has_clear(self):
+        for name in CACHED_MODULES:
+            __import__(name)
+        _clear_caches()
+        self.assertEqual(sys.modules["model_registry"]._cache, {})
+        self.assertEqual(sys.modules["api"]._responses, {})
+        self.assertEqual(sys.modules["live_results"]._renders, {})
+
+
+class SimulationBenchmarkTest(unittest.TestCase):
+
+    def test_largest_simulation_count_under_a_second(self):
+        result = benchmark_simulation(repeat=3)
+        self.assertLess(result["warm_seconds"], 1.0, f"{result['simulations']} draws took {result['warm_seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    unittest.main()
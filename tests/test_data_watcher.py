@@ -0,0 +1,76 @@
+import unittest
+
+import pandas as pd
+
+import data_registry
+import data_watcher
+from tests.data_tree import temporary_data_tree
+
+SNAPSHOT = ("polls_model", 2024)
+
+
+def _flip_one_seat(data_dir):
+    # Moves one Conservative seat to Labour in the hexmap and the matching seat_share
+    model, year = SNAPSHOT
+    hexmap_path = data_dir / model / "hexmap" / f"{model}_hexmap_{year}.csv"
+    seat_share_path = data_dir / model / "seat_share" / f"{model}_seat_share_{year}.csv"
+    hexmap_df = pd.read_csv(hexmap_path)
+    seat = hexmap_df.index[hexmap_df["Winner"] == "CON"][0]
+    hexmap_df.loc[seat, ["Winner", "elected_mp_party", "elected_mp_party_name", "color"]] = ["LAB", "Lab", "Labour", "#dd0018"]
+    seat_share_df = pd.read_csv(seat_share_path)
+    seat_share_df.loc[seat_share_df["Party"] == "CON", "Total_Constituencies"] -= 1
+    seat_share_df.loc[seat_share_df["Party"] == "LAB", "Total_Constituencies"] += 1
+    return (hexmap_path, hexmap_df), (seat_share_path, seat_share_df)
+
+
+class SyncTest(unittest.TestCase):
+
+    def setUp(self):
+        data_watcher._rejected.clear()
+        data_watcher._held.clear()
+
+    def test_staggered_write_publishes_both_files(self):
+        model, year = SNAPSHOT
+        hexmap_key, seat_share_key = (model, "hexmap", year), (model, "seat_share", year)
+        with temporary_data_tree() as data_dir:
+            data_registry.preload()
+            data_registry.watch()
+            (hexmap_path, hexmap_df), (seat_share_path, seat_share_df) = _flip_one_seat(data_dir)
+
+            # The hexmap lands first and disagrees with the live seat_share
+            hexmap_df.to_csv(hexmap_path, index=False)
+            result = data_watcher.sync(data_dir)
+            self.assertEqual(result["loaded"], [])
+            self.assertEqual(result["held"], [hexmap_key])
+            self.assertNotIn(hexmap_key, data_watcher._rejected)
+
+            # The seat_share follows and the pair is published together
+            seat_share_df.to_csv(seat_share_path, index=False)
+            result = data_watcher.sync(data_dir)
+            self.assertEqual(result["loaded"], [hexmap_key, seat_share_key])
+            self.assertEqual(result["held"], [])
+            published = data_registry.load_dataset(model, "seat_share", year)
+            self.assertEqual(published["Total_Constituencies"].sum(), 650)
+            self.assertEqual(published.set_index("Party").loc["LAB", "Total_Constituencies"],
+                             seat_share_df.set_index("Party").loc["LAB", "Total_Constituencies"])
+
+            result = data_watcher.sync(data_dir)
+            self.assertEqual((result["loaded"], result["held"], result["rejected"]), ([], [], []))
+
+    def test_invalid_file_is_not_read_again_until_it_changes(self):
+        model, year = SNAPSHOT
+        seat_share_key = (model, "seat_share", year)
+        with temporary_data_tree() as data_dir:
+            data_registry.preload()
+            data_registry.watch()
+            _, (seat_share_path, seat_share_df) = _flip_one_seat(data_dir)
+            seat_share_df.loc[0, "Party"] = "XYZ"
+            seat_share_df.to_csv(seat_share_path, index=False)
+
+            self.assertEqual(data_watcher.sync(data_dir)["rejected"], [seat_share_key])
+            self.assertEqual(data_watcher.sync(data_dir)["rejected"], [])
+            self.assertIn(seat_share_key, data_watcher._rejected)
+
+
+if __name__ == "__main__":
+    unittest.main()
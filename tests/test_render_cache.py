@@ -0,0 +1,27 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pyarrow as pa
+
+import render_cache
+from data_registry import dataset_paths
+
+
+class WriteRenderBundleTest(unittest.TestCase):
+
+    def test_bundle_holds_every_render_past_the_lru_size(self):
+        expected = {(model, year) for model, kind, year in dataset_paths() if kind == "hexmap" and model != "actuals"}
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(render_cache, "MAX_ENTRIES", 2):
+            bundle_path = Path(tmp) / "renders.arrow"
+            written = render_cache.write_render_bundle(bundle_path)
+            table = pa.ipc.open_file(pa.memory_map(str(bundle_path), "r")).read_all()
+
+        self.assertGreater(len(expected), 2)
+        self.assertEqual(written, len(expected))
+        self.assertEqual(set(zip(table["model"].to_pylist(), table["year"].to_pylist())), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from analytics import constituency_index
+from simulation import apply_swing, build_swing_table, constituency_baseline
+
+SNAPSHOTS = [("polls_model", 2024), ("polls_econ_model", 2019)]
+
+
+def brute_force_winners(index:dict, model:str, year:int, swing_table:dict, shares):
+    # Every standing party's share after a uniform swing, highest wins
+    baseline = constituency_baseline(index, model, year)
+    totals = baseline + (np.asarray(shares, dtype=np.float32) - swing_table["shares"])
+    totals[baseline <= 0] = -np.inf
+    return totals.argmax(axis=1)
+
+
+class ApplySwingTest(unittest.TestCase):
+
+    def assert_matches_brute_force(self, model, year, swing_table, shares):
+        expected = brute_force_winners(constituency_index(), model, year, swing_table, shares)
+        np.testing.assert_array_equal(apply_swing(swing_table, shares), expected)
+
+    def test_matches_all_party_recompute(self):
+        rng = np.random.default_rng(0)
+        for model, year in SNAPSHOTS:
+            swing_table = build_swing_table(model, year)
+            base = swing_table["shares"]
+            self.assert_matches_brute_force(model, year, swing_table, base)
+            for _ in range(50):
+                self.assert_matches_brute_force(model, year, swing_table, np.clip(base + rng.normal(0, 8, len(base)), 0, 70))
+
+    def test_large_swing_to_minor_party(self):
+        for model, year in SNAPSHOTS:
+            swing_table = build_swing_table(model, year)
+            green = swing_table["party_codes"].index("GRE")
+            shares = np.array(swing_table["shares"])
+            shares[green] = 60.0
+            winners = apply_swing(swing_table, shares)
+            self.assert_matches_brute_force(model, year, swing_table, shares)
+            self.assertGreater(np.count_nonzero(winners == green), 300)
+
+    def test_every_party_can_sweep(self):
+        model, year = SNAPSHOTS[0]
+        swing_table = build_swing_table(model, year)
+        for party in range(len(swing_table["party_codes"])):
+            shares = np.array(swing_table["shares"])
+            shares[party] = 70.0
+            self.assert_matches_brute_force(model, year, swing_table, shares)
+
+
+if __name__ == "__main__":
+    unittest.main()